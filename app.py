@@ -1,25 +1,18 @@
 import os
-import requests
+import deliveries
+import groupme
+import logs
+import metrics
 import commands.groupme_message_type as gm
 
 
 from flask import Flask, request
 from flask_heroku import Heroku
-from taunt import taunt
 from typing import Any, Dict, List, Tuple
-from commands.score import ScoreCommand
-from commands.leaderboard import LeaderboardCommand
-from commands.add_user import AddCommand
-from commands.botch import BotchCommand
-from commands.help import HelpCommand
+from commands import cache, registry, tenancy, writer
 from commands.models import Score
-from commands.partner import PartnerCommand
-from commands.refresh import RefreshCommand
-from commands.scoreboard import ScoreboardCommand
-from commands.strike import StrikeCommand
-from urllib.parse import urlencode
-from urllib.request import Request, urlopen
 from database import db
+from outbox import outbox
 
 app = Flask(__name__)
 
@@ -31,12 +24,30 @@ if app.debug:
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 heroku = Heroku(app)
 db.init_app(app)
+logs.setup()
 init_rank = False
 
 GroupMe = Dict
 Response = Tuple[str, int]
 
 
+@app.before_request
+def start_metrics() -> None:
+    metrics.start_request()
+
+
+@app.teardown_request
+def finish_metrics(exception) -> None:
+    # Teardown also runs for requests that raised.
+    metrics.finish_request(request.endpoint or 'unknown')
+
+
+@app.route('/metrics', methods=['GET'])
+def export_metrics():
+    """ Request, command and API latency histograms for Prometheus. """
+    return metrics.render(), 200, {'Content-Type': metrics.CONTENT_TYPE}
+
+
 @app.route('/', methods=['POST'])
 def webhook() -> Response:
     """
@@ -47,133 +58,129 @@ def webhook() -> Response:
         str: 'ok' or 'not ok'.
     """
     message: Dict[str, Any] = request.get_json()
-    admin: List[str] = os.getenv('ADMIN', '').split(':')
-
-    sender: str = message.get('sender_id', None)
-    text: str = message.get('text', None)
-    print(message)
 
     # Ignore messages sent from the bot.
     if sender_is_bot(message):
         return 'ok', 200
 
-    commands = []
+    # GroupMe redelivers callbacks it thinks failed; handle each once.
+    message_id = message.get('id')
+    if not deliveries.recent.claim(message_id):
+        logs.command.info("duplicate delivery",
+                          extra={'fields': {'id': message_id}})
+        return 'ok', 200
 
-    if text.startswith(gm.RECORD_SCORE):
-        if sender not in admin:
-            commands.append(ScoreCommand(message, check=True))
-        else:
-            commands.append(ScoreCommand(message))
-    elif text.startswith(gm.PARTNER):
-        commands.append(PartnerCommand(message))
-    elif (text.startswith(gm.LEADERBOARD) or
-          text.startswith(gm.LB)):
-        commands.append(LeaderboardCommand(message))
-    elif (text.startswith(gm.ADMIN_VERIFY)) and sender in admin:
-        messages = get_messages_before_id(message.get('id'))
-        messages = filter_messages_for_scores(messages)
+    # One deployment can serve several groups; each gets its own tables.
+    tenant = tenancy.lookup(db, message.get('group_id'))
+    if tenant is None:
+        logs.traffic.warning("unknown group", extra={'fields': {
+            'id': message_id, 'group': message.get('group_id')}})
+        return 'ok', 200
+
+    try:
+        with tenancy.activate(tenant):
+            handle(message)
+    except Exception:
+        deliveries.recent.release(message_id)
+        raise
+    return 'ok', 200
+
+
+def handle(message: GroupMe) -> None:
+    """ Runs the message's commands and queues the bot's replies. """
+    admin: List[str] = tenancy.current().admins
+    sender: str = message.get('sender_id', None)
+    text: str = message.get('text', None)
+
+    commands = []
+    notes: List[str] = []
+    # Cached responses are keyed by the data version read this request.
+    cache.refresh()
+
+    is_admin = sender in admin
+    route = registry.lookup(text, is_admin)
+
+    received = {'fields': {'id': message.get('id'), 'sender': sender,
+                           'text': text}}
+    if route is not None:
+        logs.command.info("received %s", route.name, extra=received)
+    else:
+        # Sampled: most of a group's messages are plain chat.
+        logs.traffic.info("received", extra=received)
+
+    if route is registry.CHECK:
+        ScoreCommand = route.load()
+        messages = get_approved_scores(message.get('id'), admin)
         for msg in messages:
             commands.append(ScoreCommand(msg))
         if len(messages) == 0:
-            resp = "No `/score` messages in the last 20 messages."
-            print(resp)
-            if not app.debug:
-                reply(resp)
-    elif (text.startswith(gm.BOTCH)):
-        commands.append(BotchCommand(message) if sender in admin else
-                        BotchCommand(message, admin=False))
-    elif (text.startswith(gm.UNBOTCH)):
-        commands.append(BotchCommand(message, unbotch=True) if sender in admin
-                        else BotchCommand(message, unbotch=True, admin=False))
-    elif (text.startswith(gm.STRIKE)):
-        commands.append(StrikeCommand(message) if sender in admin else
-                        StrikeCommand(message, admin=False))
-    elif (text.startswith(gm.HELP_V)):
-        commands.append(HelpCommand(message, verbose=True))
-    elif (text.startswith(gm.HELP)):
-        commands.append(HelpCommand(message))
-    elif (text.startswith(gm.ADD_USER)):
-        command = AddCommand(message) if sender in admin else\
-            AddCommand(message, admin=False)
-        commands.append(command)
-    elif (text.startswith(gm.SB)):
-        commands.append(ScoreboardCommand(message))
-    elif (text.startswith(gm.REFRESH)) and sender in admin:
-        commands.append(RefreshCommand(message))
+            notes.append("No new approved `/score` messages.")
+    elif route is not None:
+        commands.append(route.build(message, is_admin))
     elif gm.BOT_NAME in text.lower():
-        note = taunt(message.get('text', ''))
-        print(note)
-        if not app.debug:
-            reply(note)
-
+        # Imported here since TextBlob/NLTK are slow to load.
+        from taunt import taunt
+        notes.append(taunt(message.get('text', '')))
+
+    # Every command from one webhook shares a single transaction, and
+    # transactions that can change match data are applied one at a time.
+    mutates = any(command.mutates for command in commands)
+    if mutates:
+        writer.lock(db)
     for command in commands:
-        data = command.generate_data(db)
+        with metrics.timed(command, 'generate_data'):
+            data = command.generate_data(db)
+        if data is not None and not app.debug:
+            db.session.add(data)
+    if any(command.wrote for command in commands):
+        cache.bump(db)
 
-        if not app.debug:
-            if data is not None:
-                db.session.add(data)
-            db.session.commit()
+    if len(commands) > 0 and not app.debug:
+        db.session.commit()
 
-        note = command.generate_message()
-        if not app.debug:
-            reply(note)
-        print(note)
-
-    return 'ok', 200
-
-
-def reply(msg: str) -> None:
-    """ Sends the bot's message via the GroupMe API. """
-    url = 'https://api.groupme.com/v3/bots/post'
-    data = {'bot_id': os.getenv('BOT_ID'),
-            'text': msg}
-    if data['bot_id'] is None:
-        print("BOT_ID environment variable not set. Please configure with\
-              `heroku config:set BOT_ID=ID`.")
-        return
+    for command in commands:
+        with metrics.timed(command, 'generate_message'):
+            note = command.generate_message()
+        notes.append(note)
 
-    request = Request(url, urlencode(data).encode())
-    response = urlopen(request).read().decode()
-    print(response)
+    if notes:
+        logs.command.info("reply", extra={'fields': {
+            'id': message.get('id'), 'notes': notes}})
+    if not app.debug:
+        reply(notes)
 
 
-def get_messages_before_id(before_id: str) -> Dict:
+def reply(notes: List[str]) -> None:
     """
-    Retrieves the 10 previous messages to the message
-    with id equal to `before_id`.
+    Queues the bot's messages for the GroupMe API; they are coalesced and
+    posted in the background so the webhook returns immediately.
     """
-    group_id = os.environ.get('GROUPME_GROUP_ID')
-    token = os.environ.get('GROUPME_ACCESS_TOKEN')
-    url = f'https://api.groupme.com/v3/groups/{group_id}/messages'
-    params = {'before_id': str(before_id),
-              'token': token,
-              'limit': 20}
-
-    msg_rqst = requests.get(url, params=params)
-    return msg_rqst.json()['response']
+    outbox.send(notes, tenancy.current().bot_id)
 
 
-def filter_messages_for_scores(messages: Dict) -> List[str]:
+def get_approved_scores(before_id: str, admin: List[str]) -> List[Dict]:
     """
-    Filters a GroupMe JSON object for all attached messages, computes
-    score strings and adds them to the database.
+    Reads the group's history back to the newest recorded match and returns
+    every admin-approved `/score` message since, oldest first. Stopping at
+    a recorded match rather than the newest message read means a score
+    approved after a `/check` is still found by the next one.
     """
-    admin: List[str] = os.getenv('ADMIN').split(':')
-    msgs: List[str] = []
-    last_updated_game = Score.query.order_by(Score.timestamp.desc()).first()
-    last_timestamp: int = last_updated_game.timestamp
-
-    for message in messages.get('messages'):
-        text = message.get('text', '')
-        if text.startswith("/score"):
-            timestamp = message.get("created_at")
-            favorites = message.get('favorited_by')
-
-            for favorite in favorites:
-                if (favorite in admin) and (timestamp > last_timestamp):
-                    msgs.append(message)
-
-    return msgs
+    history = groupme.MessageHistory(tenancy.current().id,
+                                     os.environ.get('GROUPME_ACCESS_TOKEN'))
+    newest = Score.query.order_by(Score.timestamp.desc(), Score.id.desc())
+    stop_id = newest.filter(Score.source_id.isnot(None))\
+        .with_entities(Score.source_id).limit(1).scalar()
+    # Matches recorded before message ids were kept stop it by time.
+    stop_timestamp = newest.filter(Score.source_id.is_(None))\
+        .with_entities(Score.timestamp).limit(1).scalar()
+    limit = None
+    if stop_id is None and stop_timestamp is None:
+        # Nothing recorded yet; don't page through years of chat here.
+        limit = groupme.CHECK_BACKFILL
+
+    messages, _ = groupme.approved_scores(history, before_id, admin, stop_id,
+                                          stop_timestamp, limit)
+    return messages
 
 
 def sender_is_bot(message):
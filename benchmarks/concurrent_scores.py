@@ -0,0 +1,115 @@
+"""
+Concurrency stress test: fires `/score` webhooks from several worker
+processes at once, as gunicorn workers would receive them, then checks that
+the stored ratings equal a sequential replay of the recorded matches.
+
+Run from the repository root:
+
+    python -m benchmarks.concurrent_scores [--matches N] [--workers N]
+
+Uses a temporary SQLite file unless `BENCH_DATABASE_URL` points at Postgres.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from multiprocessing import get_context
+from typing import Dict, List, Tuple
+
+# Live scoring and replays agree exactly on Postgres; SQLite keeps the
+# unrounded Numeric values, so allow for that.
+TOLERANCE = 0.05
+N_PLAYERS = 12
+
+
+def post(message: Dict) -> int:
+    from app import app
+    response = app.test_client().post('/', json=message)
+    return response.status_code
+
+
+def quiet() -> None:
+    # The webhook prints every message; keep the report readable.
+    sys.stdout = open(os.devnull, 'w')
+
+
+def snapshot(db) -> Dict[str, Tuple[float, int, int, int]]:
+    from commands.models import Stats
+    return {stat.name: (float(stat.elo), stat.games, stat.wins, stat.losses)
+            for stat in Stats.query.all()}
+
+
+def compare(live: Dict, replayed: Dict) -> List[str]:
+    problems = []
+    for name, (elo, *counts) in replayed.items():
+        live_elo, *live_counts = live[name]
+        if live_counts != counts or abs(live_elo - elo) > TOLERANCE:
+            problems.append(f"{name}: live {live[name]} != "
+                            f"replayed {replayed[name]}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--matches', type=int, default=300)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    url = os.environ.get('BENCH_DATABASE_URL',
+                         f"sqlite:///{directory}/concurrent.db")
+    ids = [str(1000 + i) for i in range(N_PLAYERS)]
+    os.environ['DATABASE_URL'] = url
+    os.environ['ADMIN'] = ':'.join(ids)
+    os.environ.pop('BOT_ID', None)
+
+    from app import app
+    from benchmarks import harness
+    from commands import replay
+    from database import db
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        harness.seed_players(N_PLAYERS)
+
+    rng = random.Random(args.seed)
+    messages = []
+    for i in range(args.matches):
+        players = rng.sample(ids, 4)
+        loser = rng.randint(0, 5)
+        scores = (7, loser) if rng.random() < 0.5 else (loser, 7)
+        messages.append(harness.score_message(
+            players, *scores, harness.START_TIMESTAMP + i))
+    # Arrival order differs from play order, so some matches are backdated.
+    rng.shuffle(messages)
+
+    start = time.perf_counter()
+    with get_context('spawn').Pool(args.workers, initializer=quiet) as pool:
+        statuses = pool.map(post, messages, chunksize=1)
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        from commands.models import Score
+        recorded = Score.query.count()
+        live = snapshot(db)
+        replay.replay(db, replay.load_prerankings())
+        db.session.commit()
+        problems = compare(live, snapshot(db))
+
+    failed = sum(status != 200 for status in statuses)
+    print(f"{len(messages)} webhooks from {args.workers} workers in "
+          f"{elapsed:.2f} s ({failed} failed, {recorded} recorded)")
+    for problem in problems:
+        print(problem)
+    assert failed == 0 and recorded == len(messages), "lost matches"
+    assert len(problems) == 0, "live ratings differ from a replay"
+    print("live ratings match a sequential replay")
+
+
+if __name__ == "__main__":
+    main()
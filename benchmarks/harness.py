@@ -0,0 +1,170 @@
+"""
+Shared scaffolding for the benchmarks: a bare Flask app on SQLite (or
+`$BENCH_DATABASE_URL`), synthetic players and matches, and a counter for
+the SQL statements a block of code issues.
+"""
+import os
+import random
+
+from contextlib import contextmanager
+from itertools import accumulate, islice
+from flask import Flask
+from sqlalchemy import event
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from commands import settings
+from database import db
+
+DATABASE_URL = os.environ.get('BENCH_DATABASE_URL', 'sqlite://')
+START_TIMESTAMP = 1500000000
+
+
+def create_app(url: str = DATABASE_URL) -> Flask:
+    """ App with every table created, outside of `app.py`'s Heroku setup. """
+    from commands import models  # noqa: F401 registers the tables
+
+    app = Flask('benchmarks')
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def user_id(i: int) -> str:
+    return str(1000 + i)
+
+
+def seed_players(n_players: int) -> List[str]:
+    """ Adds `n_players` players with default ratings; returns their names. """
+    from commands import cache
+    from commands.models import Player, Stats
+
+    names = [f"Player {i}" for i in range(n_players)]
+    db.session.bulk_insert_mappings(
+        Player, [{'id': user_id(i), 'name': name}
+                 for i, name in enumerate(names)])
+    db.session.bulk_insert_mappings(
+        Stats, [{'player_id': user_id(i), 'name': name, 'elo': 1000,
+                 'games': 0, 'wins': 0, 'losses': 0}
+                for i, name in enumerate(names)])
+    cache.bump(db)
+    db.session.commit()
+    return names
+
+
+def players_for(n_matches: int) -> int:
+    """ Player pool that grows with history, as a real league's does. """
+    return max(12, min(2000, n_matches // 200))
+
+
+def random_matches(names: List[str], n_matches: int,
+                   seed: int = 0) -> Iterator[Dict]:
+    """
+    `records` rows for `n_matches` plausible games, oldest first. Lower
+    numbered players are regulars, so partnerships repeat like they do in
+    a real group.
+    """
+    rng = random.Random(seed)
+    cum_weights = list(accumulate(1 / (i + 1) ** 0.5
+                                  for i in range(len(names))))
+    timestamp = START_TIMESTAMP
+    for _ in range(n_matches):
+        players: List[str] = []
+        while len(players) < 4:
+            player = rng.choices(names, cum_weights=cum_weights)[0]
+            if player not in players:
+                players.append(player)
+        winner = settings.MIN_SCORE_TO_WIN
+        loser = rng.randint(0, winner - settings.WIN_BY)
+        scores = (winner, loser) if rng.random() < 0.5 else (loser, winner)
+        timestamp += rng.randint(1, 600)
+        yield {'player_1': players[0], 'player_2': players[1],
+               'player_3': players[2], 'player_4': players[3],
+               'score_12': scores[0], 'score_34': scores[1],
+               'timestamp': timestamp, 'elo_1': 1000, 'elo_2': 1000,
+               'elo_3': 1000, 'elo_4': 1000}
+
+
+def generate(n_matches: int, n_players: Optional[int] = None,
+             seed: int = 0, chunk_size: int = 10000) -> Tuple[List[str], int]:
+    """
+    Fills an empty database with a player pool and an unrated history.
+
+    Returns:
+        [tuple]: the player names, and the timestamp of the last match.
+    """
+    from commands.models import Score
+
+    names = seed_players(n_players or players_for(n_matches))
+    matches = random_matches(names, n_matches, seed)
+    timestamp = START_TIMESTAMP
+    while True:
+        rows = list(islice(matches, chunk_size))
+        if len(rows) == 0:
+            break
+        db.session.bulk_insert_mappings(Score, rows)
+        db.session.commit()
+        timestamp = rows[-1]['timestamp']
+    return names, timestamp
+
+
+def command_message(text: str, sender: str, mentions: List[str] = [],
+                    timestamp: int = START_TIMESTAMP) -> Dict:
+    """ A GroupMe webhook payload, with real mentions for `mentions`. """
+    attachments = [{'type': 'mentions', 'user_ids': list(mentions)}]\
+        if mentions else []
+    return {'text': text, 'attachments': attachments, 'sender_id': sender,
+            'sender_type': 'user', 'created_at': timestamp,
+            'id': f"{sender}-{timestamp}"}
+
+
+def score_message(player_ids: List[str], score_12: int, score_34: int,
+                  timestamp: int, sender: Optional[str] = None) -> Dict:
+    """ A GroupMe webhook payload for a `/score` with real mentions. """
+    mentions = ' '.join(f"@Player {int(id) - 1000}" for id in player_ids)
+    return command_message(f"/score {mentions}, {score_12} - {score_34}",
+                           sender or player_ids[0], player_ids, timestamp)
+
+
+def record(commands) -> List[str]:
+    """ Runs commands the way the webhook does, in one transaction. """
+    from commands import cache, writer
+
+    cache.refresh()
+    mutates = any(command.mutates for command in commands)
+    if mutates:
+        writer.lock(db)
+    for command in commands:
+        data = command.generate_data(db)
+        if data is not None:
+            db.session.add(data)
+    if any(command.wrote for command in commands):
+        cache.bump(db)
+    db.session.commit()
+    return [command.generate_message() for command in commands]
+
+
+class QueryCounter(object):
+    """ Counts statements sent to the database while active. """
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    def __len__(self):
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context,
+                executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    counter = QueryCounter()
+    event.listen(db.engine, 'before_cursor_execute', counter._record)
+    try:
+        yield counter
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', counter._record)
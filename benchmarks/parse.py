@@ -0,0 +1,89 @@
+"""
+Parser throughput benchmark.
+
+Run from the repository root:
+
+    python -m benchmarks.parse [--repeat N]
+"""
+import argparse
+import time
+from commands.parse import COMMAND_GRAMMAR, _command_grammar, parse_input
+
+# Commands as they show up in the chat, well-formed first.
+WELL_FORMED = [
+    "/score @Nick Charchut @Tommy Bannan @Bo @Jean-Luc, 7 - 5",
+    "/score @me @Tommy Bannan @Bo @O'Neil, 7-3",
+    "/score @A @B @C @D, 9 - 7",
+    "/lb",
+    "/leaderboard",
+    "/sb @Tommy Bannan",
+    "/sb @Bo @Nick Charchut",
+    "/partner @Bo",
+    "/botch @Bo, dropped the ball",
+    "/strike, 112",
+    "/help",
+    "/check",
+]
+
+# Typos, stray punctuation and free text that need the full grammar.
+MALFORMED = [
+    "/score @A @B @C @D 7 - 5 -",
+    "/score @A @B @C @D, 7 -- 5",
+    "/score @A, @B @C @D, 7 - 5",
+    "/lb please",
+    "/sb @ Bo",
+    "/score @A @B @C @D,\n7 - 5",
+    "/score @Zoë @B @C @D, 7 - 5",
+    "/botch @Bo, missed a 7-0!",
+    "score @A @B @C @D, 7 - 5",
+    "/",
+    "@scorebot you're trash",
+]
+
+
+def legacy_parse(raw_string):
+    """ Pre-caching behavior: build the grammar on every call. """
+    try:
+        return True, _command_grammar().parseString(raw_string)
+    except Exception:
+        return False, None
+
+
+def grammar_parse(raw_string):
+    """ Cached grammar without the regex fast path. """
+    try:
+        return True, COMMAND_GRAMMAR.parseString(raw_string)
+    except Exception:
+        return False, None
+
+
+def run(parser, corpus, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in corpus:
+            parser(text)
+    elapsed = time.perf_counter() - start
+    return repeat * len(corpus) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    corpora = {'well-formed': WELL_FORMED,
+               'malformed': MALFORMED,
+               'mixed': WELL_FORMED * 4 + MALFORMED}
+    parsers = {'legacy': legacy_parse,
+               'grammar': grammar_parse,
+               'parse_input': parse_input}
+
+    print(f"{'corpus':<12}" + ''.join(f"{name:>14}" for name in parsers))
+    for corpus_name, corpus in corpora.items():
+        rates = [run(fn, corpus, args.repeat) for fn in parsers.values()]
+        print(f"{corpus_name:<12}" +
+              ''.join(f"{rate:>10.0f}/s  " for rate in rates))
+
+
+if __name__ == "__main__":
+    main()
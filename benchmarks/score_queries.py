@@ -0,0 +1,60 @@
+"""
+SQL statements and commits issued for one `/score`, and for a `/check`
+batch recorded in one transaction. tests/test_score_queries.py holds the
+budget.
+
+Run from the repository root:
+
+    python -m benchmarks.score_queries [--batch N] [--verbose]
+"""
+import argparse
+
+from sqlalchemy import event
+
+from benchmarks import harness
+from commands import replay
+from database import db
+
+
+def record(messages):
+    from commands.score import ScoreCommand
+    return harness.record([ScoreCommand(message) for message in messages])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--players', type=int, default=12)
+    parser.add_argument('--history', type=int, default=500)
+    parser.add_argument('--batch', type=int, default=10)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    app = harness.create_app()
+    with app.app_context():
+        _, timestamp = harness.generate(args.history, args.players)
+        # Rated, with checkpoints, as a live group's history is.
+        replay.replay(db, {})
+        db.session.commit()
+
+        commits = []
+        event.listen(db.session, 'after_commit',
+                     lambda session: commits.append(session))
+        ids = [harness.user_id(i) for i in range(4)]
+
+        with harness.count_queries() as single:
+            record([harness.score_message(ids, 7, 3, timestamp + 1)])
+        batch_messages = [harness.score_message(ids, 7, 5, timestamp + 2 + i)
+                          for i in range(args.batch)]
+        commits.clear()
+        with harness.count_queries() as batch:
+            record(batch_messages)
+
+    if args.verbose:
+        print('\n\n'.join(single.statements))
+    print(f"/score          {len(single):4d} statements")
+    print(f"/check x{args.batch:<4d}    {len(batch):4d} statements, "
+          f"{len(commits)} commit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Worker startup benchmark: wall time to import the app in a fresh
+interpreter, as gunicorn does when booting a worker.
+
+Run from the repository root:
+
+    python -m benchmarks.startup [--runs N]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# Everything `app` used to import eagerly before the command registry.
+EAGER = ("import app, numpy, taunt, commands.score, commands.leaderboard, "
+         "commands.add_user, commands.botch, commands.help, "
+         "commands.partner, commands.refresh, commands.scoreboard, "
+         "commands.strike")
+LAZY = "import app"
+
+
+def time_import(statement: str, runs: int) -> float:
+    """ Median wall time in seconds over `runs` fresh interpreters. """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', statement], check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    baseline = time_import('pass', args.runs)
+    eager = time_import(EAGER, args.runs) - baseline
+    lazy = time_import(LAZY, args.runs) - baseline
+    print(f"interpreter   {baseline * 1000:8.1f} ms")
+    print(f"eager import  {eager * 1000:8.1f} ms")
+    print(f"lazy import   {lazy * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
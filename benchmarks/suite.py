@@ -0,0 +1,192 @@
+"""
+Benchmark suite: synthetic histories from 1k to 1M matches on SQLite, with
+`/score`, `/refresh` and read command latency, parser
+throughput and peak memory, written to JSON for comparing commits.
+
+Run from the repository root:
+
+    python -m benchmarks.suite [--sizes 1000 10000 ...] [--output FILE]
+                               [--compare EARLIER_FILE]
+
+Each size runs in a fresh process and database so peak memory is its own.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import tempfile
+import time
+
+from multiprocessing import get_context
+from typing import Callable, Dict, List
+
+SIZES = [1000, 10000, 100000, 1000000]
+OUTPUT = "benchmark_results.json"
+
+
+def latency(fn: Callable[[int], object], runs: int) -> Dict[str, float]:
+    """ Median and p95 wall time of `fn(i)` in milliseconds. """
+    timings = []
+    for i in range(runs):
+        start = time.perf_counter()
+        fn(i)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {'median_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(timings[int(0.95 * (len(timings) - 1))], 3),
+            'runs': runs}
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux.
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def bench_size(n_matches: int, runs: int) -> Dict:
+    """ Every database benchmark against a history of `n_matches`. """
+    from benchmarks import harness
+    from commands import cache
+    from commands.history import HistoryCommand
+    from commands.leaderboard import LeaderboardCommand
+    from commands.partner import PartnerCommand
+    from commands.refresh import RefreshCommand
+    from commands.score import ScoreCommand
+    from commands.scoreboard import ScoreboardCommand
+    from database import db
+
+    results: Dict = {'matches': n_matches}
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    app = harness.create_app(f"sqlite:///{path}")
+    with app.app_context():
+        start = time.perf_counter()
+        names, timestamp = harness.generate(n_matches)
+        results['players'] = len(names)
+        results['generate_s'] = round(time.perf_counter() - start, 3)
+        results['generate_peak_rss_mb'] = peak_rss_mb()
+
+        admin = harness.user_id(0)
+        refresh = harness.command_message('/refresh', admin)
+        start = time.perf_counter()
+        harness.record([RefreshCommand(refresh)])
+        results['refresh_s'] = round(time.perf_counter() - start, 3)
+        results['refresh_peak_rss_mb'] = peak_rss_mb()
+
+        regulars = [harness.user_id(i) for i in range(min(len(names), 8))]
+
+        def score(i):
+            players = [regulars[(i + k) % len(regulars)] for k in range(4)]
+            message = harness.score_message(players, 7, i % 6,
+                                            timestamp + 1 + i)
+            harness.record([ScoreCommand(message)])
+
+        def read(command, text, mentions, warm):
+            def run(i):
+                if not warm:
+                    cache.bump(db)
+                    db.session.commit()
+                sender = regulars[i % len(regulars)]
+                tagged = [regulars[(i + 1 + k) % len(regulars)]
+                          for k in range(mentions)]
+                message = harness.command_message(text, sender, tagged)
+                harness.record([command(message)])
+            return run
+
+        results['score'] = latency(score, runs)
+        reads = {'partner': (PartnerCommand, '/partner @Player', 1),
+                 'sb': (ScoreboardCommand, '/sb @Player', 1),
+                 'lb': (LeaderboardCommand, '/lb', 0),
+                 'history': (HistoryCommand, '/history', 0)}
+        for name, (command, text, mentions) in reads.items():
+            results[name] = latency(read(command, text, mentions, False),
+                                    runs)
+            results[f"{name}_cached"] = latency(
+                read(command, text, mentions, True), runs)
+        db.session.remove()
+
+    os.remove(path)
+    results['peak_rss_mb'] = peak_rss_mb()
+    return results
+
+
+def bench_parser(repeat: int) -> Dict[str, float]:
+    """ `parse_input` messages per second on the parser benchmark corpora. """
+    from benchmarks.parse import MALFORMED, WELL_FORMED, run
+    from commands.parse import parse_input
+
+    corpora = {'well_formed': WELL_FORMED, 'malformed': MALFORMED,
+               'mixed': WELL_FORMED * 4 + MALFORMED}
+    return {f"{name}_per_s": round(run(parse_input, corpus, repeat))
+            for name, corpus in corpora.items()}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(baseline: Dict, report: Dict) -> None:
+    """ Prints each timing as a ratio of the baseline run's. """
+    old_sizes = {result['matches']: result for result in baseline['sizes']}
+    for result in report['sizes']:
+        old = old_sizes.get(result['matches'])
+        if old is None:
+            continue
+        changes = []
+        for key, value in result.items():
+            if isinstance(value, dict) and key in old:
+                changes.append((key, value['median_ms'] /
+                                max(old[key]['median_ms'], 1e-9)))
+            elif key.endswith('_s') and key in old:
+                changes.append((key, value / max(old[key], 1e-9)))
+        print(f"{result['matches']:>8} vs {baseline['commit']}  " +
+              '  '.join(f"{key} x{ratio:.2f}" for key, ratio in changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--runs', type=int, default=50,
+                        help="calls per latency measurement")
+    parser.add_argument('--repeat', type=int, default=200,
+                        help="passes over the parser corpora")
+    parser.add_argument('--output', default=OUTPUT)
+    parser.add_argument('--compare', metavar='FILE',
+                        help="earlier results to compare against")
+    args = parser.parse_args()
+
+    report: Dict = {'commit': git_commit(),
+                    'python': platform.python_version(),
+                    'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'parser': bench_parser(args.repeat),
+                    'sizes': []}
+    print(f"parser        {report['parser']}")
+
+    context = get_context('spawn')
+    sizes: List[Dict] = report['sizes']
+    for n_matches in args.sizes:
+        with context.Pool(1) as pool:
+            result = pool.apply(bench_size, (n_matches, args.runs))
+        sizes.append(result)
+        print(f"{n_matches:>8} matches  refresh {result['refresh_s']:8.2f} s  "
+              f"score {result['score']['median_ms']:7.2f} ms  "
+              f"lb {result['lb']['median_ms']:7.2f} ms  "
+              f"peak {result['peak_rss_mb']:7.1f} MB")
+
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            compare(json.load(file), report)
+
+
+if __name__ == "__main__":
+    main()
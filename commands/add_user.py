@@ -1,28 +1,16 @@
-import os
-import requests
-
 from commands.command import BaseCommand
-from commands import settings
-from typing import Any
-from commands.models import Stats
+from commands import directory
+from commands.models import Player, Stats
 
 
 class AddCommand(BaseCommand):
+    mutates = True
+
     def __init__(self, message, admin=True):
         super().__init__(message)
         self.note = ''
         self.admin = admin
-
-    def set_config_var(self, var: str, value: Any) -> None:
-        url = settings.URL
-        token = os.environ.get('HRKU_TOKEN')
-        data = {var: value}
-        headers = {'Authorization': f"Bearer {token}",
-                   'Accept': 'application/vnd.heroku+json; version=3',
-                   'Content-Type': 'application/json'}
-
-        response = requests.patch(url, headers=headers, json=data)
-        return response.status_code == 200
+        self.mutates = admin
 
     def generate_message(self):
         if not self.admin:
@@ -33,7 +21,6 @@ class AddCommand(BaseCommand):
         if not self.admin:
             return None
 
-        raw_string: str = os.environ.get('IDS', '')
         self_add = False
         if len(self.mentions) == 0:
             if (len(self.parsed.mentions) > 0) and\
@@ -44,17 +31,16 @@ class AddCommand(BaseCommand):
                 return None
 
         mentioned: str = self.get_sender() if self_add else self.mentions[0]
-        names = set([stat.name for stat in Stats.query.all()])
-        if mentioned in names:
+        if directory.name_for(mentioned):
             self.note = "User already added."
             return None
 
         full_name: str = ' '.join(self.parsed.args)
-        indata = Stats(mentioned, full_name)
-        name_string = mentioned + '%' + full_name
-        print(raw_string)
-        if not self.set_config_var('IDS', f"{raw_string}:{name_string}"):
-            self.note = "Request to update users failed."
+        if directory.id_for(full_name) is not None:
+            self.note = f"Someone is already called {full_name}."
             return None
+
+        db.session.add(Player(mentioned, full_name))
+        self.wrote = True
         self.note = f"User {full_name} added."
-        return indata
+        return Stats(mentioned, full_name)
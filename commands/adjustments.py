@@ -0,0 +1,45 @@
+"""
+Append-only ledger of Elo changes made outside matches, i.e. botches and
+unbotches. Replays merge it with `records`: an adjustment made at time T
+applies before every match played at or after T, so re-rating history
+keeps it.
+"""
+from collections import deque
+from commands.models import Adjustment
+from sqlalchemy import func
+from typing import Deque, Optional, Tuple
+
+# (timestamp, GroupMe id, Elo change) of one ledger entry.
+Entry = Tuple[int, str, float]
+
+
+def record(db, player_id: str, admin_id: str, amount: float, reason: str,
+           timestamp: int, source_id: Optional[str] = None) -> None:
+    """ Adds an entry to the ledger; the caller applies it to `stats`. """
+    db.session.add(Adjustment(player_id, admin_id, amount, reason,
+                              timestamp, source_id))
+
+
+def recorded(db, source_id: Optional[str]) -> bool:
+    """
+    Whether the GroupMe message `source_id` is already in the ledger.
+    Writers hold `writer.lock`, so no other worker can add it meanwhile.
+    """
+    return source_id is not None and db.session.query(Adjustment.id)\
+        .filter(Adjustment.source_id == source_id).first() is not None
+
+
+def pending(timestamp: int) -> Deque[Entry]:
+    """
+    Entries a replay positioned at a match played at `timestamp` has not
+    applied yet, oldest first.
+    """
+    return deque(tuple(row) for row in Adjustment.query.with_entities(
+        Adjustment.timestamp, Adjustment.player_id, Adjustment.amount)
+        .filter(Adjustment.timestamp > timestamp)
+        .order_by(Adjustment.timestamp, Adjustment.id))
+
+
+def newest(db):
+    """ Scalar subquery for the time of the latest entry, or NULL. """
+    return db.session.query(func.max(Adjustment.timestamp)).as_scalar()
@@ -0,0 +1,41 @@
+from commands import settings, teams
+from commands.command import BaseCommand
+from commands.score import with_sender
+
+
+class BalanceCommand(BaseCommand):
+    def __init__(self, message):
+        super().__init__(message)
+
+    def generate_message(self):
+        ids = []
+        if self.ok:
+            ids = with_sender(self.parsed.mentions, self.mentions,
+                              self.get_sender())
+        if not settings.NUM_PLAYERS <= len(ids) <= settings.BALANCE_MAX:
+            return (f"Tag {settings.NUM_PLAYERS} to {settings.BALANCE_MAX} "
+                    "players, e.g.\n /balance @A @B @C @D")
+        if len(set(ids)) != len(ids):
+            return "Tag each player once."
+
+        names = [self.translate(id) for id in ids]
+        if '' in names:
+            return "One of the tagged is not in the system."
+
+        elos = teams.snapshot().elos
+        games = teams.balance(names, [elos[name] for name in names])
+        msg = "FAIREST GAMES\n-------------------------\n"
+        for game in games:
+            msg += (f"{game.team_a[0]} & {game.team_a[1]} v. "
+                    f"{game.team_b[0]} & {game.team_b[1]} "
+                    f"({game.odds:.0%} - {1 - game.odds:.0%})\n")
+        playing = set(name for game in games
+                      for name in game.team_a + game.team_b)
+        sitting_out = [name for name in names if name not in playing]
+        if sitting_out:
+            msg += f"Sitting out: {', '.join(sitting_out)}\n"
+        return msg
+
+    def generate_data(self, db):
+        """ Balance does not alter database. """
+        return None
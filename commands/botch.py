@@ -1,30 +1,19 @@
-import os
-import requests
-
+from commands import adjustments, replay, settings
 from commands.command import BaseCommand
-from commands import settings
-from typing import Any
-from commands.models import Stats
+from commands.models import Score, Stats
+from sqlalchemy import func
 
 
 class BotchCommand(BaseCommand):
+    mutates = True
+
     def __init__(self, message, unbotch=False, admin=True):
         super().__init__(message)
         self.note = ''
         self.admin = admin
+        self.mutates = admin
         self.unbotch = unbotch
-
-    def set_config_var(self, var: str, value: Any) -> None:
-        url = settings.URL
-        token = os.environ.get('HRKU_TOKEN')
-        data = {var: value}
-        headers = {'Authorization': f"Bearer {token}",
-                   'Accept': 'application/vnd.heroku+json; version=3',
-                   'Content-Type': 'application/json'}
-
-        # This denotes a successful request.
-        response = requests.patch(url, headers=headers, json=data)
-        return response.status_code == 200
+        self.source_id = message.get('id')
 
     def generate_message(self):
         if not self.admin:
@@ -51,12 +40,29 @@ class BotchCommand(BaseCommand):
             self.note = "Must include reason for botching."
             return
 
+        # GroupMe redelivered a message another worker already applied.
+        if adjustments.recorded(db, self.source_id):
+            self.note = "That botch was already recorded."
+            return None
+
         stat = Stats.query.filter(Stats.name == mentioned_name).first()
-        sign = -1 if self.unbotch else 1
-        stat.elo -= sign * 10
+        amount = settings.BOTCH_ELO if self.unbotch else -settings.BOTCH_ELO
+        # The ledger keeps the change through later replays of history.
+        adjustments.record(db, mentioned, self.get_sender(), amount, reason,
+                           self.timestamp, self.source_id)
+        self.wrote = True
+        before = stat.elo
+        newest = db.session.query(func.max(Score.timestamp)).scalar()
+        # Replays apply it before matches played in the same second too.
+        if newest is not None and newest >= self.timestamp:
+            # Matches played since were rated without it; re-rate them.
+            db.session.flush()
+            replay.replay_from(db, (self.timestamp, 0))
+            db.session.refresh(stat)
+        else:
+            stat.elo += amount
         botch_str = "BOTCH" if not self.unbotch else "UNBOTCH"
         self.note = (f"{botch_str} {mentioned_name} "
-                     f"({stat.elo + sign * 10:.0f} -> "
-                     f"{stat.elo:.0f}) for:\n\n{reason}.")
+                     f"({before:.0f} -> {stat.elo:.0f}) for:\n\n{reason}.")
 
         return stat
@@ -0,0 +1,82 @@
+import threading
+
+from collections import OrderedDict
+from commands import settings, tenancy
+from commands.models import DataVersion
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+# Responses are cached per worker, keyed by their group's data version.
+# The version lives in the group's `data_version` row and is bumped inside
+# the transaction that changes match or player data, so a change committed
+# by any worker makes every worker's older responses unreachable. Each
+# request reads the version once; see `refresh`.
+_read = threading.local()
+_responses: "OrderedDict[Tuple, Any]" = OrderedDict()
+
+
+def refresh() -> None:
+    """ Forgets the versions read, e.g. at the start of a request. """
+    _read.versions = {}
+
+
+def _versions() -> Dict[Optional[str], int]:
+    versions = getattr(_read, 'versions', None)
+    if versions is None:
+        versions = _read.versions = {}
+    return versions
+
+
+def version() -> int:
+    """ The current group's data version, read once since `refresh`. """
+    versions = _versions()
+    group = tenancy.key()
+    if group not in versions:
+        versions[group] = DataVersion.query\
+            .with_entities(DataVersion.version).scalar() or 0
+    return versions[group]
+
+
+def bump(db) -> None:
+    """
+    Marks every cached response of the current group as stale once the
+    session commits. Call it inside the transaction making the change,
+    after taking `writer.lock`.
+
+    Args:
+        db [SQLAlchemy]: database handle.
+    """
+    bumped = DataVersion.query.update(
+        {DataVersion.version: DataVersion.version + 1},
+        synchronize_session=False)
+    if bumped == 0:
+        db.session.add(DataVersion(1))
+    # Read again, so this request sees its own change once committed.
+    _versions().pop(tenancy.key(), None)
+
+
+def cached(key: Tuple[Hashable, ...], render: Callable[[], T]) -> T:
+    """
+    Returns the response rendered for `key` at the current data version,
+    rendering and storing it on a miss. Snapshots that several commands
+    read are cached the same way; callers must not modify them.
+
+    Args:
+        key [tuple]: command name followed by its arguments.
+        render [Callable]: produces the response text or snapshot.
+
+    Returns:
+        [T]: the response text or snapshot.
+    """
+    full_key = (tenancy.key(), *key, version())
+    response = _responses.get(full_key)
+    if response is not None:
+        _responses.move_to_end(full_key)
+        return response
+
+    response = render()
+    _responses[full_key] = response
+    if len(_responses) > settings.RESPONSE_CACHE_SIZE:
+        _responses.popitem(last=False)
+    return response
@@ -1,23 +1,27 @@
+from commands import directory
 from commands.parse import parse_input
-import os
 
 
 class BaseCommand(object):
+    # Whether the command can change match or player data. Commands that
+    # can set it per instance when the message rules that out, e.g. one
+    # from a non-admin, so it doesn't wait on the writer lock.
+    mutates = False
+
     def __init__(self, message):
         self.message = message
         self.text = message.get('text', '')
         self.ok, self.parsed = parse_input(self.text)
         self.mentions = self.get_mentions()
         self.timestamp = self.message.get('created_at', None)
+        # Set by `generate_data` once it has changed data.
+        self.wrote = False
 
     def get_sender(self):
         return self.message.get('sender_id', None)
 
     def translate(self, raw_id):
-        ids = map(lambda x: x.split('%'),
-                  (os.environ.get('IDS', '').split(':')))
-        convert_dict = {id: name for [id, name] in ids}
-        return convert_dict.get(raw_id, '')
+        return directory.name_for(raw_id)
 
     def get_mentions(self):
         attachments = self.message.get('attachments')
@@ -0,0 +1,27 @@
+from commands import cache
+from commands.models import Player
+from typing import Dict, Optional, Tuple
+
+# The GroupMe user id <-> name index is cached per worker like a response,
+# so a player added by any worker shows up once the data version moves on.
+
+
+def _load() -> Tuple[Dict[str, str], Dict[str, str]]:
+    rows = Player.query.with_entities(Player.id, Player.name).all()
+    return ({id: name for (id, name) in rows},
+            {name: id for (id, name) in rows})
+
+
+def _index() -> Tuple[Dict[str, str], Dict[str, str]]:
+    """ (id -> name, name -> id) for the current group. """
+    return cache.cached(('directory',), _load)
+
+
+def name_for(user_id: str, default: str = '') -> str:
+    """ Display name for a GroupMe user id, or `default` if unknown. """
+    return _index()[0].get(user_id, default)
+
+
+def id_for(name: str, default: Optional[str] = None) -> Optional[str]:
+    """ GroupMe user id for a display name, or `default` if unknown. """
+    return _index()[1].get(name, default)
@@ -0,0 +1,141 @@
+import math
+import numpy as np
+from commands import settings
+from typing import Sequence, Tuple
+
+# Players with at least this many games (team average) are fully rated.
+ESTABLISHED_GAMES = 20
+
+
+def expected_score(team_a_avg, team_b_avg):
+    """
+    Expected share of the points for team A, from the teams' average
+    ratings; works on floats and NumPy arrays alike.
+    """
+    return 1 / (1 + 10 ** ((team_b_avg - team_a_avg) / 400))
+
+
+def elo_delta(elos: Sequence[float], games: Sequence[int],
+              score_a: int, score_b: int, k: float = settings.K) -> float:
+    """
+    Calculates the Elo change for team A (players 1 and 2) in a single
+    match; team B (players 3 and 4) moves by the negation.
+
+    Args:
+        elos [Sequence[float]]: ratings of players 1 through 4.
+        games [Sequence[int]]: games played by players 1 through 4.
+        score_a [int]: points scored by team A.
+        score_b [int]: points scored by team B.
+        k [float]: K-factor.
+
+    Returns:
+        [float]: rating change for each player on team A.
+    """
+    elo_1, elo_2, elo_3, elo_4 = elos
+    games_1, games_2, games_3, games_4 = games
+
+    # Teams are considered as single players, averaging their Elo.
+    team_a_avg = 0.5 * (elo_1 + elo_2)
+    team_b_avg = 0.5 * (elo_3 + elo_4)
+    expected_a = expected_score(team_a_avg, team_b_avg)
+
+    # Win probability is the # points a team scores divided by the total.
+    score_diff = abs(score_a - score_b)
+    mult = 1
+    lose_a = score_a < score_b
+
+    # K-factor multiplier to account for larger margins.
+    # 7-3, 7-4, 7-5
+    if 2 <= score_diff <= 4 and (max(score_a, score_b) >
+                                 settings.MIN_SCORE_TO_WIN):
+        mult = 1.25
+        score_a = score_a if not lose_a else 5
+        score_b = score_b if lose_a else 5
+    # 7-1, 7-2
+    elif 5 <= score_diff <= 6:
+        mult = 1.75
+        score_a = score_a if not lose_a else 2
+        score_b = score_b if lose_a else 2
+    # 7-0
+    elif score_diff == 7:
+        mult = 2
+
+    score_p_a = score_a / (score_a + score_b)
+
+    # Damp rating swings while either team is still new to the game.
+    games_12 = 0.5 * (games_1 + games_2)
+    games_34 = 0.5 * (games_3 + games_4)
+    game_mult = 1 / (1 + math.exp(-max(1, min(games_12, games_34)) /
+                                  max(1, max(games_12, games_34))))
+    if games_12 >= ESTABLISHED_GAMES and games_34 >= ESTABLISHED_GAMES:
+        game_mult = 1
+
+    return game_mult * mult * k * (score_p_a - expected_a)
+
+
+def calculate_elo(elos: Sequence[float], games: Sequence[int],
+                  score_a: int, score_b: int,
+                  k: float = settings.K) -> Tuple[float, float, float, float]:
+    """
+    Calculates updated Elo ratings for the players involved in the match.
+
+    Returns:
+        [tuple]: new ratings for players 1 through 4.
+    """
+    delta = elo_delta(elos, games, score_a, score_b, k)
+    elo_1, elo_2, elo_3, elo_4 = elos
+    return (elo_1 + delta, elo_2 + delta, elo_3 - delta, elo_4 - delta)
+
+
+def batch_elo_delta(elos_a: np.ndarray, elos_b: np.ndarray,
+                    games_a: np.ndarray, games_b: np.ndarray,
+                    score_a: np.ndarray, score_b: np.ndarray,
+                    k: float = settings.K) -> np.ndarray:
+    """
+    Vectorized `elo_delta` over many independent matches.
+
+    Args:
+        elos_a [np.ndarray]: (n, 2) ratings of team A's players.
+        elos_b [np.ndarray]: (n, 2) ratings of team B's players.
+        games_a [np.ndarray]: (n, 2) games played by team A's players.
+        games_b [np.ndarray]: (n, 2) games played by team B's players.
+        score_a [np.ndarray]: (n,) points scored by team A.
+        score_b [np.ndarray]: (n,) points scored by team B.
+        k [float]: K-factor.
+
+    Returns:
+        [np.ndarray]: (n,) rating change for each player on team A.
+    """
+    team_a_avg = np.asarray(elos_a, dtype=np.float64).mean(axis=1)
+    team_b_avg = np.asarray(elos_b, dtype=np.float64).mean(axis=1)
+    expected_a = expected_score(team_a_avg, team_b_avg)
+
+    score_a = np.asarray(score_a, dtype=np.float64)
+    score_b = np.asarray(score_b, dtype=np.float64)
+    score_diff = np.abs(score_a - score_b)
+    lose_a = score_a < score_b
+
+    close = (score_diff >= 2) & (score_diff <= 4) &\
+        (np.maximum(score_a, score_b) > settings.MIN_SCORE_TO_WIN)
+    wide = (score_diff >= 5) & (score_diff <= 6)
+    shutout = score_diff == 7
+    mult = np.select([close, wide, shutout], [1.25, 1.75, 2.], default=1.)
+
+    # The loser's score is pinned for margin-adjusted results.
+    pinned = close | wide
+    loser_score = np.where(close, 5., 2.)
+    score_a = np.where(pinned & lose_a, loser_score, score_a)
+    score_b = np.where(pinned & ~lose_a, loser_score, score_b)
+    score_p_a = score_a / (score_a + score_b)
+
+    games_12 = np.asarray(games_a, dtype=np.float64).mean(axis=1)
+    games_34 = np.asarray(games_b, dtype=np.float64).mean(axis=1)
+    game_mult = 1 / (1 + np.exp(-np.maximum(1, np.minimum(games_12,
+                                                          games_34)) /
+                                np.maximum(1, np.maximum(games_12,
+                                                         games_34))))
+    established = (games_12 >= ESTABLISHED_GAMES) &\
+        (games_34 >= ESTABLISHED_GAMES)
+    game_mult = np.where(established, 1., game_mult)
+
+    return game_mult * mult * k * (score_p_a - expected_a)
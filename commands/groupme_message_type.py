@@ -19,9 +19,18 @@ HELP_STRING_V = ("Sup, bitches. It's ScoreBot. Here's the lowdown.\n\n"
                  "To score a match: \n"
                  "`/score @A @B @C @D, SCORE_AB - SCORE_CD` \n\n"
                  "To see the leaderboard:\n"
-                 "`/leaderboard` or `/lb`\n\n"
+                 "`/leaderboard` or `/lb`, or `/lb glicko` and "
+                 "`/lb trueskill` for other ratings\n\n"
                  "To see history with another player:\n"
                  "`/partner @A`\n\n"
+                 "To see your record against another player:\n"
+                 "`/h2h @A` or `/h2h @A @B`\n\n"
+                 "To see a rating over time:\n"
+                 "`/history` or `/history @A`\n\n"
+                 "To see the odds of a game:\n"
+                 "`/matchup @A @B @C @D`\n\n"
+                 "To split the players present into fair games:\n"
+                 "`/balance @A @B @C @D ...`\n\n"
                  "To score-check a fellow player:\n"
                  "`/sb @A` \n\n"
                  "To get help:\n"
@@ -52,8 +61,12 @@ BOTCH = "/botch"
 UNBOTCH = "/unbotch"
 HELP = "/help"
 HELP_V = "/helpv"
+HEAD_TO_HEAD = "/h2h"
+HISTORY = "/history"
+BALANCE = "/balance"
 LB = "/lb"
 LEADERBOARD = "/leaderboard"
+MATCHUP = "/matchup"
 PARTNER = "/partner"
 RECORD_SCORE = "/score"
 REFRESH = "/refresh"
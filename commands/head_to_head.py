@@ -0,0 +1,36 @@
+from commands.command import BaseCommand
+from commands import cache, pairs
+
+
+class HeadToHeadCommand(BaseCommand):
+    def __init__(self, message):
+        super().__init__(message)
+
+    def generate_message(self):
+        if len(self.mentions) == 1:
+            first = self.translate(self.get_sender())
+            second = self.translate(self.mentions[0])
+        elif len(self.mentions) == 2:
+            first, second = map(self.translate, self.mentions)
+        else:
+            return "Tag one or two people."
+
+        if '' in (first, second):
+            return "One of the tagged is not in the system."
+
+        return cache.cached(('h2h', first, second),
+                            lambda: self.render_record(first, second))
+
+    def render_record(self, first, second):
+        pair = pairs.lookup(first, second)
+        wins, losses = (0, 0) if pair is None else\
+            (pair.wins_against, pair.losses_against)
+        # Stored from the point of view of the alphabetically first name.
+        if first != pairs.key(first, second)[0]:
+            wins, losses = losses, wins
+
+        return (f"{first} v. {second}\n"
+                f"W-L: ({wins} - {losses})")
+
+    def generate_data(self, db):
+        return
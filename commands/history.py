@@ -0,0 +1,47 @@
+from commands.command import BaseCommand
+from commands import cache, settings, store
+from typing import Sequence
+
+SPARKS = "▁▂▃▄▅▆▇█"
+
+
+def sparkline(values: Sequence[float]) -> str:
+    """ One block character per value, scaled between their min and max. """
+    low, high = min(values), max(values)
+    if high == low:
+        return SPARKS[len(SPARKS) // 2] * len(values)
+    scale = (len(SPARKS) - 1) / (high - low)
+    return ''.join(SPARKS[round((value - low) * scale)] for value in values)
+
+
+class HistoryCommand(BaseCommand):
+    def __init__(self, message):
+        super().__init__(message)
+
+    def generate_message(self):
+        if len(self.mentions) > 1:
+            return "Tag one person, or no one for yourself."
+
+        player_id = self.mentions[0] if self.mentions else self.get_sender()
+        name = self.translate(player_id)
+        if name == '':
+            return "One of the tagged is not in the system."
+
+        return cache.cached(('history', player_id),
+                            lambda: self.render_history(name, player_id))
+
+    def render_history(self, name, player_id):
+        timeline = store.timeline(player_id, settings.HISTORY_LENGTH)
+        if timeline is None:
+            return f"{name} hasn't played a match yet."
+
+        current = timeline.ratings[-1]
+        change = current - timeline.start
+        shown = len(timeline.ratings)
+        return (f"{name}: {current:.1f} after {timeline.games} games\n"
+                f"{sparkline([timeline.start] + timeline.ratings)}\n"
+                f"Last {shown}: {'+' if change > 0 else ''}{change:.1f}\n"
+                f"Peak {timeline.peak:.1f}, low {timeline.low:.1f}")
+
+    def generate_data(self, db):
+        return
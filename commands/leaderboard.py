@@ -1,3 +1,4 @@
+from commands import cache, ratings
 from commands.command import BaseCommand
 from commands.models import Stats
 from commands.settings import LEADERBOARD_DISPLAY, LEADERBOARD_GAMES
@@ -7,14 +8,25 @@ from typing import List
 class LeaderboardCommand(BaseCommand):
     def __init__(self, message):
         super().__init__(message)
+        # `/lb glicko` ranks by another engine; plain `/lb` is Elo.
+        words = self.text.split()
+        self.engine = words[1].lower() if len(words) > 1 else 'elo'
 
     def generate_message(self):
         """
         Generates and returns the leaderboard string by querying the database.
         """
+        if self.engine not in ratings.ENGINES:
+            return (f"No rating called {self.engine}. Try "
+                    f"{', '.join(ratings.ENGINES)}.")
+        if self.engine != 'elo':
+            return cache.cached(('lb', self.engine), self.render_ratings)
         return self.generate_leaderboard()
 
     def generate_leaderboard(self):
+        return cache.cached(('lb',), self.render_leaderboard)
+
+    def render_leaderboard(self):
         elos: List[Stats] = Stats.query.filter(Stats.games >
                                                LEADERBOARD_GAMES)\
             .order_by(Stats.elo.desc()).limit(LEADERBOARD_DISPLAY)
@@ -29,6 +41,24 @@ class LeaderboardCommand(BaseCommand):
 
         return msg
 
+    def render_ratings(self):
+        """ Leaderboard under one of the engines kept in `ratings`. """
+        engine = ratings.ENGINES[self.engine]
+        values = ratings.standings(engine)
+        players = [player for player in
+                   Stats.query.filter(Stats.games > LEADERBOARD_GAMES)
+                   if player.name in values]
+        players.sort(key=lambda player: values[player.name], reverse=True)
+        msg: str = f"{engine.name.upper()} LEADERBOARD\n"
+        msg += '-------------------------\n'
+
+        for player in players[:LEADERBOARD_DISPLAY]:
+            rating_str: str = f"{values[player.name]:.{engine.decimals}f}"
+            msg += (f"{rating_str.rjust(4)}   -   {player.name}   "
+                    f"({player.wins} - {player.losses})\n")
+
+        return msg
+
     def generate_data(self, db):
         """ Leaderboard does not alter database. """
         return None
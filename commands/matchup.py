@@ -0,0 +1,55 @@
+from commands import elo, settings, teams, tenancy
+from commands.command import BaseCommand
+from commands.score import player_ids
+from typing import List, Tuple
+
+
+def margins() -> List[Tuple[int, int]]:
+    """ Closest and widest winning scores under the group's rules. """
+    rules = tenancy.current()
+    return [(rules.min_score_to_win, rules.min_score_to_win - rules.win_by),
+            (rules.min_score_to_win, 0)]
+
+
+class MatchupCommand(BaseCommand):
+    def __init__(self, message):
+        super().__init__(message)
+
+    def generate_message(self):
+        ids = None
+        if self.ok:
+            ids = player_ids(self.parsed.mentions, self.mentions,
+                             self.get_sender())
+        if ids is None or len(ids) != settings.NUM_PLAYERS:
+            return "Must be of form:\n /matchup @A @B @C @D"
+        if len(set(ids)) != len(ids):
+            return "Tag each player once."
+
+        names = [self.translate(id) for id in ids]
+        if '' in names:
+            return "One of the tagged is not in the system."
+
+        snapshot = teams.snapshot()
+        elos = [snapshot.elos[name] for name in names]
+        games = [snapshot.games[name] for name in names]
+        odds = elo.expected_score(0.5 * (elos[0] + elos[1]),
+                                  0.5 * (elos[2] + elos[3]))
+
+        k = tenancy.current().k
+        wins_12 = [elo.elo_delta(elos, games, *score, k)
+                   for score in margins()]
+        wins_34 = [-elo.elo_delta(elos, games, *reversed(score), k)
+                   for score in margins()]
+        team_12 = f"{names[0]} & {names[1]}"
+        team_34 = f"{names[2]} & {names[3]}"
+        return (f"{team_12} v. {team_34}\n"
+                f"{team_12} win {odds:.0%} of the time.\n"
+                "-------------------------\n"
+                f"If {team_12} win: +{wins_12[0]:.1f} to "
+                f"+{wins_12[1]:.1f} each\n"
+                f"If {team_34} win: +{wins_34[0]:.1f} to "
+                f"+{wins_34[1]:.1f} each")
+
+    def generate_data(self, db):
+        """ Matchup does not alter database. """
+        return None
@@ -19,7 +19,7 @@ class Score(db.Model):
     score_34 = db.Column(db.Integer)
 
     # Timestamp for the match.
-    timestamp = db.Column(db.Integer)
+    timestamp = db.Column(db.Integer, index=True)
 
     # Rank per player (BEFORE the match).
     elo_1 = db.Column(db.Numeric(7, 3), default=1000)
@@ -27,9 +27,12 @@ class Score(db.Model):
     elo_3 = db.Column(db.Numeric(7, 3), default=1000)
     elo_4 = db.Column(db.Numeric(7, 3), default=1000)
 
+    # GroupMe id of the `/score` message, so no message is recorded twice.
+    source_id = db.Column(db.String(), unique=True, index=True)
+
     def __init__(self, player_1, player_2, player_3, player_4,
                  score_12, score_34, timestamp,
-                 elo_1, elo_2, elo_3, elo_4):
+                 elo_1, elo_2, elo_3, elo_4, source_id=None):
         self.player_1 = player_1
         self.player_2 = player_2
         self.player_3 = player_3
@@ -42,6 +45,7 @@ class Score(db.Model):
         self.elo_2 = elo_2
         self.elo_3 = elo_3
         self.elo_4 = elo_4
+        self.source_id = source_id
 
     def __repr__(self):
         return (f"<id {self.id} | {self.player_1.split(' ')[0]} | {self.player_2.split(' ')[0]}"
@@ -78,3 +82,283 @@ class Stats(db.Model):
     def __repr__(self):
         return (f"{self.name} | {self.elo} | {self.wins} | "
                 f"{self.losses} | {self.games}")
+
+
+class Player(db.Model):
+    """ Schema for the GroupMe user id <-> display name directory. """
+    __tablename__ = 'players'
+    __table_args__ = {'extend_existing': True}
+
+    # GroupMe user id.
+    id = db.Column(db.String(), primary_key=True)
+    name = db.Column(db.String(), nullable=False, unique=True)
+
+    def __init__(self, id, name):
+        self.id = id
+        self.name = name
+
+    def __repr__(self):
+        return f"<player {self.id} | {self.name}>"
+
+
+class Pair(db.Model):
+    """
+    Schema for head-to-head and teammate stats of two players, stored once
+    per unordered pair with `player_a` < `player_b`.
+    """
+    __tablename__ = 'pairs'
+    __table_args__ = {'extend_existing': True}
+
+    player_a = db.Column(db.String(), primary_key=True)
+    player_b = db.Column(db.String(), primary_key=True)
+
+    # Games played on the same team, and Elo gained by that team.
+    games_together = db.Column(db.Integer, default=0)
+    wins_together = db.Column(db.Integer, default=0)
+    losses_together = db.Column(db.Integer, default=0)
+    elo_together = db.Column(db.Numeric(9, 3, asdecimal=False), default=0)
+
+    # Games played against each other, from `player_a`'s point of view.
+    wins_against = db.Column(db.Integer, default=0)
+    losses_against = db.Column(db.Integer, default=0)
+
+    def __init__(self, player_a, player_b):
+        self.player_a = player_a
+        self.player_b = player_b
+        self.games_together = 0
+        self.wins_together = 0
+        self.losses_together = 0
+        self.elo_together = 0
+        self.wins_against = 0
+        self.losses_against = 0
+
+    def __repr__(self):
+        return (f"{self.player_a} | {self.player_b} | "
+                f"{self.wins_together} - {self.losses_together} | "
+                f"{self.elo_together} | "
+                f"{self.wins_against} - {self.losses_against}")
+
+
+class Checkpoint(db.Model):
+    """
+    Schema for a snapshot of every player's rating state right after the
+    match at (timestamp, match_id), so corrections can replay from it.
+    """
+    __tablename__ = 'checkpoints'
+    __table_args__ = {'extend_existing': True}
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Replay position of the last match included.
+    timestamp = db.Column(db.Integer)
+    match_id = db.Column(db.Integer)
+
+    # JSON of player ratings/records and pair stats.
+    state = db.Column(db.Text)
+
+    def __init__(self, timestamp, match_id, state):
+        self.timestamp = timestamp
+        self.match_id = match_id
+        self.state = state
+
+    def __repr__(self):
+        return f"<checkpoint {self.id} | {self.timestamp} | {self.match_id}>"
+
+
+class Participant(db.Model):
+    """ Schema for one player's part in a match, one row per player. """
+    __tablename__ = 'participants'
+    __table_args__ = (
+        db.Index('ix_participants_player_timestamp', 'player_id',
+                 'timestamp'),
+        db.Index('ix_participants_timestamp', 'timestamp'),
+        {'extend_existing': True})
+
+    match_id = db.Column(db.Integer,
+                         db.ForeignKey('records.id', ondelete='CASCADE'),
+                         primary_key=True)
+    # GroupMe user id.
+    player_id = db.Column(db.String(), primary_key=True)
+
+    # 1 for players 1 and 2, 2 for players 3 and 4.
+    team = db.Column(db.Integer)
+
+    # Copy of the match timestamp, for per-player range scans.
+    timestamp = db.Column(db.Integer)
+
+    rating_before = db.Column(db.Numeric(7, 3, asdecimal=False))
+    rating_after = db.Column(db.Numeric(7, 3, asdecimal=False))
+    delta = db.Column(db.Numeric(7, 3, asdecimal=False))
+
+    def __init__(self, match_id, player_id, team, timestamp,
+                 rating_before, rating_after, delta):
+        self.match_id = match_id
+        self.player_id = player_id
+        self.team = team
+        self.timestamp = timestamp
+        self.rating_before = rating_before
+        self.rating_after = rating_after
+        self.delta = delta
+
+    def __repr__(self):
+        return (f"<participant {self.match_id} | {self.player_id} | "
+                f"{self.team} | {self.rating_before} -> "
+                f"{self.rating_after}>")
+
+
+class Bookmark(db.Model):
+    """ Schema for named positions, e.g. the last GroupMe message read. """
+    __tablename__ = 'bookmarks'
+    __table_args__ = {'extend_existing': True}
+
+    name = db.Column(db.String(), primary_key=True)
+    value = db.Column(db.String())
+
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+
+    def __repr__(self):
+        return f"<bookmark {self.name} | {self.value}>"
+
+
+class Rating(db.Model):
+    """
+    Schema for a player's state under one of the alternative rating
+    engines; Elo, the rating of record, stays in `stats`.
+    """
+    __tablename__ = 'ratings'
+    __table_args__ = {'extend_existing': True}
+
+    engine = db.Column(db.String(), primary_key=True)
+    name = db.Column(db.String(), primary_key=True)
+
+    # Which of these an engine uses is listed in its `fields`.
+    rating = db.Column(db.Float)
+    deviation = db.Column(db.Float)
+    volatility = db.Column(db.Float)
+    period = db.Column(db.Integer)
+
+    def __init__(self, engine, name, rating=None, deviation=None,
+                 volatility=None, period=None):
+        self.engine = engine
+        self.name = name
+        self.rating = rating
+        self.deviation = deviation
+        self.volatility = volatility
+        self.period = period
+
+    def __repr__(self):
+        return f"<rating {self.engine} | {self.name} | {self.rating}>"
+
+
+class Adjustment(db.Model):
+    """
+    Schema for an Elo change made outside a match, e.g. a botch. Rows are
+    only ever added; replays apply them in timestamp order with the matches.
+    """
+    __tablename__ = 'adjustments'
+    __table_args__ = (db.Index('ix_adjustments_timestamp', 'timestamp'),
+                      {'extend_existing': True})
+
+    id = db.Column(db.Integer, primary_key=True)
+    # GroupMe user ids of the player adjusted and the admin who did it.
+    player_id = db.Column(db.String())
+    admin_id = db.Column(db.String())
+    amount = db.Column(db.Numeric(7, 3, asdecimal=False))
+    reason = db.Column(db.String())
+    timestamp = db.Column(db.Integer)
+
+    # GroupMe id of the `/botch` message, so no message is applied twice.
+    source_id = db.Column(db.String(), unique=True, index=True)
+
+    def __init__(self, player_id, admin_id, amount, reason, timestamp,
+                 source_id=None):
+        self.player_id = player_id
+        self.admin_id = admin_id
+        self.amount = amount
+        self.reason = reason
+        self.timestamp = timestamp
+        self.source_id = source_id
+
+    def __repr__(self):
+        return (f"<adjustment {self.id} | {self.player_id} | "
+                f"{self.amount} | {self.timestamp}>")
+
+
+class DataVersion(db.Model):
+    """
+    Schema for the group's data version, a single row bumped by every
+    transaction that changes match or player data, so each worker can tell
+    when what it cached is stale.
+    """
+    __tablename__ = 'data_version'
+    __table_args__ = {'extend_existing': True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False)
+
+    def __init__(self, version):
+        self.id = 1
+        self.version = version
+
+    def __repr__(self):
+        return f"<data version {self.version}>"
+
+
+class Rewind(db.Model):
+    """
+    Schema for a replay's starting point: the ratings of every match after
+    (timestamp, match_id) were rewritten. Workers holding copies of the
+    history drop those matches and read them again.
+    """
+    __tablename__ = 'rewinds'
+    __table_args__ = {'extend_existing': True}
+
+    # Writers hold `writer.lock`, so ids increase in commit order.
+    id = db.Column(db.Integer, primary_key=True)
+    timestamp = db.Column(db.Integer)
+    match_id = db.Column(db.Integer)
+
+    def __init__(self, timestamp, match_id):
+        self.timestamp = timestamp
+        self.match_id = match_id
+
+    def __repr__(self):
+        return f"<rewind {self.id} | {self.timestamp} | {self.match_id}>"
+
+
+class Group(db.Model):
+    """
+    Schema for a GroupMe group served by this deployment. Lives in the
+    default schema; each group's own tables live in `schema`.
+    """
+    __tablename__ = 'groups'
+    __table_args__ = {'extend_existing': True, 'info': {'shared': True}}
+
+    # GroupMe group id.
+    id = db.Column(db.String(), primary_key=True)
+    name = db.Column(db.String())
+    bot_id = db.Column(db.String(), nullable=False)
+    # Colon separated GroupMe user ids, like the ADMIN config var.
+    admins = db.Column(db.String(), default='')
+    schema = db.Column(db.String(), nullable=False, unique=True)
+
+    # Rule overrides; None keeps the default from `commands.settings`.
+    k = db.Column(db.Float)
+    win_by = db.Column(db.Integer)
+    min_score_to_win = db.Column(db.Integer)
+
+    def __init__(self, id, name, bot_id, admins, schema, k=None,
+                 win_by=None, min_score_to_win=None):
+        self.id = id
+        self.name = name
+        self.bot_id = bot_id
+        self.admins = admins
+        self.schema = schema
+        self.k = k
+        self.win_by = win_by
+        self.min_score_to_win = min_score_to_win
+
+    def __repr__(self):
+        return f"<group {self.id} | {self.name} | {self.schema}>"
@@ -0,0 +1,80 @@
+from commands.models import Pair
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+Key = Tuple[str, str]
+# (games, wins, losses, elo) together, (wins, losses) against.
+COLUMNS = ('games_together', 'wins_together', 'losses_together',
+           'elo_together', 'wins_against', 'losses_against')
+
+
+def key(player: str, other: str) -> Key:
+    """ Storage key of an unordered pair. """
+    return (player, other) if player < other else (other, player)
+
+
+def increments(players: Sequence[str], score_12: int, score_34: int,
+               delta: float) -> Iterator[Tuple[Key, List[float]]]:
+    """
+    Per-pair increments for one match, in `COLUMNS` order.
+
+    Args:
+        players [Sequence[str]]: players 1 through 4; 1, 2 v. 3, 4.
+        score_12 [int]: points scored by players 1 and 2.
+        score_34 [int]: points scored by players 3 and 4.
+        delta [float]: Elo change of players 1 and 2.
+
+    Returns:
+        [Iterator]: (key, increments) for the six pairs in the match.
+    """
+    player_1, player_2, player_3, player_4 = players
+    win_12 = int(score_12 > score_34)
+    for (a, b), win, gain in (((player_1, player_2), win_12, delta),
+                              ((player_3, player_4), 1 - win_12, -delta)):
+        yield key(a, b), [1, win, 1 - win, gain, 0, 0]
+
+    for a in (player_1, player_2):
+        for b in (player_3, player_4):
+            # Against columns are from the lesser name's point of view.
+            win = win_12 if a < b else 1 - win_12
+            yield key(a, b), [0, 0, 0, 0, win, 1 - win]
+
+
+def record(db, players: Sequence[str], score_12: int, score_34: int,
+           delta: float) -> None:
+    """ Applies one match to the six affected rows of `pairs`. """
+    updates = dict(increments(players, score_12, score_34, delta))
+    keys = list(updates.keys())
+    rows = {(row.player_a, row.player_b): row for row in
+            Pair.query.filter(db.tuple_(Pair.player_a, Pair.player_b)
+                              .in_(keys))}
+    for pair_key, values in updates.items():
+        row = rows.get(pair_key)
+        if row is None:
+            row = Pair(*pair_key)
+            db.session.add(row)
+        for column, value in zip(COLUMNS, values):
+            setattr(row, column, getattr(row, column) + value)
+
+
+def accumulate(totals: Dict[Key, List[float]], players: Sequence[str],
+               score_12: int, score_34: int, delta: float) -> None:
+    """ In-memory version of `record`, used while replaying history. """
+    for pair_key, values in increments(players, score_12, score_34, delta):
+        row = totals.setdefault(pair_key, [0] * len(COLUMNS))
+        for i, value in enumerate(values):
+            row[i] += value
+        # Stored as Numeric(9, 3), so round like a commit/reload would.
+        row[3] = round(row[3], 3)
+
+
+def rebuild(db, totals: Dict[Key, List[float]]) -> None:
+    """ Replaces the contents of `pairs`; the caller commits. """
+    Pair.query.delete()
+    db.session.bulk_insert_mappings(Pair, [
+        {'player_a': a, 'player_b': b, **dict(zip(COLUMNS, values))}
+        for ((a, b), values) in totals.items()])
+
+
+def lookup(player: str, other: str) -> Optional[Pair]:
+    """ The stats row for two players, or None if they have never met. """
+    return Pair.query.get(key(player, other))
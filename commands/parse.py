@@ -1,3 +1,5 @@
+import re
+import logs
 import commands.groupme_message_type as gm
 from pyparsing import Word, OneOrMore, Group,\
     Optional, nums, alphanums, Suppress, CaselessKeyword, printables
@@ -6,7 +8,7 @@ from typing import Any, List
 import settings
 
 
-def parse_input(raw_string: str) -> Any:
+def _command_grammar():
     command = (Suppress('/') + Word(alphanums).setResultsName('command'))
     mention = Suppress('@') +\
         OneOrMore(Word(alphanums + "'-")).setParseAction(' '.join)\
@@ -15,29 +17,11 @@ def parse_input(raw_string: str) -> Any:
     args_delim = Suppress(',')
     args = OneOrMore((Word(alphanums) + Optional(Suppress('-'))) |
                      Word(printables)).setResultsName('args')
-    total = command + Optional(OneOrMore(mention)) +\
+    return command + Optional(OneOrMore(mention)) +\
         Optional(args_delim + args)
-    try:
-        res: List = total.parseString(raw_string)
-        return True, res
-    except Exception:
-        return False, settings.ERR
-
-
-def score_parse(raw_string: str) -> Any:
-    """
-    Parses the given input text as defined below. Returns
-    an exception if formatting is not met.
 
-    /score @A [[m1 s1]] @B [[m2 s2]]\
-           @C [[m3 s3]] @D [[m4 s4]] SCORE_AB [-,|] SCORE_CD
 
-    Args:
-        raw_string [str]: input message from GroupMe.
-    Returns:
-        [list]: parsed input, if accepted.
-        [Exception]: if not accepted.
-    """
+def _score_grammar():
     init = Suppress(CaselessKeyword(gm.RECORD_SCORE))
     score = Word(nums, max=2).setParseAction(cmn.convertToInteger)
     score_delims = Suppress(Optional(Word("|,-")))
@@ -57,17 +41,11 @@ def score_parse(raw_string: str) -> Any:
     mentions = OneOrMore(Group(mention + points_sinks))
 
     # Putting it all together.
-    score_parse = init +\
+    return init +\
         mentions + Suppress(Optional(Word(",|.;/"))) + Group(total_score)
-    try:
-        res = score_parse.parseString(raw_string)
-        return True, res
-    except Exception as e:
-        print("Failed.")
-        return False, e
 
 
-def add_user(raw_string: str) -> Any:
+def _add_user_grammar():
     init = Suppress(CaselessKeyword(gm.ADD_USER))
 
     # Tagging a user with optional mugs and sinks.
@@ -75,13 +53,103 @@ def add_user(raw_string: str) -> Any:
                        OneOrMore(Word(alphanums)).setParseAction(' '.join))
     full_name = OneOrMore(Word(alphanums)).setParseAction(' '.join)
 
-    add_user_parse = init + mention + Suppress(',') + full_name
+    return init + mention + Suppress(',') + full_name
+
+
+# Grammars are immutable once built, so build them once per process.
+COMMAND_GRAMMAR = _command_grammar()
+SCORE_GRAMMAR = _score_grammar()
+ADD_USER_GRAMMAR = _add_user_grammar()
+
+# Fast path for the common, well-formed `/cmd @A @B ..., arg - arg` shape.
+# Anything it does not match in full falls back to the pyparsing grammar.
+_WORD = r"[A-Za-z0-9]+"
+_MENTION = r"@([A-Za-z0-9'-]+(?:[ \t]+[A-Za-z0-9'-]+)*)"
+FAST_COMMAND = re.compile(
+    rf"/({_WORD})"
+    rf"((?:[ \t]*{_MENTION})*)"
+    # Words need a separator between them; letting one run of letters
+    # split into words any number of ways backtracks exponentially.
+    rf"[ \t]*(?:,[ \t]*({_WORD}(?:(?:[ \t]+|[ \t]*-[ \t]*){_WORD})*))?"
+    rf"[ \t]*")
+FAST_MENTION = re.compile(_MENTION)
+FAST_WORD = re.compile(_WORD)
+
+
+class ParsedCommand(object):
+    """ Fast-path equivalent of the `COMMAND_GRAMMAR` parse results. """
+    __slots__ = ('command', 'mentions', 'args')
+
+    def __init__(self, command: str, mentions: List[str], args: List[str]):
+        self.command = command
+        self.mentions = mentions
+        self.args = args
+
+    def __repr__(self):
+        return str([self.command, *self.mentions, *self.args])
+
+
+def fast_parse(raw_string: str) -> Any:
+    """
+    Parses well-formed commands with a single regular expression.
+
+    Args:
+        raw_string [str]: input message from GroupMe.
+    Returns:
+        [ParsedCommand]: parsed input, if unambiguous.
+        [None]: if the full grammar is needed.
+    """
+    match = FAST_COMMAND.fullmatch(raw_string)
+    if match is None:
+        return None
+
+    command, mentions, _, args = match.groups()
+    mentions = [' '.join(mention.split())
+                for mention in FAST_MENTION.findall(mentions)]
+    args = FAST_WORD.findall(args) if args else []
+    return ParsedCommand(command, mentions, args)
+
+
+def parse_input(raw_string: str) -> Any:
+    parsed = fast_parse(raw_string)
+    if parsed is not None:
+        return True, parsed
+
+    try:
+        res: List = COMMAND_GRAMMAR.parseString(raw_string)
+        return True, res
+    except Exception:
+        return False, settings.ERR
+
 
+def score_parse(raw_string: str) -> Any:
+    """
+    Parses the given input text as defined below. Returns
+    an exception if formatting is not met.
+
+    /score @A [[m1 s1]] @B [[m2 s2]]\
+           @C [[m3 s3]] @D [[m4 s4]] SCORE_AB [-,|] SCORE_CD
+
+    Args:
+        raw_string [str]: input message from GroupMe.
+    Returns:
+        [list]: parsed input, if accepted.
+        [Exception]: if not accepted.
+    """
+    try:
+        res = SCORE_GRAMMAR.parseString(raw_string)
+        return True, res
+    except Exception as e:
+        logs.parse.debug("Score rejected: %s", e)
+        return False, e
+
+
+def add_user(raw_string: str) -> Any:
     try:
-        res = add_user_parse.parseString(raw_string)
+        res = ADD_USER_GRAMMAR.parseString(raw_string)
         return True, res
     except Exception as e:
-        print("Failed.")
+        logs.parse.debug("Add rejected: %s", e)
         return False, e
 
 
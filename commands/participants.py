@@ -0,0 +1,48 @@
+from commands.models import Participant
+from typing import Dict, List, Sequence
+
+
+def rows(match_id: int, timestamp: int, player_ids: Sequence[str],
+         before: Sequence[float], after: Sequence[float],
+         delta: float) -> List[Dict]:
+    """
+    `participants` mappings for one match.
+
+    Args:
+        match_id [int]: id of the match in `records`.
+        timestamp [int]: when the match was played.
+        player_ids [Sequence[str]]: GroupMe ids of players 1 through 4.
+        before [Sequence[float]]: ratings before the match.
+        after [Sequence[float]]: ratings after the match.
+        delta [float]: Elo change of players 1 and 2.
+
+    Returns:
+        [List[Dict]]: one mapping per player.
+    """
+    return [{'match_id': match_id, 'player_id': player_id,
+             'team': 1 if i < 2 else 2, 'timestamp': timestamp,
+             'rating_before': rating_before, 'rating_after': rating_after,
+             'delta': delta if i < 2 else -delta}
+            for i, (player_id, rating_before, rating_after) in
+            enumerate(zip(player_ids, before, after))]
+
+
+def storable(player_ids: Sequence[str]) -> bool:
+    """
+    Whether a match can have `participants` rows. The key allows one row
+    per player, and `/score` accepted a player tagged twice before it
+    checked for that, so some old matches have no rows.
+    """
+    return len(set(player_ids)) == len(player_ids)
+
+
+def record(db, *args) -> None:
+    """ Adds the `participants` rows of a new match; see `rows`. """
+    db.session.bulk_insert_mappings(Participant, rows(*args))
+
+
+def matches_for(player_id: str, limit: int = None) -> List[Participant]:
+    """ A player's most recent matches, newest first. """
+    query = Participant.query.filter(Participant.player_id == player_id)\
+        .order_by(Participant.timestamp.desc(), Participant.match_id.desc())
+    return query.limit(limit).all() if limit else query.all()
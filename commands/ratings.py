@@ -0,0 +1,422 @@
+"""
+Rating engines. Elo is the rating of record: it lives in `stats` and drives
+`records`, `participants` and `pairs`. The other engines are rated in the
+same replay pass and kept in `ratings`, for `/lb <engine>`.
+
+Engines rate batches of matches with NumPy. Online engines get waves of
+consecutive matches with no player in common, which rate exactly as if they
+were played one at a time; Glicko-2 gets each rating period whole, as the
+algorithm defines it.
+"""
+import math
+import numpy as np
+
+from commands import elo, settings, tenancy
+from commands.models import Rating, Score
+from sqlalchemy import func
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+# (timestamp, names of players 1 through 4, score_12, score_34)
+Match = Tuple[int, Sequence[str], int, int]
+State = List[float]
+# Position of a match in replay order: (timestamp, record id).
+Position = Tuple[int, int]
+
+# Past every record id, for positions after the last match of a timestamp.
+LAST_ID = 2 ** 31 - 1
+GLICKO_SCALE = 173.7178
+GLICKO_EPSILON = 1e-6
+
+
+def period_of(timestamp: int) -> int:
+    return timestamp // settings.RATING_PERIOD
+
+
+class Engine(object):
+    """ Interface every rating engine implements. """
+    name = ''
+    # Per-player state; stored engines use `Rating` column names.
+    fields: Tuple[str, ...] = ('rating',)
+    # Whether a rating period's matches are rated together rather than
+    # one at a time.
+    periodic = False
+    # Decimals shown on the leaderboard.
+    decimals = 0
+
+    def initial(self) -> State:
+        raise NotImplementedError("Implement me!")
+
+    def rate(self, states: np.ndarray, players: np.ndarray,
+             score_12: np.ndarray, score_34: np.ndarray,
+             period: int) -> np.ndarray:
+        """
+        Rates a batch of matches that all start from `states`.
+
+        Args:
+            states [np.ndarray]: (n_players, len(fields)) state of every
+                                 player in the batch.
+            players [np.ndarray]: (n_matches, 4) rows of `states` for
+                                  players 1 through 4.
+            score_12 [np.ndarray]: (n_matches,) points scored by 1 and 2.
+            score_34 [np.ndarray]: (n_matches,) points scored by 3 and 4.
+            period [int]: rating period the matches were played in.
+
+        Returns:
+            [np.ndarray]: the players' states after the batch.
+        """
+        raise NotImplementedError("Implement me!")
+
+    def display(self, states: np.ndarray, period: int) -> np.ndarray:
+        """ Leaderboard value of each state as of `period`. """
+        return states[:, 0]
+
+
+class Elo(Engine):
+    """ The bot's Elo, as in `elo.elo_delta`. """
+    name = 'elo'
+    fields = ('rating', 'games')
+
+    def initial(self) -> State:
+        return [1000., 0.]
+
+    def rate(self, states, players, score_12, score_34, period):
+        elos = states[players, 0]
+        games = states[players, 1]
+        delta = elo.batch_elo_delta(elos[:, :2], elos[:, 2:], games[:, :2],
+                                    games[:, 2:], score_12, score_34,
+                                    tenancy.current().k)
+        after = states.copy()
+        after[players[:, :2], 0] += delta[:, None]
+        after[players[:, 2:], 0] -= delta[:, None]
+        after[players, 1] += 1
+        return after
+
+
+class Glicko2(Engine):
+    """
+    Glickman's Glicko-2. Each player is rated against the other team as a
+    single opponent, credited with their own team's average rating.
+    """
+    name = 'glicko'
+    fields = ('rating', 'deviation', 'volatility', 'period')
+    periodic = True
+    MAX_DEVIATION = 350.
+
+    def __init__(self, tau: float = settings.GLICKO_TAU):
+        self.tau = tau
+
+    def initial(self) -> State:
+        return [1500., self.MAX_DEVIATION, 0.06, 0.]
+
+    def deviation(self, states: np.ndarray, period: int) -> np.ndarray:
+        """ Glicko-2 scale deviation, grown by the periods sat out. """
+        idle = np.maximum(period - states[:, 3] - 1, 0)
+        phi = np.sqrt((states[:, 1] / GLICKO_SCALE) ** 2 +
+                      idle * states[:, 2] ** 2)
+        return np.minimum(phi, self.MAX_DEVIATION / GLICKO_SCALE)
+
+    def volatility(self, phi: np.ndarray, sigma: np.ndarray, v: np.ndarray,
+                   delta: np.ndarray) -> np.ndarray:
+        """ Step 5 of Glickman's paper, the Illinois algorithm per player. """
+        a = np.log(sigma ** 2)
+
+        def f(x):
+            ex = np.exp(x)
+            return ex * (delta ** 2 - phi ** 2 - v - ex) /\
+                (2 * (phi ** 2 + v + ex) ** 2) - (x - a) / self.tau ** 2
+
+        gap = delta ** 2 - phi ** 2 - v
+        k = np.ones_like(a)
+        below = (gap <= 0) & (f(a - self.tau) < 0)
+        while below.any():
+            k += below
+            below &= f(a - k * self.tau) < 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            A = a
+            B = np.where(gap > 0, np.log(np.where(gap > 0, gap, 1)),
+                         a - k * self.tau)
+            f_A, f_B = f(A), f(B)
+            for _ in range(100):
+                active = np.abs(B - A) > GLICKO_EPSILON
+                if not active.any():
+                    break
+                C = A + (A - B) * f_A / (f_B - f_A)
+                f_C = f(C)
+                swap = f_C * f_B <= 0
+                A = np.where(active & swap, B, A)
+                f_A = np.where(active, np.where(swap, f_B, f_A / 2), f_A)
+                B = np.where(active, C, B)
+                f_B = np.where(active, f_C, f_B)
+        return np.exp(A / 2)
+
+    def rate(self, states, players, score_12, score_34, period):
+        n_matches = len(players)
+        mu = (states[:, 0] - 1500) / GLICKO_SCALE
+        phi = self.deviation(states, period)
+        sigma = states[:, 2]
+
+        team_mu = mu[players].reshape(n_matches, 2, 2).mean(axis=2)
+        team_phi = np.sqrt((phi[players] ** 2).reshape(n_matches, 2, 2)
+                           .mean(axis=2))
+        own, other = [0, 0, 1, 1], [1, 1, 0, 0]
+        win_12 = (score_12 > score_34)[:, None]
+        won = np.where(np.array(own) == 0, win_12, ~win_12).astype(float)
+        g = 1 / np.sqrt(1 + 3 * team_phi[:, other] ** 2 / np.pi ** 2)
+        expected = 1 / (1 + np.exp(-g * (team_mu[:, own] -
+                                         team_mu[:, other])))
+
+        # Every player in `states` played, so no sum is empty.
+        rows = players.ravel()
+        v = 1 / np.bincount(rows, (g ** 2 * expected * (1 - expected))
+                            .ravel(), len(states))
+        improvement = np.bincount(rows, (g * (won - expected)).ravel(),
+                                  len(states))
+        sigma = self.volatility(phi, sigma, v, v * improvement)
+        phi = 1 / np.sqrt(1 / (phi ** 2 + sigma ** 2) + 1 / v)
+        mu = mu + phi ** 2 * improvement
+        return np.column_stack([mu * GLICKO_SCALE + 1500,
+                                phi * GLICKO_SCALE, sigma,
+                                np.full(len(states), period)])
+
+    def display(self, states, period):
+        # Conservative: unsure ratings rank below proven ones.
+        return states[:, 0] - 2 * GLICKO_SCALE *\
+            self.deviation(states, period)
+
+
+def _erfc(x: np.ndarray) -> np.ndarray:
+    return np.fromiter(map(math.erfc, x.tolist()), np.float64, len(x))
+
+
+class TrueSkill(Engine):
+    """ Two-team TrueSkill without draws, ranked by mu - 3 sigma. """
+    name = 'trueskill'
+    fields = ('rating', 'deviation')
+    decimals = 1
+    MU = 25.
+    SIGMA = MU / 3
+    BETA = SIGMA / 2
+    TAU = SIGMA / 100
+
+    def initial(self) -> State:
+        return [self.MU, self.SIGMA]
+
+    def rate(self, states, players, score_12, score_34, period):
+        mu = states[:, 0].copy()
+        var = states[:, 1] ** 2 + self.TAU ** 2
+
+        win_12 = (score_12 > score_34)[:, None]
+        winners = np.where(win_12, players[:, :2], players[:, 2:])
+        losers = np.where(win_12, players[:, 2:], players[:, :2])
+        c_2 = var[players].sum(axis=1) + 4 * self.BETA ** 2
+        c = np.sqrt(c_2)
+        t = (mu[winners].sum(axis=1) - mu[losers].sum(axis=1)) / c
+        cdf = 0.5 * _erfc(-t / math.sqrt(2))
+        pdf = np.exp(-t ** 2 / 2) / math.sqrt(2 * math.pi)
+        # pdf / cdf tends to -t for upsets too large to represent.
+        v = np.where(cdf > 1e-300, pdf / np.maximum(cdf, 1e-300), -t)
+        w = v * (v + t)
+
+        mu[winners] += var[winners] / c[:, None] * v[:, None]
+        mu[losers] -= var[losers] / c[:, None] * v[:, None]
+        var[players] *= 1 - var[players] / c_2[:, None] * w[:, None]
+        return np.column_stack([mu, np.sqrt(var)])
+
+    def display(self, states, period):
+        return states[:, 0] - 3 * states[:, 1]
+
+
+ENGINES: Dict[str, Engine] = {engine.name: engine for engine in
+                              (Elo(), Glicko2(), TrueSkill())}
+# Engines kept in `ratings`; Elo is kept in `stats`.
+STORED: List[Engine] = [ENGINES['glicko'], ENGINES['trueskill']]
+
+
+def rate(engine: Engine, matches: Sequence[Match],
+         states: Dict[str, State]) -> None:
+    """ Rates a batch of `matches` with `engine`, updating `states`. """
+    index: Dict[str, int] = {}
+    players = np.array([[index.setdefault(name, len(index))
+                         for name in names]
+                        for (_, names, _, _) in matches])
+    before = np.array([states.get(name) or engine.initial()
+                       for name in index], dtype=np.float64)
+    score_12 = np.array([match[2] for match in matches])
+    score_34 = np.array([match[3] for match in matches])
+    after = engine.rate(before, players, score_12, score_34,
+                        period_of(matches[-1][0]))
+    for name, state in zip(index, after.tolist()):
+        states[name] = state
+
+
+class Ratings(object):
+    """
+    Every stored engine's player states, fed matches in the order they
+    were played. Glicko-2's open rating period stays pending, since later
+    matches can still join it.
+    """
+
+    def __init__(self, states: Optional[Dict[str, Dict[str, State]]] = None):
+        saved = states or {}
+        self.states = {engine.name: dict(saved.get(engine.name, {}))
+                       for engine in STORED}
+        self.pending: Dict[str, List[Match]] =\
+            {engine.name: [] for engine in STORED}
+        # Players in each online engine's pending wave.
+        self.busy: Dict[str, Set[str]] = {engine.name: set()
+                                          for engine in STORED}
+
+    def add(self, match: Match) -> None:
+        timestamp, names, _, _ = match
+        for engine in STORED:
+            pending = self.pending[engine.name]
+            if engine.periodic:
+                if pending and\
+                        period_of(pending[0][0]) != period_of(timestamp):
+                    self.flush(engine)
+            elif not self.busy[engine.name].isdisjoint(names):
+                self.flush(engine)
+            self.pending[engine.name].append(match)
+            if not engine.periodic:
+                self.busy[engine.name].update(names)
+
+    def resume(self, matches: Sequence[Match]) -> None:
+        """ Re-opens the rating period `matches` were played in. """
+        for engine in STORED:
+            if engine.periodic:
+                self.pending[engine.name] = list(matches)
+
+    def flush(self, engine: Engine) -> None:
+        pending = self.pending[engine.name]
+        if pending:
+            rate(engine, pending, self.states[engine.name])
+        pending.clear()
+        self.busy[engine.name].clear()
+
+    def close(self) -> None:
+        """ Rates every pending match that cannot be joined by others. """
+        for engine in STORED:
+            if not engine.periodic:
+                self.flush(engine)
+
+    def current(self, engine: Engine) -> Dict[str, State]:
+        """ States including pending matches, without closing the period. """
+        states = dict(self.states[engine.name])
+        if self.pending[engine.name]:
+            rate(engine, self.pending[engine.name], states)
+        return states
+
+
+def row_values(engine: Engine, state: State) -> Dict:
+    values = dict(zip(engine.fields, state))
+    if 'period' in values:
+        values['period'] = int(values['period'])
+    return values
+
+
+def state_of(engine: Engine, row: Rating) -> State:
+    return [float(getattr(row, field)) for field in engine.fields]
+
+
+def pending_matches(position: Position) -> List[Match]:
+    """ Matches in the rating period of `position`, up to and including it. """
+    timestamp, id = position
+    rows = Score.query.filter(
+        Score.timestamp >= period_of(timestamp) * settings.RATING_PERIOD,
+        (Score.timestamp < timestamp) |
+        ((Score.timestamp == timestamp) & (Score.id <= id)))\
+        .with_entities(Score.timestamp, Score.player_1,
+                       Score.player_2, Score.player_3,
+                       Score.player_4, Score.score_12,
+                       Score.score_34)\
+        .order_by(Score.timestamp, Score.id)
+    return [(timestamp, names, score_12, score_34) for
+            (timestamp, *names, score_12, score_34) in rows]
+
+
+def load(position: Position) -> Ratings:
+    """ Stored states, with the rating period open at `position`. """
+    ratings = Ratings()
+    for row in Rating.query:
+        engine = ENGINES.get(row.engine)
+        if engine in STORED:
+            ratings.states[engine.name][row.name] = state_of(engine, row)
+    ratings.resume(pending_matches(position))
+    return ratings
+
+
+def save(db, ratings: Ratings) -> None:
+    """ Replaces `ratings` with every closed state; the caller commits. """
+    ratings.close()
+    Rating.query.delete()
+    db.session.bulk_insert_mappings(
+        Rating, [{'engine': name, 'name': player,
+                  **row_values(ENGINES[name], state)}
+                 for name, states in ratings.states.items()
+                 for player, state in states.items()])
+
+
+def store(db, engine: Engine, states: Dict[str, State],
+          rows: Dict[str, Rating]) -> None:
+    """ Writes `states` through existing `rows`, adding missing ones. """
+    for name, state in states.items():
+        row = rows.get(name)
+        if row is None:
+            row = Rating(engine.name, name)
+            db.session.add(row)
+        for field, value in row_values(engine, state).items():
+            setattr(row, field, value)
+
+
+def record(db, match: Match, newest: Optional[int]) -> None:
+    """
+    Rates a match recorded after every other, as `/score` does.
+
+    Args:
+        db [SQLAlchemy]: database handle.
+        match [Match]: the new match.
+        newest [int]: timestamp of the newest match before it, if any.
+    """
+    timestamp, names, _, _ = match
+    rows = {(row.engine, row.name): row for row in
+            Rating.query.filter(Rating.name.in_(names))}
+    for engine in STORED:
+        if engine.periodic:
+            continue
+        states = {name: state_of(engine, rows[engine.name, name])
+                  for name in names if (engine.name, name) in rows}
+        rate(engine, [match], states)
+        store(db, engine, states,
+              {name: rows.get((engine.name, name)) for name in names})
+
+    # A period is rated once the first match of a later one arrives.
+    if newest is None or period_of(timestamp) == period_of(newest):
+        return
+    matches = pending_matches((newest, LAST_ID))
+    players = set(name for (_, names, _, _) in matches for name in names)
+    for engine in STORED:
+        if not engine.periodic:
+            continue
+        period_rows = {row.name: row for row in Rating.query.filter(
+            Rating.engine == engine.name, Rating.name.in_(players))}
+        states = {name: state_of(engine, row)
+                  for name, row in period_rows.items()}
+        rate(engine, matches, states)
+        store(db, engine, states, period_rows)
+
+
+def standings(engine: Engine) -> Dict[str, float]:
+    """ Player name -> leaderboard value under a stored engine. """
+    states = {row.name: state_of(engine, row) for row in
+              Rating.query.filter(Rating.engine == engine.name)}
+    newest = Score.query.with_entities(func.max(Score.timestamp)).scalar()
+    if newest is None:
+        return {}
+    pending = pending_matches((newest, LAST_ID)) if engine.periodic else []
+    if pending:
+        rate(engine, pending, states)
+    if len(states) == 0:
+        return {}
+    values = engine.display(np.array(list(states.values())),
+                            period_of(newest))
+    return dict(zip(states, values.tolist()))
@@ -0,0 +1,81 @@
+import re
+import commands.groupme_message_type as gm
+
+from importlib import import_module
+from typing import Any, Dict, NamedTuple, Optional
+
+
+class Route(NamedTuple):
+    """ Declarative description of how a command prefix is handled. """
+    # Module and class of the command, imported on first use.
+    module: str
+    name: str
+    # Keyword arguments for the command.
+    kwargs: Dict[str, Any] = {}
+    # Keyword arguments added when the sender is not an admin.
+    non_admin: Dict[str, Any] = {}
+    # Non-admins are ignored entirely, as if no command matched.
+    admin_only: bool = False
+
+    def load(self):
+        return getattr(import_module(self.module), self.name)
+
+    def build(self, message: Dict, admin: bool):
+        kwargs = self.kwargs if admin else {**self.kwargs, **self.non_admin}
+        return self.load()(message, **kwargs)
+
+
+# `/check` re-reads recent history instead of building a single command.
+CHECK = Route('commands.score', 'ScoreCommand', admin_only=True)
+
+ROUTES: Dict[str, Route] = {
+    gm.RECORD_SCORE: Route('commands.score', 'ScoreCommand',
+                           non_admin={'check': True}),
+    gm.PARTNER: Route('commands.partner', 'PartnerCommand'),
+    gm.HEAD_TO_HEAD: Route('commands.head_to_head', 'HeadToHeadCommand'),
+    gm.HISTORY: Route('commands.history', 'HistoryCommand'),
+    gm.LEADERBOARD: Route('commands.leaderboard', 'LeaderboardCommand'),
+    gm.LB: Route('commands.leaderboard', 'LeaderboardCommand'),
+    gm.ADMIN_VERIFY: CHECK,
+    gm.BOTCH: Route('commands.botch', 'BotchCommand',
+                    non_admin={'admin': False}),
+    gm.UNBOTCH: Route('commands.botch', 'BotchCommand', {'unbotch': True},
+                      non_admin={'admin': False}),
+    gm.STRIKE: Route('commands.strike', 'StrikeCommand',
+                     non_admin={'admin': False}),
+    gm.HELP_V: Route('commands.help', 'HelpCommand', {'verbose': True}),
+    gm.HELP: Route('commands.help', 'HelpCommand'),
+    gm.ADD_USER: Route('commands.add_user', 'AddCommand',
+                       non_admin={'admin': False}),
+    gm.SB: Route('commands.scoreboard', 'ScoreboardCommand'),
+    gm.MATCHUP: Route('commands.matchup', 'MatchupCommand'),
+    gm.BALANCE: Route('commands.balance', 'BalanceCommand'),
+    gm.REFRESH: Route('commands.refresh', 'RefreshCommand', admin_only=True),
+}
+
+COMMAND_TOKEN = re.compile(r"/\w*")
+
+
+def lookup(text: str, admin: bool) -> Optional[Route]:
+    """
+    Finds the route for a message by the longest registered prefix of its
+    leading `/command` token, which matches how `startswith` dispatch
+    behaved (e.g. `/helpv` over `/help`, `/scoreboard` still scores).
+
+    Args:
+        text [str]: the GroupMe message text.
+        admin [bool]: whether the sender is an admin.
+
+    Returns:
+        [Route]: the route to take, or None if no command applies.
+    """
+    match = COMMAND_TOKEN.match(text)
+    if match is None:
+        return None
+
+    token = match.group()
+    for end in range(len(token), 1, -1):
+        route = ROUTES.get(token[:end])
+        if route is not None:
+            return None if (route.admin_only and not admin) else route
+    return None
@@ -0,0 +1,349 @@
+import csv
+import json
+import os
+from commands import (adjustments, elo, pairs, participants, ratings,
+                      settings, store, tenancy)
+from commands.models import Checkpoint, Pair, Participant, Score, Stats
+from sqlalchemy import func
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Number of `records` rows pulled from the database per round trip.
+CHUNK_SIZE = 1000
+PRERANKINGS = "resources/prerankings.csv"
+
+# Position of a match in replay order: (timestamp, record id).
+Position = Tuple[int, int]
+START: Position = (-1, 0)
+
+
+def load_prerankings() -> Dict[str, float]:
+    """ Starting elo by player name, for players seeded above 1000. """
+    name_dict = {}
+    # The seeds were picked for the group configured through the environment.
+    if tenancy.key() is not None or not os.path.exists(PRERANKINGS):
+        return name_dict
+    with open(PRERANKINGS, 'r') as read_file:
+        reader = csv.reader(read_file)
+        for ranking in reader:
+            elo = ranking[0]
+            for name in ranking[1:]:
+                name_dict[name] = float(elo)
+
+    return name_dict
+
+
+class PlayerState(object):
+    """ Compact, in-memory rating state for a single player. """
+    __slots__ = ('id', 'player_id', 'elo', 'games', 'wins', 'losses')
+
+    def __init__(self, id, player_id, elo=1000, games=0, wins=0, losses=0):
+        self.id = id
+        self.player_id = player_id
+        self.elo = elo
+        self.games = games
+        self.wins = wins
+        self.losses = losses
+
+
+class ReplayState(object):
+    """ Everything a replay carries from one match to the next. """
+
+    def __init__(self, players: Dict[str, PlayerState],
+                 pair_totals: Dict[pairs.Key, List[float]],
+                 position: Position = START,
+                 engines: Optional[ratings.Ratings] = None):
+        self.players = players
+        self.pair_totals = pair_totals
+        self.position = position
+        # The alternative rating engines, fed the same matches.
+        self.engines = engines or ratings.Ratings()
+        self.k = tenancy.current().k
+
+    @classmethod
+    def initial(cls, db, initial: Dict[str, float]) -> 'ReplayState':
+        """ State before any match, from prerankings. """
+        players = {name: PlayerState(id, player_id,
+                                     float(initial.get(name, 1000)))
+                   for (id, player_id, name) in
+                   db.session.query(Stats.id, Stats.player_id, Stats.name)}
+        return cls(players, {})
+
+    @classmethod
+    def current(cls, db, position: Position) -> 'ReplayState':
+        """ State as currently stored in `stats` and `pairs`. """
+        # Ratings are stored as Numeric(7, 3); round pending values the
+        # same way before they are read again.
+        players = {stat.name: PlayerState(stat.id, stat.player_id,
+                                          round(stat.elo, 3), stat.games,
+                                          stat.wins, stat.losses)
+                   for stat in Stats.query.all()}
+        pair_totals = {(pair.player_a, pair.player_b):
+                       [getattr(pair, column) for column in pairs.COLUMNS]
+                       for pair in Pair.query.all()}
+        return cls(players, pair_totals, position, ratings.load(position))
+
+    @classmethod
+    def restore(cls, db, checkpoint: Checkpoint) -> 'ReplayState':
+        """ State saved in a checkpoint, plus players added since. """
+        saved = json.loads(checkpoint.state)
+        initial = None
+        players = {}
+        for (id, player_id, name) in\
+                db.session.query(Stats.id, Stats.player_id, Stats.name):
+            if name in saved['players']:
+                players[name] = PlayerState(id, player_id,
+                                            *saved['players'][name])
+                continue
+            if initial is None:
+                initial = load_prerankings()
+            players[name] = PlayerState(id, player_id,
+                                        float(initial.get(name, 1000)))
+        pair_totals = {(a, b): values for [a, b, *values] in saved['pairs']}
+        position = (checkpoint.timestamp, checkpoint.match_id)
+        engines = ratings.Ratings(saved['ratings'])
+        engines.resume(ratings.pending_matches(position))
+        return cls(players, pair_totals, position, engines)
+
+    def checkpoint(self) -> Checkpoint:
+        """ Snapshot of the state at its current position. """
+        self.engines.close()
+        state = {'players': {name: [player.elo, player.games,
+                                    player.wins, player.losses]
+                             for name, player in self.players.items()},
+                 'pairs': [[*pair_key, *values] for pair_key, values in
+                           self.pair_totals.items()],
+                 'ratings': self.engines.states}
+        return Checkpoint(*self.position, json.dumps(state))
+
+    def adjust(self, player_id: str, amount: float) -> None:
+        """ Applies a botch or unbotch from the adjustments ledger. """
+        for player in self.players.values():
+            if player.player_id == player_id:
+                player.elo = round(player.elo + amount, 3)
+                return
+
+    def apply(self, id: int, timestamp: int, names: List[str],
+              score_12: int, score_34: int) -> Tuple[float, List[Dict]]:
+        """
+        Rates one match and advances the state past it.
+
+        Returns:
+            [tuple]: team 1-2's Elo change, and the match's `participants`
+                     rows.
+        """
+        stats = [self.players[name] for name in names]
+        before = [player.elo for player in stats]
+        games = [player.games for player in stats]
+        delta = elo.elo_delta(before, games, score_12, score_34, self.k)
+        pairs.accumulate(self.pair_totals, names, score_12, score_34, delta)
+
+        # Ratings are stored as Numeric(7, 3), so round exactly like a
+        # commit/reload cycle would before they are read again.
+        elos = [round(before[0] + delta, 3), round(before[1] + delta, 3),
+                round(before[2] - delta, 3), round(before[3] - delta, 3)]
+
+        rows = participants.rows(id, timestamp,
+                                 [player.player_id for player in stats],
+                                 before, elos, delta)
+
+        win_losses = [1, 1, 0, 0] if score_12 > score_34 else [0, 0, 1, 1]
+        for player, rating, win_loss in zip(stats, elos, win_losses):
+            player.games += 1
+            player.wins += win_loss
+            player.losses += 1 - win_loss
+            player.elo = rating
+
+        self.engines.add((timestamp, names, score_12, score_34))
+        self.position = (timestamp, id)
+        return delta, rows
+
+
+def after(position: Position, timestamp_column=Score.timestamp,
+          id_column=Score.id):
+    """ SQL filter for matches strictly after `position` in replay order. """
+    timestamp, id = position
+    return (timestamp_column > timestamp) |\
+        ((timestamp_column == timestamp) & (id_column > id))
+
+
+def checkpoint_before(position: Position):
+    """ SQL filter for checkpoints strictly before `position`. """
+    timestamp, id = position
+    return (Checkpoint.timestamp < timestamp) |\
+        ((Checkpoint.timestamp == timestamp) & (Checkpoint.match_id < id))
+
+
+def stream_records(db, start: Position = START,
+                   chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple]:
+    """
+    Streams the bare columns of every match after `start` in the order
+    the matches were played, without materializing `Score` objects.
+
+    Args:
+        db [SQLAlchemy]: database handle.
+        start [Position]: only matches after this position are streamed.
+        chunk_size [int]: rows fetched from the database per round trip.
+
+    Returns:
+        [Iterator]: (id, timestamp, player_1, player_2, player_3, player_4,
+                     score_12, score_34) tuples.
+    """
+    query = db.session.query(Score.id, Score.timestamp,
+                             Score.player_1, Score.player_2,
+                             Score.player_3, Score.player_4,
+                             Score.score_12, Score.score_34)\
+        .filter(after(start))\
+        .order_by(Score.timestamp, Score.id)\
+        .yield_per(chunk_size)
+    for row in query:
+        yield tuple(row)
+
+
+def run(db, state: ReplayState,
+        chunk_size: int = CHUNK_SIZE) -> Dict[int, float]:
+    """
+    Replays every match after the state's position, with the adjustments
+    ledger merged in, checkpointing every `settings.CHECKPOINT_INTERVAL`
+    matches over the last stretch, and writes all ratings back with bulk
+    statements for the caller to commit.
+
+    Args:
+        db [SQLAlchemy]: database handle.
+        state [ReplayState]: state to replay from.
+        chunk_size [int]: rows fetched from the database per round trip,
+            and matches written back per bulk statement.
+
+    Returns:
+        [dict]: record id -> team 1-2's Elo change, for replayed matches.
+    """
+    start = state.position
+    # Only the trailing checkpoints are written; each one holds every
+    # player and pair, so keeping all of them grows with history squared.
+    total = db.session.query(func.count(Score.id))\
+        .filter(after(start)).scalar()
+    first_checkpoint = total - settings.CHECKPOINT_INTERVAL *\
+        settings.CHECKPOINTS_KEPT
+    deltas: Dict[int, float] = {}
+    record_updates: List[Dict] = []
+    participant_rows: List[Dict] = []
+
+    def write_back() -> None:
+        db.session.bulk_update_mappings(Score, record_updates)
+        db.session.bulk_insert_mappings(Participant, participant_rows)
+        record_updates.clear()
+        participant_rows.clear()
+
+    # Rows for the replayed matches are written as they are rated.
+    Participant.query.filter(after(start, Participant.timestamp,
+                                   Participant.match_id))\
+        .delete(synchronize_session=False)
+    ledger = adjustments.pending(start[0])
+    for (id, timestamp, *names, score_12, score_34) in\
+            stream_records(db, start, chunk_size):
+        while ledger and ledger[0][0] <= timestamp:
+            state.adjust(*ledger.popleft()[1:])
+        deltas[id], rows = state.apply(id, timestamp, names,
+                                       score_12, score_34)
+        if participants.storable([row['player_id'] for row in rows]):
+            participant_rows += rows
+        elos = [row['rating_after'] for row in rows]
+        record_updates.append({'id': id, 'elo_1': elos[0], 'elo_2': elos[1],
+                               'elo_3': elos[2], 'elo_4': elos[3]})
+        if len(record_updates) >= chunk_size:
+            write_back()
+        if len(deltas) % settings.CHECKPOINT_INTERVAL == 0 and\
+                len(deltas) > first_checkpoint:
+            db.session.add(state.checkpoint())
+    # Adjustments made since the last match.
+    for (_, player_id, amount) in ledger:
+        state.adjust(player_id, amount)
+
+    stats_updates = [{'id': player.id, 'elo': player.elo,
+                      'games': player.games, 'wins': player.wins,
+                      'losses': player.losses}
+                     for player in state.players.values()]
+
+    write_back()
+    db.session.bulk_update_mappings(Stats, stats_updates)
+    pairs.rebuild(db, state.pair_totals)
+    ratings.save(db, state.engines)
+    store.rewind(db, start)
+    return deltas
+
+
+def replay(db, initial: Dict[str, float],
+           chunk_size: int = CHUNK_SIZE) -> int:
+    """
+    Replays the full match history in memory from prerankings.
+
+    Args:
+        db [SQLAlchemy]: database handle.
+        initial [dict]: player name -> starting elo (prerankings).
+        chunk_size [int]: rows fetched from the database per round trip.
+
+    Returns:
+        [int]: number of matches replayed.
+    """
+    state = ReplayState.initial(db, initial)
+    Checkpoint.query.delete()
+    db.session.add(state.checkpoint())
+    return len(run(db, state, chunk_size))
+
+
+def replay_from(db, position: Position) -> Dict[int, float]:
+    """
+    Re-rates history after a change at `position` (a struck or backdated
+    match) by restoring the latest checkpoint before it and replaying only
+    the matches that follow. The change must already be flushed.
+
+    Args:
+        db [SQLAlchemy]: database handle.
+        position [Position]: (timestamp, record id) of the changed match.
+
+    Returns:
+        [dict]: record id -> team 1-2's Elo change, for replayed matches.
+    """
+    checkpoint: Optional[Checkpoint] = Checkpoint.query\
+        .filter(checkpoint_before(position))\
+        .order_by(Checkpoint.timestamp.desc(), Checkpoint.match_id.desc())\
+        .first()
+    if checkpoint is None:
+        # Nothing to restore from yet, so this is a full replay.
+        state = ReplayState.initial(db, load_prerankings())
+        Checkpoint.query.delete()
+        db.session.add(state.checkpoint())
+        return run(db, state)
+
+    state = ReplayState.restore(db, checkpoint)
+    Checkpoint.query.filter(~checkpoint_before(position))\
+        .delete(synchronize_session=False)
+    return run(db, state)
+
+
+def since_checkpoint(db):
+    """ Scalar subquery counting the matches after the newest checkpoint. """
+    def newest(column):
+        return db.session.query(column)\
+            .order_by(Checkpoint.timestamp.desc(),
+                      Checkpoint.match_id.desc()).limit(1).as_scalar()
+    # With no checkpoint yet, every match counts.
+    position = (func.coalesce(newest(Checkpoint.timestamp), START[0]),
+                func.coalesce(newest(Checkpoint.match_id), START[1]))
+    return db.session.query(func.count(Score.id))\
+        .filter(after(position)).as_scalar()
+
+
+def checkpoint_current(db, position: Position) -> None:
+    """
+    Snapshots the stored ratings after the match at `position`, dropping
+    all but the newest `settings.CHECKPOINTS_KEPT` checkpoints.
+    """
+    db.session.add(ReplayState.current(db, position).checkpoint())
+    db.session.flush()
+    oldest_kept = Checkpoint.query\
+        .order_by(Checkpoint.timestamp.desc(), Checkpoint.match_id.desc())\
+        .offset(settings.CHECKPOINTS_KEPT - 1).first()
+    if oldest_kept is not None:
+        Checkpoint.query.filter(checkpoint_before(
+            (oldest_kept.timestamp, oldest_kept.match_id)))\
+            .delete(synchronize_session=False)
@@ -1,42 +1,76 @@
-import os
-import numpy as np
-from commands import settings
+from commands import (adjustments, directory, elo, pairs, participants,
+                      ratings, replay, settings, tenancy)
 
 from commands.command import BaseCommand
 from commands.models import Stats, Score
-from typing import List
+from sqlalchemy import func
+from typing import List, Optional, Sequence
+
+
+def player_ids(parsed_mentions: Sequence[str], user_ids: Sequence[str],
+               sender: str) -> Optional[List[str]]:
+    """
+    GroupMe ids of the tagged players in the order they were typed, with
+    `@me` standing in for the sender.
+
+    Args:
+        parsed_mentions [Sequence[str]]: mention text, e.g. 'me' or a name.
+        user_ids [Sequence[str]]: ids GroupMe attached for real mentions.
+        sender [str]: id of the message's sender.
+
+    Returns:
+        [List[str]]: the player ids, or None if too few/many were tagged.
+    """
+    if (len(parsed_mentions) > settings.NUM_PLAYERS or
+            len(parsed_mentions) < settings.NUM_PLAYERS - 1):
+        return None
+    return with_sender(parsed_mentions, user_ids, sender)
+
+
+def with_sender(parsed_mentions: Sequence[str], user_ids: Sequence[str],
+                sender: str) -> List[str]:
+    """ Tagged ids in typed order, with `@me` standing in for the sender. """
+    ids = list(user_ids)
+    for i, player in enumerate(parsed_mentions):
+        if player == "me":
+            ids.insert(i, sender)
+    return ids
 
 
 class ScoreCommand(BaseCommand):
     cmd = settings.SCORE_CMD
+    mutates = True
 
     def __init__(self, message, check=False):
         super().__init__(message)
         self.invalid = False
+        self.repeated = False
         self.players = self.get_players()
         self.scores = self.get_scores()
         self.check = check
         self.elo_delta = 0
+        self.match_id = None
+        self.source_id = message.get('id')
+        self.duplicate = False
+        # Only scores that pass every check get recorded.
+        self.mutates = (self.ok and not (self.check or self.invalid or
+                                         self.repeated) and
+                        self.rejection() is None)
 
     def get_players(self):
         if not self.ok:
             return
 
-        if (len(self.parsed.mentions) > settings.NUM_PLAYERS or
-                len(self.parsed.mentions) < settings.NUM_PLAYERS - 1):
+        ids = player_ids(self.parsed.mentions, self.mentions,
+                         self.get_sender())
+        if ids is None:
             self.invalid = True
             return
+        self.mentions = ids
+        # Each player has one rating and one `participants` row per match.
+        self.repeated = len(set(ids)) != len(ids)
 
-        ids = map(lambda x: x.split('%'),
-                  (os.environ.get('IDS', '').split(':')))
-        convert_dict = {id: name for [id, name] in ids}
-        convert_dict['me'] = convert_dict.get(self.get_sender(), '')
-        for i in range(settings.NUM_PLAYERS):
-            player = self.parsed.mentions[i]
-            if player == "me":
-                self.mentions.insert(i, self.get_sender())
-
-        players = [convert_dict.get(id, None) for id in self.mentions]
+        players = [directory.name_for(id, None) for id in self.mentions]
 
         if None in players or len(players) != settings.NUM_PLAYERS:
             self.invalid = True
@@ -48,53 +82,28 @@ class ScoreCommand(BaseCommand):
             return
         return list(map(int, self.parsed.args))
 
+    def rejection(self) -> Optional[str]:
+        """ Why the group's rules disallow the score, or None if allowed. """
+        rules = tenancy.current()
+        score_1, score_2 = self.scores
+        if max(score_1, score_2) < rules.min_score_to_win:
+            return (f"Games to less than {rules.min_score_to_win} "
+                    "are for the weak. Disregarded.")
+        elif abs(score_1 - score_2) < rules.win_by:
+            return f"It's win by {rules.win_by}, numbnut."
+        return None
+
     def calculate_elo(self, stats: List):
         """
         Calculates updated elo ratings for the players involved in the match.
         """
-        score_a, score_b = self.scores
-        elo_1, elo_2, elo_3, elo_4 = list(map(lambda x: x.elo, stats))
-        games_1, games_2, games_3, games_4 = \
-            list(map(lambda x: x.games, stats))
-
-        # Teams are considered as single players, averaging their Elo.
-        team_a_avg = 0.5 * (elo_1 + elo_2)
-        team_b_avg = 0.5 * (elo_3 + elo_4)
-        expected_a = 1 / (1 + 10 ** ((team_b_avg - team_a_avg) / 400))
-
-        # Win probability is the # points a team scorse divided by the total.
-        score_diff = abs(score_a - score_b)
-        mult = 1
-        lose_a = score_a < score_b
-
-        # K-factor multiplier to account for larger margins.
-        # 7-3, 7-4, 7-5
-        if 2 <= score_diff <= 4 and (max(score_a, score_b) >
-                                     settings.MIN_SCORE_TO_WIN):
-            mult = 1.25
-            score_a = score_a if not lose_a else 5
-            score_b = score_b if lose_a else 5
-        # 7-1, 7-2
-        elif 5 <= score_diff <= 6:
-            mult = 1.75
-            score_a = score_a if not lose_a else 2
-            score_b = score_b if lose_a else 2
-        # 7-0
-        elif score_diff == 7:
-            mult = 2
-
-        score_p_a = score_a / (score_a + score_b)
-
-        games_12 = 0.5 * (games_1 + games_2)
-        games_34 = 0.5 * (games_3 + games_4)
-        game_mult = 1 / (1 + np.exp(-max(1, min(games_12, games_34)) /
-                                    max(1, max(games_12, games_34))))
-        game_mult = 1 if games_12 >= 20 and games_34 >= 20 else game_mult
-
-        elo_delta = game_mult * mult * settings.K * (score_p_a - expected_a)
-        self.elo_delta = elo_delta
-        return (elo_1 + elo_delta, elo_2 + elo_delta,
-                elo_3 - elo_delta, elo_4 - elo_delta)
+        elos = [stat.elo for stat in stats]
+        games = [stat.games for stat in stats]
+        self.elo_delta = elo.elo_delta(elos, games, *self.scores,
+                                       k=tenancy.current().k)
+        elo_1, elo_2, elo_3, elo_4 = elos
+        return (elo_1 + self.elo_delta, elo_2 + self.elo_delta,
+                elo_3 - self.elo_delta, elo_4 - self.elo_delta)
 
     def generate_message(self):
         if not self.ok:
@@ -105,16 +114,20 @@ class ScoreCommand(BaseCommand):
             return ("Error processing. Likely someone isn't added, or"
                     " format isn't correct. Try `/help` if you're uncertain.")
 
+        if self.repeated:
+            return "Tag each player once."
+
         if self.check:
             return "Waiting for approval."
 
-        score_1, score_2 = self.scores
-        if max(score_1, score_2) < settings.MIN_SCORE_TO_WIN:
-            return (f"Games to less than {settings.MIN_SCORE_TO_WIN} "
-                    "are for the weak. Disregarded.")
-        elif abs(score_1 - score_2) < settings.WIN_BY:
-            return f"It's win by {settings.WIN_BY}, numbnut."
+        if self.duplicate:
+            return "That match was already recorded."
+
+        rejection = self.rejection()
+        if rejection is not None:
+            return rejection
 
+        score_1, score_2 = self.scores
         player_1, player_2, player_3, player_4 = self.players
         negative = self.elo_delta < 0
         self.elo_delta = abs(self.elo_delta)
@@ -127,8 +140,7 @@ class ScoreCommand(BaseCommand):
         lose_1 = f"L: {d_1}  "
         win_2 = f"W: {d_2}  "
         lose_2 = f"L: {d_2}  "
-        match_id = Score.query.order_by(Score.id.desc()).first()
-        msg: str = (f"Match {match_id.id} recorded, "
+        msg: str = (f"Match {self.match_id} recorded, "
                     f"score of {score_1} - {score_2}.\n"
                     "-------------------------\n"
                     f"{win_1 if score_1 > score_2 else lose_1}"
@@ -143,29 +155,76 @@ class ScoreCommand(BaseCommand):
         return msg
 
     def generate_data(self, db):
-        if (not self.ok) or self.check or self.invalid:
+        if not self.mutates:
+            return None
+
+        # One round trip for the redelivery and backdating checks, and the
+        # checkpoint cadence.
+        recorded = db.session.query(Score.id)\
+            .filter(Score.source_id == self.source_id).limit(1).as_scalar()
+        newest, adjusted, recorded, since_checkpoint = db.session.query(
+            func.max(Score.timestamp), adjustments.newest(db), recorded,
+            replay.since_checkpoint(db)).one()
+        if self.source_id is not None and recorded is not None:
+            self.duplicate = True
             return None
 
+        # Also backdated if a botch was made after it was played.
+        if max(newest or -1, adjusted or -1) > self.timestamp:
+            self.wrote = True
+            return self.record_backdated(db)
+
+        self.wrote = True
         # Read in current stats, calculate elo, update current rankings.
-        stats = [Stats.query.filter(Stats.name == player).first()
-                 for player in self.players]
+        by_name = {stat.name: stat for stat in
+                   Stats.query.filter(Stats.name.in_(self.players))}
+        stats = [by_name[player] for player in self.players]
+        before = [stat.elo for stat in stats]
         updated_elos = self.calculate_elo(stats)
+        pairs.record(db, self.players, *self.scores, self.elo_delta)
 
         # Not recording personal stats like this for now.
         new_scores = Score(*self.players, *self.scores,
-                           self.timestamp, *updated_elos)
+                           self.timestamp, *updated_elos, self.source_id)
 
         # Update player stats.
         score_1, score_2 = self.scores
         win_losses = [1, 1, 0, 0] if score_1 > score_2 else [0, 0, 1, 1]
-        for player, elo, win_loss in zip(stats, updated_elos, win_losses):
-            player.games = Stats.games + 1
-            if win_loss == 1:
-                player.wins = Stats.wins + 1
-            else:
-                player.losses = Stats.losses + 1
-            player.elo = elo
+        # Rows read under `writer.lock` are current, and plain values let
+        # winners and losers each go in one executemany.
+        for player, new_elo, win_loss in zip(stats, updated_elos, win_losses):
+            player.games += 1
+            player.wins += win_loss
+            player.losses += 1 - win_loss
+            player.elo = new_elo
+
+        # Flushing assigns the match id without another round trip.
+        db.session.add(new_scores)
+        db.session.flush()
+        self.match_id = new_scores.id
+        participants.record(db, new_scores.id, self.timestamp,
+                            [stat.player_id for stat in stats],
+                            before, updated_elos, self.elo_delta)
+        ratings.record(db, (self.timestamp, self.players, *self.scores),
+                       newest)
+        if since_checkpoint + 1 >= settings.CHECKPOINT_INTERVAL:
+            replay.checkpoint_current(db, (self.timestamp, new_scores.id))
+
+        return new_scores
 
+    def record_backdated(self, db):
+        """
+        Records a match played before the latest recorded one (e.g. approved
+        late through `/check`) and re-rates everything after it.
+        """
+        new_scores = Score(*self.players, *self.scores, self.timestamp,
+                           1000, 1000, 1000, 1000, self.source_id)
+        db.session.add(new_scores)
+        db.session.flush()
+        self.match_id = new_scores.id
+
+        position = (self.timestamp, new_scores.id)
+        self.elo_delta = replay.replay_from(db, position)[new_scores.id]
         return new_scores
 
 
@@ -1,3 +1,4 @@
+from commands import cache
 from commands.command import BaseCommand
 from commands.models import Stats
 
@@ -14,6 +15,11 @@ class ScoreboardCommand(BaseCommand):
         if len(self.mentions) == 0:
             return "Must tag 1 other person."
 
+        return cache.cached(('sb', sender, *self.mentions),
+                            self.render_scoreboard)
+
+    def render_scoreboard(self):
+        sender: str = self.get_sender()
         final_string = ''
         for mention in self.mentions + [sender]:
             name = self.translate(mention)
@@ -9,3 +9,17 @@ LEADERBOARD_GAMES = 3
 ERR = "Error: command must be of the form\n/[command] @[mentions], [args]\n"
 URL = "https://api.heroku.com/apps/snappa-groupme-leaderboard/config-vars"
 SCORE_CMD = "score"
+RESPONSE_CACHE_SIZE = 128
+CHECKPOINT_INTERVAL = 100
+# Only the most recent checkpoints are kept; older changes replay in full.
+CHECKPOINTS_KEPT = 10
+HISTORY_LENGTH = 20
+# Elo taken by `/botch` and given back by `/unbotch`.
+BOTCH_ELO = 10
+# Postgres advisory lock held by whichever transaction is applying matches.
+WRITER_LOCK = 7277
+# Glicko-2 rates all matches of a rating period together.
+RATING_PERIOD = 7 * 24 * 60 * 60
+GLICKO_TAU = 0.5
+# Most players `/balance` splits into games; every split is scored.
+BALANCE_MAX = 12
@@ -0,0 +1,192 @@
+"""
+Columnar copy of the match history kept in each worker for analytics: one
+NumPy row per match with players as integer columns and float32 ratings,
+about 56 bytes a match, so a million matches fit in under 60 MB. It is
+loaded from `participants` on first use and appends the matches recorded
+since whenever the data version moves on. Replays record where they start
+in `rewinds`, and every worker's store rewinds to the earliest of those it
+has not seen, so only the matches they re-rate are read again.
+"""
+import numpy as np
+
+from commands import cache, tenancy
+from commands.models import Participant, Rewind
+from sqlalchemy import Float, cast, select
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Matches pulled from the database per round trip.
+CHUNK_SIZE = 10000
+
+MATCH = np.dtype([('id', np.int32), ('timestamp', np.int32),
+                  # Players 1 and 2, then 3 and 4, as `Matches.columns`.
+                  ('players', np.int32, 4),
+                  ('before', np.float32, 4), ('after', np.float32, 4)])
+
+
+class Timeline(NamedTuple):
+    """ A player's most recent ratings, oldest first, and all-time range. """
+    timestamps: List[int]
+    ratings: List[float]
+    # Rating before the first match shown.
+    start: float
+    games: int
+    peak: float
+    low: float
+
+
+class Matches(object):
+    """ Every match of one group in replay order, grown in place. """
+
+    def __init__(self):
+        self.rows = np.empty(0, MATCH)
+        self.size = 0
+        # GroupMe user id -> number stored in `players`.
+        self.columns: Dict[str, int] = {}
+        # (timestamp, record id) of the newest match held.
+        self.position: Tuple[int, int] = (-1, 0)
+        # Id of the newest `rewinds` row applied.
+        self.rewound = 0
+        self.version: Optional[int] = None
+
+    def view(self) -> np.ndarray:
+        return self.rows[:self.size]
+
+    def column(self, player_id: str) -> int:
+        return self.columns.setdefault(player_id, len(self.columns))
+
+    def append(self, rows: List[tuple]) -> None:
+        """
+        Adds matches from `participants` rows, four per match in team order.
+
+        Args:
+            rows [List[tuple]]: (match id, timestamp, player id, rating
+                before, rating after) tuples.
+        """
+        if len(rows) == 0:
+            return
+        match_ids, timestamps, player_ids, before, after = zip(*rows)
+        block = np.empty(len(rows) // 4, MATCH)
+        block['id'] = match_ids[::4]
+        block['timestamp'] = timestamps[::4]
+        known, inverse = np.unique(player_ids, return_inverse=True)
+        columns = np.array([self.column(player_id) for player_id in known])
+        block['players'] = np.reshape(columns[inverse], (-1, 4))
+        block['before'] = np.reshape(before, (-1, 4))
+        block['after'] = np.reshape(after, (-1, 4))
+
+        size = self.size + len(block)
+        if size > len(self.rows):
+            # Doubling keeps appending one match at a time amortized O(1).
+            rows = np.empty(max(size, 2 * len(self.rows)), MATCH)
+            rows[:self.size] = self.view()
+            self.rows = rows
+        self.rows[self.size:size] = block
+        self.size = size
+        self.position = (int(block['timestamp'][-1]), int(block['id'][-1]))
+
+    def rewind(self, position: Tuple[int, int]) -> None:
+        """ Forgets the matches after `position`. """
+        if self.position <= position:
+            return
+        timestamp, id = position
+        played = self.view()
+        # Rows are in replay order, so the ones kept are a prefix.
+        self.size = int(np.count_nonzero(
+            (played['timestamp'] < timestamp) |
+            ((played['timestamp'] == timestamp) & (played['id'] <= id))))
+        self.position = (int(played['timestamp'][self.size - 1]),
+                         int(played['id'][self.size - 1]))\
+            if self.size else (-1, 0)
+
+    def catch_up(self) -> None:
+        """
+        Rewinds past the matches replays have re-rated since the last call,
+        then appends every match after the newest one held.
+        """
+        # Rewinds are read first: a replay committed in between is then
+        # read again next time rather than missed.
+        rewinds = Rewind.query.filter(Rewind.id > self.rewound)\
+            .with_entities(Rewind.id, Rewind.timestamp, Rewind.match_id)\
+            .all()
+        if rewinds:
+            self.rewound = max(id for (id, _, _) in rewinds)
+            self.rewind(min((timestamp, match_id)
+                            for (_, timestamp, match_id) in rewinds))
+
+        timestamp, id = self.position
+        columns = Participant.__table__.c
+        query = select([columns.match_id, columns.timestamp,
+                        columns.player_id,
+                        # Floats skip the per-value Numeric conversion.
+                        cast(columns.rating_before, Float),
+                        cast(columns.rating_after, Float)])\
+            .where((columns.timestamp > timestamp) |
+                   ((columns.timestamp == timestamp) &
+                    (columns.match_id > id)))\
+            .order_by(columns.timestamp, columns.match_id, columns.team,
+                      columns.player_id)
+        rows = Participant.query.session.connection().execute(query)
+        # Chunks are whole matches, since each one has exactly four rows.
+        for chunk in iter(lambda: rows.fetchmany(4 * CHUNK_SIZE), []):
+            self.append(chunk)
+
+
+# Stores per group, kept up to date through the data version and the
+# rewinds replays record.
+_stores: Dict[Optional[str], Matches] = {}
+
+
+def matches() -> Matches:
+    """ The current group's store, caught up to the current data version. """
+    group = tenancy.key()
+    store = _stores.get(group)
+    if store is None:
+        store = _stores[group] = Matches()
+    if store.version != cache.version():
+        store.catch_up()
+        store.version = cache.version()
+    return store
+
+
+def rewind(db, position: Tuple[int, int]) -> None:
+    """
+    Records that a replay is re-rating the current group's matches after
+    `position`; every worker's store reads them again once the replay
+    commits. Call it inside the replay's transaction.
+
+    Args:
+        db [SQLAlchemy]: database handle.
+        position [Tuple[int, int]]: (timestamp, record id) to keep up to.
+    """
+    db.session.add(Rewind(*position))
+
+
+def timeline(player_id: str, limit: int) -> Optional[Timeline]:
+    """
+    A player's last `limit` ratings, with the peak and low over every match
+    they played, from one vectorized pass over the store.
+
+    Args:
+        player_id [str]: GroupMe id of the player.
+        limit [int]: number of recent matches to return.
+
+    Returns:
+        [Timeline]: the timeline, or None if the player has no matches.
+    """
+    store = matches()
+    column = store.columns.get(player_id)
+    if column is None:
+        return None
+
+    played = store.view()
+    # Row-major order, so matches stay oldest first.
+    rows, slots = np.nonzero(played['players'] == column)
+    if len(rows) == 0:
+        return None
+    before = played['before'][rows, slots]
+    after = played['after'][rows, slots]
+    shown = slice(max(len(rows) - limit, 0), None)
+    return Timeline(played['timestamp'][rows[shown]].tolist(),
+                    after[shown].tolist(), float(before[shown][0]),
+                    len(rows), float(max(before.max(), after.max())),
+                    float(min(before.min(), after.min())))
@@ -1,11 +1,15 @@
 from commands.command import BaseCommand
 from commands.models import Score
+from commands.replay import replay_from
 
 
 class StrikeCommand(BaseCommand):
+    mutates = True
+
     def __init__(self, message, admin=True):
         super().__init__(message)
         self.admin = admin
+        self.mutates = admin
         self.note = "That match doesn't exist in the database."
 
     def generate_data(self, db):
@@ -24,7 +28,11 @@ class StrikeCommand(BaseCommand):
                          f"{match.player_3} and {match.player_4}, "
                          f"{match.score_12} - {match.score_34}")
             db.session.delete(match)
-            db.session.commit()
+            self.wrote = True
+            db.session.flush()
+
+            # Re-rate every match played after the struck one.
+            replay_from(db, (match.timestamp, match.id))
         return None
 
     def generate_message(self):
@@ -0,0 +1,109 @@
+"""
+Team odds and balancing from current Elo ratings, with the team-average
+expected score `elo.elo_delta` rates matches by.
+"""
+import numpy as np
+
+from commands import cache, elo, settings
+from commands.models import Stats
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+
+class Snapshot(NamedTuple):
+    """ Every player's current Elo and games played, by name. """
+    elos: Dict[str, float]
+    games: Dict[str, int]
+
+
+def snapshot() -> Snapshot:
+    """ Ratings as of the current data version, read once per version. """
+    def load():
+        rows = Stats.query.with_entities(Stats.name, Stats.elo, Stats.games)
+        elos, games = {}, {}
+        for (name, rating, played) in rows:
+            elos[name] = float(rating)
+            games[name] = played
+        return Snapshot(elos, games)
+    return cache.cached(('ratings',), load)
+
+
+@lru_cache(maxsize=None)
+def pairings(n: int) -> np.ndarray:
+    """
+    Every way to split `n` (even) items into unordered pairs.
+
+    Returns:
+        [np.ndarray]: (n - 1)!! x n/2 x 2 item indexes.
+    """
+    def split(items: Tuple[int, ...]) -> List[List[Tuple[int, int]]]:
+        if len(items) == 0:
+            return [[]]
+        first, rest = items[0], items[1:]
+        return [[(first, other)] + pairs
+                for i, other in enumerate(rest)
+                for pairs in split(rest[:i] + rest[i + 1:])]
+    return np.array(split(tuple(range(n)))).reshape(-1, n // 2, 2)
+
+
+@lru_cache(maxsize=None)
+def lineups(n: int) -> np.ndarray:
+    """
+    Every way to pick as many of `n` items as fill whole games and split
+    them into unordered pairs; the rest sit out.
+
+    Returns:
+        [np.ndarray]: C(n, playing) * (playing - 1)!! x playing/2 x 2 item
+            indexes, where playing is the largest multiple of
+            `settings.NUM_PLAYERS` up to `n`.
+    """
+    playing = n - n % settings.NUM_PLAYERS
+    chosen = np.array(list(combinations(range(n), playing)))
+    return chosen[:, pairings(playing)].reshape(-1, playing // 2, 2)
+
+
+class Game(NamedTuple):
+    team_a: Tuple[str, str]
+    team_b: Tuple[str, str]
+    # Chance that `team_a` wins.
+    odds: float
+
+
+def balance(names: Sequence[str], elos: Sequence[float]) -> List[Game]:
+    """
+    Fairest way to split the players into 2 v. 2 games: the worst game's
+    odds closest to even, then the smallest rating gaps overall. Players
+    left over sit out, and who does is part of the search. Every split is
+    scored at once, which stays instant up to `settings.BALANCE_MAX`
+    players.
+
+    Args:
+        names [Sequence[str]]: the players, at least four of them.
+        elos [Sequence[float]]: their ratings.
+
+    Returns:
+        [List[Game]]: the games.
+    """
+    ratings = np.asarray(elos, dtype=np.float64)
+    teams = lineups(len(names))
+    games = pairings(teams.shape[1])
+    # (splits into teams, teams) average ratings.
+    team_elos = ratings[teams].mean(axis=2)
+    # (splits into teams, pairings of teams, games) rating gaps; odds are
+    # closer to even the smaller the gap.
+    gaps = np.abs(team_elos[:, games[:, :, 0]] - team_elos[:, games[:, :, 1]])
+    worst = gaps.max(axis=2).ravel()
+    fairest = np.flatnonzero(worst == worst.min())
+    best = fairest[np.argmin(gaps.sum(axis=2).ravel()[fairest])]
+    split, pairing = divmod(best, len(games))
+    odds = elo.expected_score(team_elos[split, games[pairing, :, 0]],
+                              team_elos[split, games[pairing, :, 1]])
+
+    result = []
+    for (a, b), chance in zip(games[pairing], odds):
+        team_a, team_b = teams[split][a], teams[split][b]
+        result.append(Game((names[team_a[0]], names[team_a[1]]),
+                           (names[team_b[0]], names[team_b[1]]),
+                           float(chance)))
+    return result
@@ -0,0 +1,161 @@
+"""
+Serving several GroupMe groups from one deployment. Each group has a row in
+`groups` and its own copy of every other table in a separate schema (an
+attached database file on SQLite), so a group's queries only ever touch
+tables holding its own matches. The webhook activates the group a message
+came from; everything else reads it through `current()`.
+
+The group configured through GROUPME_GROUP_ID, BOT_ID and ADMIN keeps the
+default schema, so a single-group deployment needs no setup at all.
+"""
+import os
+import re
+import threading
+import time
+import database
+
+from commands import settings
+from commands.models import Group
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy.exc import DBAPIError
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+# Seconds before an unknown group id triggers another read of `groups`.
+RELOAD_INTERVAL = 60
+SCHEMA_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+class Tenant(NamedTuple):
+    """ Everything that differs between the groups being served. """
+    id: Optional[str]
+    bot_id: Optional[str]
+    admins: List[str]
+    # Schema holding the group's tables; None for the default schema.
+    schema: Optional[str] = None
+    k: float = settings.K
+    win_by: int = settings.WIN_BY
+    min_score_to_win: int = settings.MIN_SCORE_TO_WIN
+
+
+def default() -> Tenant:
+    """ The group configured through the environment. """
+    return Tenant(os.getenv('GROUPME_GROUP_ID'), os.getenv('BOT_ID'),
+                  os.getenv('ADMIN', '').split(':'))
+
+
+def schema_for(group_id: str) -> str:
+    schema = f"group_{group_id}"
+    if SCHEMA_NAME.fullmatch(schema) is None:
+        raise ValueError(f"Unusable GroupMe group id: {group_id!r}")
+    return schema
+
+
+def from_row(group: Group) -> Tenant:
+    fallback = Tenant(None, None, [])
+    return Tenant(group.id, group.bot_id,
+                  (group.admins or '').split(':'), group.schema,
+                  fallback.k if group.k is None else group.k,
+                  fallback.win_by if group.win_by is None else group.win_by,
+                  fallback.min_score_to_win if group.min_score_to_win is None
+                  else group.min_score_to_win)
+
+
+_current: ContextVar[Optional[Tenant]] = ContextVar('tenant', default=None)
+_groups: Dict[str, Tenant] = {}
+_loaded_at: Optional[float] = None
+_lock = threading.Lock()
+
+
+def current() -> Tenant:
+    """ The group being served, or the environment's group. """
+    tenant = _current.get()
+    return default() if tenant is None else tenant
+
+
+def key() -> Optional[str]:
+    """ Identifies the current group in per-group in-process caches. """
+    return current().schema
+
+
+@contextmanager
+def activate(tenant: Tenant) -> Iterator[Tenant]:
+    """
+    Serves `tenant` until the block exits. Sessions begun inside the block
+    use the tenant's schema, so start it before touching the database.
+    """
+    tenant_token = _current.set(tenant)
+    schema_token = database.schema.set(tenant.schema)
+    try:
+        yield tenant
+    finally:
+        database.schema.reset(schema_token)
+        _current.reset(tenant_token)
+
+
+def _load(db) -> None:
+    global _groups, _loaded_at
+    # Read outside the session, whose transaction is bound to one group.
+    try:
+        with db.engine.connect() as connection:
+            rows = connection.execute(Group.__table__.select()).fetchall()
+    except DBAPIError:
+        # `groups` does not exist until the migrations have run.
+        rows = []
+    groups = {row.id: from_row(row) for row in rows}
+    if db.engine.dialect.name == 'sqlite' and\
+            set(groups) - set(_groups):
+        # Pooled connections attached the group databases that existed.
+        db.engine.dispose()
+    _groups = groups
+    _loaded_at = time.monotonic()
+
+
+def registered(db, reload: bool = False) -> Dict[str, Tenant]:
+    """ Groups with their own schema, by GroupMe group id. """
+    with _lock:
+        if reload or _loaded_at is None:
+            _load(db)
+        return _groups
+
+
+def lookup(db, group_id: Optional[str]) -> Optional[Tenant]:
+    """
+    The tenant a webhook from `group_id` is served as.
+
+    Args:
+        db [SQLAlchemy]: database handle.
+        group_id [str]: the message's GroupMe group id.
+
+    Returns:
+        [Tenant]: the group's tenant, or None if it is not served here.
+    """
+    fallback = default()
+    if group_id is None or group_id == fallback.id:
+        return fallback
+
+    groups = registered(db)
+    if group_id not in groups and\
+            time.monotonic() - _loaded_at > RELOAD_INTERVAL:
+        groups = registered(db, reload=True)
+    if group_id in groups:
+        return groups[group_id]
+
+    # Without GROUPME_GROUP_ID, a lone group is served whatever its id.
+    return fallback if fallback.id is None and not groups else None
+
+
+def everyone(db) -> List[Tenant]:
+    """ The environment's group followed by every registered group. """
+    return [default()] + list(registered(db, reload=True).values())
+
+
+def engine(db):
+    """ The engine, resolving unqualified tables in the current schema. """
+    return database.bind_for(db.engine, current().schema)
+
+
+def tables(db) -> List:
+    """ Tables that belong in the current schema. """
+    return [table for table in db.metadata.sorted_tables
+            if current().schema is None or not table.info.get('shared')]
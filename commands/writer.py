@@ -0,0 +1,31 @@
+import zlib
+
+from commands import settings, tenancy
+from sqlalchemy import text
+
+# Rating updates read the current `stats` rows and write new ones, so two
+# workers recording matches at once would rate against stale values. Every
+# transaction that changes match data takes this lock first; read-only
+# commands never touch it. Groups never share rows, so each has its own.
+
+
+def lock(db) -> None:
+    """
+    Blocks until the current transaction is the only writer. The lock is
+    held until the session commits or rolls back, and taking it again in
+    the same transaction is a no-op.
+
+    Args:
+        db [SQLAlchemy]: database handle.
+    """
+    connection = db.session.connection()
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        group = zlib.crc32((tenancy.key() or '').encode()) - 2 ** 31
+        connection.execute(
+            text("SELECT pg_advisory_xact_lock(:key, :group)"),
+            {'key': settings.WRITER_LOCK, 'group': group})
+    elif dialect == 'sqlite':
+        # SQLite allows one writer per file; claim it before reading.
+        if not connection.connection.in_transaction:
+            connection.execute(text("BEGIN IMMEDIATE"))
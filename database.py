@@ -1,4 +1,69 @@
-from flask_sqlalchemy import SQLAlchemy
+import os
+import sqlite3
 
+from contextvars import ContextVar
+from flask_sqlalchemy import SignallingSession, SQLAlchemy
+from sqlalchemy import event, orm
+from sqlalchemy.engine import Engine
+from typing import Dict, Optional, Tuple
 
-db = SQLAlchemy()
+# Schema of the group being served, or None for the default schema. Set
+# through `commands.tenancy.activate`.
+schema: ContextVar[Optional[str]] = ContextVar('schema', default=None)
+
+_engines: Dict[Tuple[int, str], object] = {}
+
+
+def bind_for(engine, group_schema: Optional[str]):
+    """ `engine` with unqualified tables resolved in `group_schema`. """
+    if group_schema is None:
+        return engine
+    key = (id(engine), group_schema)
+    bound = _engines.get(key)
+    if bound is None:
+        bound = _engines[key] = engine.execution_options(
+            schema_translate_map={None: group_schema})
+    return bound
+
+
+def attached_path(main: str, group_schema: str) -> str:
+    """ File holding a group's tables next to the main SQLite database. """
+    if main == '':
+        return ':memory:'
+    return f"{os.path.splitext(main)[0]}.{group_schema}.db"
+
+
+@event.listens_for(Engine, 'connect')
+def attach_group_databases(dbapi_connection, connection_record):
+    """ SQLite has no schemas, so each group's tables are an attached file. """
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        schemas = [name for (name,) in
+                   cursor.execute("SELECT schema FROM groups")]
+    except sqlite3.OperationalError:
+        # No groups table yet: a single-group database.
+        schemas = []
+    attached = {name: path for (_, name, path) in
+                cursor.execute("PRAGMA database_list")}
+    for group_schema in schemas:
+        if group_schema not in attached:
+            cursor.execute(f"ATTACH DATABASE ? AS {group_schema}",
+                           (attached_path(attached['main'], group_schema),))
+    cursor.close()
+
+
+class GroupSession(SignallingSession):
+    """ Session whose transactions run against the current group's tables. """
+
+    def get_bind(self, mapper=None, clause=None):
+        return bind_for(super().get_bind(mapper, clause), schema.get())
+
+
+class GroupSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=GroupSession, db=self, **options)
+
+
+db = GroupSQLAlchemy()
@@ -0,0 +1,40 @@
+import threading
+import settings
+
+from collections import OrderedDict
+from typing import Optional
+
+
+class RecentDeliveries(object):
+    """
+    Bounded LRU of GroupMe message ids this worker has handled. GroupMe
+    redelivers callbacks it believes failed; a repeat is dropped before it
+    is parsed or reaches the database. Matches are also protected durably
+    by the unique `records.source_id`.
+    """
+
+    def __init__(self, maxsize: int = settings.DELIVERY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._ids: 'OrderedDict[str, None]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def claim(self, message_id: Optional[str]) -> bool:
+        """ Whether this is the first delivery of the message. """
+        if message_id is None:
+            return True
+        with self._lock:
+            if message_id in self._ids:
+                self._ids.move_to_end(message_id)
+                return False
+            self._ids[message_id] = None
+            if len(self._ids) > self.maxsize:
+                self._ids.popitem(last=False)
+            return True
+
+    def release(self, message_id: Optional[str]) -> None:
+        """ Forgets a delivery that failed, so a retry is handled. """
+        with self._lock:
+            self._ids.pop(message_id, None)
+
+
+recent = RecentDeliveries()
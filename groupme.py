@@ -0,0 +1,103 @@
+import requests
+import metrics
+import commands.groupme_message_type as gm
+
+from itertools import islice
+from outbox import API_URL, TIMEOUT
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# GroupMe's maximum page size for the messages endpoint.
+PAGE_SIZE = 100
+# Messages the first `/check` reads when no match is recorded yet; older
+# history is bootstrapped with `import_history.py`.
+CHECK_BACKFILL = 1000
+
+
+class MessageHistory(object):
+    """ Streams a group's messages newest first, one page at a time. """
+
+    def __init__(self, group_id: str, token: str, url: str = API_URL,
+                 page_size: int = PAGE_SIZE, session=None):
+        self.url = f"{url}/groups/{group_id}/messages"
+        self.token = token
+        self.page_size = page_size
+        self.session = session or requests.Session()
+
+    def pages(self, before_id: str) -> Iterator[List[Dict]]:
+        """ Pages of messages older than `before_id`, newest first. """
+        while True:
+            params = {'before_id': before_id, 'token': self.token,
+                      'limit': self.page_size}
+            response = metrics.timed_call(
+                'groupme', 'groups/messages',
+                lambda: self.session.get(self.url, params=params,
+                                         timeout=TIMEOUT))
+            # GroupMe answers 304 once there is nothing older.
+            if response.status_code == 304:
+                return
+            response.raise_for_status()
+            messages = response.json()['response']['messages']
+            if len(messages) == 0:
+                return
+            yield messages
+            before_id = messages[-1]['id']
+
+    def messages(self, before_id: str, stop_id: Optional[str] = None,
+                 stop_timestamp: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Messages older than `before_id`, newest first and without
+        duplicates, back to (not including) `stop_id` or the first message
+        sent at or before `stop_timestamp`.
+        """
+        seen = set()
+        for page in self.pages(before_id):
+            for message in page:
+                if stop_id is not None and is_at_or_before(message['id'],
+                                                           stop_id):
+                    return
+                if stop_timestamp is not None and\
+                        message.get('created_at', 0) <= stop_timestamp:
+                    return
+                if message['id'] in seen:
+                    continue
+                seen.add(message['id'])
+                yield message
+
+
+def is_at_or_before(message_id: str, other_id: str) -> bool:
+    """ GroupMe message ids are numeric strings that grow over time. """
+    if message_id.isdigit() and other_id.isdigit():
+        return int(message_id) <= int(other_id)
+    return message_id == other_id
+
+
+def is_approved_score(message: Dict, admin: List[str]) -> bool:
+    """ Whether a message is a `/score` an admin has favorited. """
+    text = message.get('text') or ''
+    return text.startswith(gm.RECORD_SCORE) and\
+        any(favorite in admin for favorite in message.get('favorited_by', []))
+
+
+def approved_scores(history: MessageHistory, before_id: str,
+                    admin: List[str], stop_id: Optional[str] = None,
+                    stop_timestamp: Optional[int] = None,
+                    limit: Optional[int] = None
+                    ) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Walks history back from `before_id` and collects admin-approved
+    `/score` messages, reading at most `limit` messages if given.
+
+    Returns:
+        [tuple]: the approved messages oldest first, and the id of the
+                 newest message read (None if nothing was read).
+    """
+    newest_id = None
+    scores: List[Dict] = []
+    for message in islice(history.messages(before_id, stop_id,
+                                           stop_timestamp), limit):
+        if newest_id is None:
+            newest_id = message['id']
+        if is_approved_score(message, admin):
+            scores.append(message)
+    scores.reverse()
+    return scores, newest_id
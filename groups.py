@@ -0,0 +1,76 @@
+"""
+Adds GroupMe groups to a deployment that already serves one.
+
+    python groups.py add GROUP_ID --bot-id BOT_ID --admin ID:ID [--name NAME]
+                         [--k K] [--win-by N] [--min-score N]
+    python groups.py list
+
+Each group gets its own tables (a schema on Postgres, a database file next
+to the main one on SQLite) and its own rules; the group configured through
+GROUPME_GROUP_ID keeps the default tables.
+"""
+import argparse
+
+from app import app
+from commands import tenancy
+from commands.models import Group
+from database import db
+from migrations import upgrade
+from sqlalchemy import text
+
+
+def add_group(args) -> None:
+    schema = tenancy.schema_for(args.group_id)
+    with app.app_context():
+        upgrade()
+        if Group.query.get(args.group_id) is not None:
+            raise SystemExit(f"Group {args.group_id} was already added.")
+        db.session.add(Group(args.group_id, args.name, args.bot_id,
+                             args.admin, schema, args.k, args.win_by,
+                             args.min_score))
+        if db.engine.dialect.name == 'postgresql':
+            db.session.execute(text(f"CREATE SCHEMA IF NOT EXISTS {schema}"))
+        db.session.commit()
+        db.session.remove()
+
+        tenant = tenancy.registered(db, reload=True)[args.group_id]
+        with tenancy.activate(tenant):
+            upgrade()
+        db.session.remove()
+        print(f"Added group {args.group_id} in schema {schema}.")
+
+
+def list_groups(args) -> None:
+    with app.app_context():
+        for tenant in tenancy.everyone(db):
+            print(f"{tenant.id or '(any)'}  schema={tenant.schema or '-'}  "
+                  f"bot={tenant.bot_id}  k={tenant.k}  "
+                  f"win_by={tenant.win_by}  "
+                  f"min_score={tenant.min_score_to_win}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    subparsers = parser.add_subparsers(dest='action', required=True)
+
+    add = subparsers.add_parser('add', help="serve another group")
+    add.add_argument('group_id')
+    add.add_argument('--bot-id', required=True)
+    add.add_argument('--admin', default='',
+                     help="colon separated GroupMe user ids")
+    add.add_argument('--name')
+    add.add_argument('--k', type=float, help="Elo K-factor")
+    add.add_argument('--win-by', type=int)
+    add.add_argument('--min-score', type=int,
+                     help="lowest winning score accepted")
+    add.set_defaults(run=add_group)
+
+    subparsers.add_parser('list', help="groups served").set_defaults(
+        run=list_groups)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
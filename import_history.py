@@ -0,0 +1,218 @@
+"""
+Bootstraps a group's match history from a GroupMe chat export.
+
+    python import_history.py message.json [--all] [--workers N]
+                                          [--group GROUP_ID]
+
+Accepts either GroupMe's export (`message.json`, one JSON array) or a JSON
+lines dump with one message object per line (`*.jsonl`). `/score` messages
+are parsed in a process pool, inserted into `records` batch by batch, and
+rated with a single replay at the end. Only admin-sent or admin-favorited
+scores are imported unless `--all` is given. `--group` imports into a group
+added with `groups.py`, under that group's rules.
+"""
+import argparse
+import json
+import commands.groupme_message_type as gm
+
+from commands import settings
+from commands.parse import parse_input
+from commands.score import player_ids
+from functools import partial
+from itertools import islice
+from multiprocessing import Pool
+from typing import Dict, Iterator, List, Optional, Set, TextIO, Tuple
+
+BATCH_SIZE = 5000
+READ_SIZE = 1 << 16
+
+# (timestamp, message id, player ids, scores) for one `/score` message.
+Parsed = Tuple[int, str, List[str], List[int]]
+
+
+def iter_json_array(file: TextIO) -> Iterator[Dict]:
+    """ Streams the objects of a top-level JSON array without loading it. """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    for chunk in iter(lambda: file.read(READ_SIZE), ''):
+        buffer += chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if not started and buffer[position:position + 1] == '[':
+                started = True
+                position += 1
+                continue
+            if buffer[position:position + 1] == ']':
+                return
+            try:
+                message, position = decoder.raw_decode(buffer, position)
+            except ValueError:
+                # The object continues in the next chunk.
+                break
+            yield message
+        buffer = buffer[position:]
+
+
+def iter_json_lines(file: TextIO) -> Iterator[Dict]:
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_messages(path: str) -> Iterator[Dict]:
+    with open(path, 'r', encoding='utf-8') as file:
+        reader = iter_json_lines if path.endswith('.jsonl') else\
+            iter_json_array
+        yield from reader(file)
+
+
+def is_approved(message: Dict, admin: List[str]) -> bool:
+    return message.get('sender_id') in admin or\
+        any(favorite in admin for favorite in message.get('favorited_by', []))
+
+
+def parse_message(message: Dict,
+                  min_score_to_win: int = settings.MIN_SCORE_TO_WIN,
+                  win_by: int = settings.WIN_BY) -> Optional[Parsed]:
+    """ Parses a `/score` message the way `ScoreCommand` would. """
+    ok, parsed = parse_input(message.get('text') or '')
+    if not ok:
+        return None
+
+    attachments = message.get('attachments') or [{}]
+    ids = player_ids(parsed.mentions, attachments[0].get('user_ids', []),
+                     message.get('sender_id'))
+    try:
+        scores = list(map(int, parsed.args))
+    except ValueError:
+        return None
+
+    if ids is None or len(ids) != settings.NUM_PLAYERS or len(scores) != 2:
+        return None
+    if max(scores) < min_score_to_win or\
+            abs(scores[0] - scores[1]) < win_by:
+        return None
+    return (message['created_at'], message['id'], ids, scores)
+
+
+def score_messages(path: str, admin: List[str],
+                   approved_only: bool) -> Iterator[Dict]:
+    for message in iter_messages(path):
+        text = message.get('text') or ''
+        if not text.startswith(gm.RECORD_SCORE):
+            continue
+        if approved_only and not is_approved(message, admin):
+            continue
+        yield message
+
+
+def import_history(path: str, admin: Optional[List[str]] = None,
+                   approved_only: bool = True, workers: Optional[int] = None,
+                   batch_size: int = BATCH_SIZE,
+                   group: Optional[str] = None) -> None:
+    from app import app
+    from commands import tenancy
+    from database import db
+
+    with app.app_context():
+        tenant = tenancy.lookup(db, group)
+        if tenant is None:
+            raise SystemExit(f"Group {group} has not been added; "
+                             "see `python groups.py add`.")
+        with tenancy.activate(tenant):
+            import_group(path, admin or tenant.admins, approved_only,
+                         workers, batch_size)
+
+
+def recorded(db, source_ids: List[str]) -> Set[str]:
+    """ Which of the message ids are already recorded as matches. """
+    from commands.models import Score
+
+    found: Set[str] = set()
+    # Older SQLite builds allow 999 parameters per statement.
+    for start in range(0, len(source_ids), 900):
+        chunk = source_ids[start:start + 900]
+        found.update(source_id for (source_id,) in
+                     db.session.query(Score.source_id)
+                     .filter(Score.source_id.in_(chunk)))
+    return found
+
+
+def import_group(path: str, admin: List[str], approved_only: bool,
+                 workers: Optional[int], batch_size: int) -> None:
+    """ Imports into the active group; see `import_history`. """
+    from commands import cache, directory, tenancy
+    from commands.models import Score, Stats
+    from commands.replay import load_prerankings, replay
+    from database import db
+
+    rules = tenancy.current()
+    parse = partial(parse_message, min_score_to_win=rules.min_score_to_win,
+                    win_by=rules.win_by)
+    known = set(name for (name,) in db.session.query(Stats.name))
+    messages = score_messages(path, admin, approved_only)
+    inserted = skipped = 0
+    with Pool(workers) as pool:
+        while True:
+            batch = list(islice(messages, batch_size))
+            if len(batch) == 0:
+                break
+            results = sorted(filter(None, pool.map(parse, batch,
+                                                   chunksize=256)))
+            # Messages imported by an earlier run are skipped.
+            imported = recorded(db, [result[1] for result in results])
+            rows = []
+            for result in results:
+                timestamp, source_id, ids, (score_12, score_34) = result
+                if source_id in imported:
+                    continue
+                names = [directory.name_for(id, None) for id in ids]
+                if None in names or len(set(ids)) != len(ids):
+                    continue
+                for id, name in zip(ids, names):
+                    if name not in known:
+                        db.session.add(Stats(id, name))
+                        known.add(name)
+                rows.append({'player_1': names[0], 'player_2': names[1],
+                             'player_3': names[2], 'player_4': names[3],
+                             'score_12': score_12, 'score_34': score_34,
+                             'timestamp': timestamp,
+                             'source_id': source_id})
+                imported.add(source_id)
+            db.session.bulk_insert_mappings(Score, rows)
+            db.session.commit()
+            inserted += len(rows)
+            skipped += len(batch) - len(rows)
+            print(f"Inserted {inserted} matches ({skipped} skipped).")
+
+    # Replays order by timestamp, so batches need not be globally sorted.
+    replay(db, load_prerankings())
+    cache.bump(db)
+    db.session.commit()
+    print(f"Rated {inserted} matches.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('path', help="message.json export or .jsonl dump")
+    parser.add_argument('--all', action='store_true',
+                        help="import scores without admin approval")
+    parser.add_argument('--admin',
+                        help="colon separated admin ids (default: the "
+                             "group's admins, $ADMIN without --group)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--group', help="GroupMe group id to import into "
+                                        "(default: $GROUPME_GROUP_ID)")
+    args = parser.parse_args()
+
+    admin = args.admin.split(':') if args.admin else None
+    import_history(args.path, admin, not args.all, args.workers,
+                   args.batch_size, args.group)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import csv
+import os
+from app import app
+from commands import cache
+from commands.models import Player
+from database import db
+
+FILE = "./resources/groupme_ids_to_names.csv"
+
+
+def read_ids_var():
+    """ Parses the legacy `IDS` config var of `id%name` pairs. """
+    raw_string = os.environ.get('IDS', '')
+    pairs = [pair.split('%') for pair in raw_string.split(':') if pair]
+    return [(id, name) for [id, name] in pairs]
+
+
+def read_ids_file():
+    if not os.path.exists(FILE):
+        return []
+    with open(FILE, 'r') as groupme_ids:
+        return [(id, name) for [id, name] in csv.reader(groupme_ids)]
+
+
+def import_players():
+    """
+    One-time import of the `IDS` config var and the ids-to-names CSV into
+    the `players` table. Existing players are left untouched.
+    """
+    with app.app_context():
+        db.create_all()
+        players = db.session.query(Player.id, Player.name).all()
+        known_ids = set(id for (id, _) in players)
+        known_names = set(name for (_, name) in players)
+        added = 0
+        for id, name in read_ids_file() + read_ids_var():
+            if id in known_ids or name in known_names:
+                continue
+            db.session.add(Player(id, name))
+            known_ids.add(id)
+            known_names.add(name)
+            added += 1
+        cache.bump(db)
+        db.session.commit()
+        print(f"Imported {added} players.")
+
+
+if __name__ == "__main__":
+    import_players()
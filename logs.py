@@ -0,0 +1,92 @@
+"""
+Structured logging for the bot. Records are handed to a queue and written
+to stdout by a background thread, so webhooks never block on the log
+drain. Each category has its own level, and ordinary chat traffic (messages
+that are not commands) is sampled.
+
+Levels can be overridden per deploy, e.g.
+
+    heroku config:set LOG_LEVELS="traffic=DEBUG,command=WARNING"
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import settings
+
+from typing import Dict, Optional
+
+ROOT = 'leaderboard'
+
+# Incoming chat messages that are not commands.
+traffic = logging.getLogger(f"{ROOT}.traffic")
+# Commands received and the replies they produce.
+command = logging.getLogger(f"{ROOT}.command")
+# Outbound GroupMe posts.
+outbox = logging.getLogger(f"{ROOT}.outbox")
+# Messages the grammars rejected.
+parse = logging.getLogger(f"{ROOT}.parse")
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """ One JSON object per line, with any `extra={'fields': ...}`. """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {'time': time.strftime('%Y-%m-%dT%H:%M:%S',
+                                       time.gmtime(record.created)),
+                 'level': record.levelname,
+                 'category': record.name[len(ROOT) + 1:],
+                 'message': record.getMessage()}
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SampleFilter(logging.Filter):
+    """ Passes a random `rate` share of records. """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return self.rate >= 1 or random.random() < self.rate
+
+
+def levels() -> Dict[str, str]:
+    """ Category -> level name, from settings overridden by $LOG_LEVELS. """
+    configured = dict(settings.LOG_LEVELS)
+    for pair in os.getenv('LOG_LEVELS', '').split(','):
+        if '=' in pair:
+            category, level = pair.split('=', 1)
+            configured[category.strip()] = level.strip().upper()
+    return configured
+
+
+def setup() -> None:
+    """ Routes every category through the queue; safe to call twice. """
+    global _listener
+    if _listener is not None:
+        return
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter())
+    log_queue: queue.Queue = queue.Queue(-1)
+    _listener = logging.handlers.QueueListener(log_queue, handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger(ROOT)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.propagate = False
+    for category, level in levels().items():
+        logging.getLogger(f"{ROOT}.{category}").setLevel(level)
+    traffic.addFilter(SampleFilter(settings.LOG_TRAFFIC_SAMPLE))
@@ -0,0 +1,148 @@
+"""
+In-process latency and query metrics, served at `/metrics` in the
+Prometheus text format. Values are kept per worker process.
+"""
+import threading
+import time
+
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+PREFIX = 'leaderboard'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERIES = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+COMMITS = (0, 1, 2, 5, 10)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"')\
+        .replace('\n', r'\n')
+
+
+class Histogram(object):
+    """ Cumulative-bucket histogram keyed by label values. """
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = SECONDS):
+        self.name = f"{PREFIX}_{name}"
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts, sum, count]
+        self.series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] =\
+                    [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *label_values: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}",
+                 f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted(self.series.items())
+            for label_values, (counts, total, count) in series:
+                labels = [f'{label}="{_escape(value)}"' for label, value
+                          in zip(self.labels, label_values)]
+                for bound, bucket in zip(self.buckets, counts):
+                    le = ','.join(labels + [f'le="{bound}"'])
+                    lines.append(f"{self.name}_bucket{{{le}}} {bucket}")
+                le = ','.join(labels + ['le="+Inf"'])
+                lines.append(f"{self.name}_bucket{{{le}}} {count}")
+                suffix = f"{{{','.join(labels)}}}" if labels else ''
+                lines.append(f"{self.name}_sum{suffix} {total}")
+                lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram('request_seconds', "Webhook wall time.",
+                            ['endpoint'])
+REQUEST_QUERIES = Histogram('request_queries', "SQL statements per request.",
+                            ['endpoint'], QUERIES)
+REQUEST_COMMITS = Histogram('request_commits', "Commits per request.",
+                            ['endpoint'], COMMITS)
+COMMAND_SECONDS = Histogram('command_seconds',
+                            "Time spent in each command phase.",
+                            ['command', 'phase'])
+API_SECONDS = Histogram('api_seconds', "Outbound API call latency.",
+                        ['service', 'endpoint', 'status'])
+
+HISTOGRAMS = [REQUEST_SECONDS, REQUEST_QUERIES, REQUEST_COMMITS,
+              COMMAND_SECONDS, API_SECONDS]
+
+# Counters for the request being handled on this thread.
+_request = threading.local()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_request, 'active', False):
+        _request.queries += 1
+
+
+@event.listens_for(Session, 'after_commit')
+def _count_commit(session):
+    if getattr(_request, 'active', False):
+        _request.commits += 1
+
+
+def start_request() -> None:
+    _request.active = True
+    _request.queries = 0
+    _request.commits = 0
+    _request.start = time.perf_counter()
+
+
+def finish_request(endpoint: str) -> None:
+    if not getattr(_request, 'active', False):
+        return
+    _request.active = False
+    REQUEST_SECONDS.observe(time.perf_counter() - _request.start, endpoint)
+    REQUEST_QUERIES.observe(_request.queries, endpoint)
+    REQUEST_COMMITS.observe(_request.commits, endpoint)
+
+
+def timed(command, phase: str):
+    """ Times one phase (`generate_data`, ...) of a command. """
+    return COMMAND_SECONDS.time(type(command).__name__, phase)
+
+
+def timed_call(service: str, endpoint: str, send: Callable):
+    """ Makes an outbound HTTP call, recording its latency and status. """
+    start = time.perf_counter()
+    status = 'error'
+    try:
+        response = send()
+        status = str(response.status_code)
+        return response
+    finally:
+        API_SECONDS.observe(time.perf_counter() - start,
+                            service, endpoint, status)
+
+
+def render() -> str:
+    lines: List[str] = []
+    for histogram in HISTOGRAMS:
+        lines += histogram.render()
+    return '\n'.join(lines) + '\n'
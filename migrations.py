@@ -0,0 +1,221 @@
+"""
+Versioned schema migrations. Apply every pending one with
+
+    python migrations.py
+
+Each migration runs once, in order, and records its version in the
+`schema_version` table. Every group served by the deployment has its own
+tables, and so its own version; all of them are brought up to date.
+"""
+from app import app
+from commands import cache, pairs, participants, ratings, tenancy
+from commands.models import (Adjustment, Checkpoint, Participant, Score,
+                             Stats)
+from commands.replay import load_prerankings, stream_records
+from database import db
+from sqlalchemy import func, inspect, text
+from typing import Callable, Dict, List, Tuple
+
+CHUNK_SIZE = 1000
+
+
+class SchemaVersion(db.Model):
+    """ Schema for the migrations that have been applied. """
+    __tablename__ = 'schema_version'
+    __table_args__ = {'extend_existing': True}
+
+    version = db.Column(db.Integer, primary_key=True)
+    description = db.Column(db.String())
+
+    def __init__(self, version, description):
+        self.version = version
+        self.description = description
+
+
+def create_tables() -> None:
+    """ Creates tables that do not exist yet; existing ones are kept. """
+    db.metadata.create_all(tenancy.engine(db), tables=tenancy.tables(db))
+
+
+def create_indexes(table, *columns: str) -> None:
+    """ Adds the indexes declared on `table` over only `columns`. """
+    # `Index.create` only takes `checkfirst` from SQLAlchemy 1.4 on.
+    existing = set(index['name'] for index in inspect(db.engine)
+                   .get_indexes(table.name, schema=tenancy.current().schema))
+    for index in table.indexes:
+        if set(index.columns.keys()) <= set(columns) and\
+                index.name not in existing:
+            index.create(tenancy.engine(db))
+
+
+def index_records() -> None:
+    """ Adds the `records.timestamp` index declared after it was created. """
+    create_indexes(Score.__table__, 'timestamp')
+
+
+def add_sources(model) -> None:
+    """ Adds a `source_id` column to `model`'s table, and its index. """
+    schema = tenancy.current().schema
+    columns = [column['name'] for column in inspect(db.engine)
+               .get_columns(model.__tablename__, schema=schema)]
+    if 'source_id' not in columns:
+        table = model.__tablename__ if schema is None else\
+            f"{schema}.{model.__tablename__}"
+        db.session.execute(text(
+            f"ALTER TABLE {table} ADD COLUMN source_id VARCHAR"))
+        db.session.commit()
+    create_indexes(model.__table__, 'source_id')
+
+
+def add_record_sources() -> None:
+    """ Adds `records.source_id` and its unique index. """
+    add_sources(Score)
+
+
+def add_adjustment_sources() -> None:
+    """ Adds `adjustments.source_id` and its unique index. """
+    add_sources(Adjustment)
+
+
+def backfill_participants() -> None:
+    """
+    Fills `participants` from the ratings already stored in `records`,
+    without re-rating anything. Matches with a player who has no `stats`
+    row, and so no GroupMe id, or that tag a player twice are skipped and
+    reported.
+    """
+    Participant.query.delete()
+    player_ids = {name: player_id for (player_id, name) in
+                  db.session.query(Stats.player_id, Stats.name)}
+    ratings = load_prerankings()
+    records = db.session.query(Score.id, Score.timestamp,
+                               Score.player_1, Score.player_2,
+                               Score.player_3, Score.player_4,
+                               Score.elo_1, Score.elo_2,
+                               Score.elo_3, Score.elo_4)\
+        .order_by(Score.timestamp, Score.id)\
+        .yield_per(CHUNK_SIZE)
+
+    rows: List[Dict] = []
+    unknown: Dict[str, int] = {}
+    repeated = 0
+    for (id, timestamp, *players) in records:
+        names, after = players[:4], players[4:]
+        # Every match needs all four rows, and player ids are keys.
+        missing = [name for name in names if player_ids.get(name) is None]
+        if missing:
+            for name in missing:
+                unknown[name] = unknown.get(name, 0) + 1
+            continue
+        if not participants.storable(names):
+            repeated += 1
+            ratings.update(zip(names, map(float, after)))
+            continue
+        for i, (name, rating) in enumerate(zip(names, map(float, after))):
+            before = ratings.get(name, 1000)
+            ratings[name] = rating
+            rows.append({'match_id': id, 'player_id': player_ids.get(name),
+                         'team': 1 if i < 2 else 2, 'timestamp': timestamp,
+                         'rating_before': before, 'rating_after': rating,
+                         'delta': rating - before})
+        if len(rows) >= CHUNK_SIZE:
+            db.session.bulk_insert_mappings(Participant, rows)
+            rows = []
+    db.session.bulk_insert_mappings(Participant, rows)
+    for name, matches in sorted(unknown.items()):
+        print(f"Skipped {matches} matches of {name!r}, who has no stats row.")
+    if repeated:
+        print(f"Skipped {repeated} matches that tag a player twice.")
+
+
+def rate_alternatives() -> None:
+    """
+    Rates the recorded history with the engines kept in `ratings`, leaving
+    Elo as stored. Older checkpoints hold no engine state, so they go.
+    """
+    Checkpoint.query.delete()
+    engines = ratings.Ratings()
+    for (id, timestamp, *names, score_12, score_34) in stream_records(db):
+        engines.add((timestamp, names, score_12, score_34))
+    ratings.save(db, engines)
+
+
+def rebuild_pairs() -> None:
+    """
+    Fills `pairs` from `records`, without re-rating anything. A match's Elo
+    change comes from its `participants` rows, or from the ratings stored
+    around it if it has none. Checkpoints hold the pairs as they were, so
+    they go.
+    """
+    Checkpoint.query.delete()
+    elos = load_prerankings()
+    change = db.session.query(func.max(Participant.delta))\
+        .filter(Participant.match_id == Score.id, Participant.team == 1)\
+        .correlate(Score).as_scalar()
+    records = db.session.query(Score.player_1, Score.player_2,
+                               Score.player_3, Score.player_4,
+                               Score.score_12, Score.score_34,
+                               Score.elo_1, Score.elo_2,
+                               Score.elo_3, Score.elo_4, change)\
+        .order_by(Score.timestamp, Score.id)\
+        .yield_per(CHUNK_SIZE)
+
+    totals: Dict[pairs.Key, List[float]] = {}
+    for (*players, score_12, score_34, elo_1, elo_2, elo_3, elo_4,
+         delta) in records:
+        if delta is None:
+            delta = float(elo_1) - elos.get(players[0], 1000)
+        elos.update(zip(players, map(float, (elo_1, elo_2, elo_3, elo_4))))
+        pairs.accumulate(totals, players, score_12, score_34, delta)
+    pairs.rebuild(db, totals)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[], None]]] = [
+    (1, "Create players, pairs, checkpoints and participants tables",
+     create_tables),
+    (2, "Index records by timestamp", index_records),
+    (3, "Backfill participants from records", backfill_participants),
+    (4, "Create bookmarks table", create_tables),
+    (5, "Add unique GroupMe message ids to records", add_record_sources),
+    (6, "Create groups table", create_tables),
+    (7, "Create ratings table", create_tables),
+    (8, "Rate history with Glicko-2 and TrueSkill", rate_alternatives),
+    (9, "Create adjustments table", create_tables),
+    (10, "Create data version table", create_tables),
+    (11, "Create rewinds table", create_tables),
+    (12, "Rebuild pairs from records", rebuild_pairs),
+    (13, "Add unique GroupMe message ids to adjustments",
+     add_adjustment_sources),
+]
+
+
+def upgrade() -> None:
+    """
+    Applies every migration newer than the current group's version. Run
+    inside `tenancy.activate` to upgrade a group other than the default.
+    """
+    SchemaVersion.__table__.create(tenancy.engine(db), checkfirst=True)
+    applied = set(version for (version,) in
+                  db.session.query(SchemaVersion.version))
+    pending = [migration for migration in MIGRATIONS
+               if migration[0] not in applied]
+    for version, description, migrate in pending:
+        print(f"Applying {version}: {description}")
+        migrate()
+        db.session.add(SchemaVersion(version, description))
+        db.session.commit()
+    if pending:
+        # Workers already running drop what they cached from the old data.
+        cache.bump(db)
+        db.session.commit()
+
+
+if __name__ == "__main__":
+    with app.app_context():
+        for tenant in tenancy.everyone(db):
+            if tenant.schema is not None:
+                print(f"Group {tenant.id} ({tenant.schema})")
+            with tenancy.activate(tenant):
+                upgrade()
+            # The session is bound to the group it was started in.
+            db.session.remove()
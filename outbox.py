@@ -0,0 +1,196 @@
+import os
+import queue
+import threading
+import time
+import requests
+import logs
+import metrics
+
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+from typing import Iterable, List, Optional
+
+API_URL = os.environ.get('GROUPME_API_URL', 'https://api.groupme.com/v3')
+
+# GroupMe rejects bot posts longer than this.
+MAX_LENGTH = 1000
+SEPARATOR = "\n\n"
+
+# (connect, read) timeouts in seconds.
+TIMEOUT = (3.05, 10)
+RETRIES = 4
+BACKOFF = 0.5
+# GroupMe did not take a post answered with this or 5xx, so it is retried.
+TOO_MANY_REQUESTS = 429
+
+
+def split(note: str, max_length: int = MAX_LENGTH) -> List[str]:
+    """
+    Cuts a note into parts that fit GroupMe's length limit, at line breaks.
+    Lines too long on their own are cut where the limit falls.
+
+    Args:
+        note [str]: the message to cut.
+        max_length [int]: maximum characters per part.
+
+    Returns:
+        [List[str]]: the parts, in order.
+    """
+    parts: List[str] = []
+    current: Optional[str] = None
+    for line in note.split('\n'):
+        pieces = [line[start:start + max_length]
+                  for start in range(0, len(line), max_length)] or ['']
+        for piece in pieces:
+            if current is not None and\
+                    len(current) + 1 + len(piece) <= max_length:
+                current += '\n' + piece
+            else:
+                if current is not None:
+                    parts.append(current)
+                current = piece
+    if current is not None:
+        parts.append(current)
+    return parts
+
+
+def coalesce(notes: Iterable[str],
+             max_length: int = MAX_LENGTH) -> List[str]:
+    """
+    Packs consecutive notes into as few posts as fit GroupMe's length limit.
+    Notes that are too long on their own are split at line breaks.
+
+    Args:
+        notes [Iterable[str]]: messages in the order they should appear.
+        max_length [int]: maximum characters per post.
+
+    Returns:
+        [List[str]]: the posts to send.
+    """
+    posts: List[str] = []
+    for note in notes:
+        if not note:
+            continue
+        for part in split(note, max_length):
+            if not part.strip():
+                continue
+            if posts and (len(posts[-1]) + len(SEPARATOR) + len(part) <=
+                          max_length):
+                posts[-1] += SEPARATOR + part
+            else:
+                posts.append(part)
+    return posts
+
+
+def unsent(error: requests.RequestException) -> bool:
+    """
+    Whether a request failed before reaching GroupMe, so retrying it cannot
+    post twice. Read timeouts and dropped connections may follow a post.
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.ConnectionError) or not error.args:
+        return False
+    # Refused connections and failed lookups, wrapped in MaxRetryError.
+    reason = getattr(error.args[0], 'reason', None)
+    return isinstance(reason, ConnectTimeoutError)
+
+
+class Outbox(object):
+    """
+    Queue of outbound bot posts drained by a background worker, so the
+    webhook can return before GroupMe has acknowledged the reply.
+    """
+
+    def __init__(self, url: str = API_URL, bot_id: Optional[str] = None,
+                 timeout=TIMEOUT, retries: int = RETRIES,
+                 backoff: float = BACKOFF):
+        self.url = f"{url}/bots/post"
+        self.bot_id = bot_id
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.queue: queue.Queue = queue.Queue()
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_maxsize=4))
+        self.session.mount('http://', HTTPAdapter(pool_maxsize=4))
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def send(self, notes: Iterable[str], bot_id: Optional[str] = None) -> None:
+        """
+        Queues the notes from one webhook, coalesced into few posts, for
+        `bot_id` (by default the outbox's bot, or $BOT_ID).
+        """
+        bot_id = bot_id or self.bot_id or os.getenv('BOT_ID')
+        if bot_id is None:
+            logs.outbox.error("BOT_ID environment variable not set. Please "
+                              "configure with `heroku config:set BOT_ID=ID`.")
+            return
+
+        for post in coalesce(notes):
+            self.queue.put((bot_id, post))
+        self._ensure_worker()
+
+    def join(self) -> None:
+        """ Blocks until every queued post has been attempted. """
+        self.queue.join()
+
+    def _ensure_worker(self) -> None:
+        # Started lazily so that gunicorn's forked workers each get one.
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._drain,
+                                                name='outbox', daemon=True)
+                self._worker.start()
+
+    def _drain(self) -> None:
+        while True:
+            bot_id, text = self.queue.get()
+            try:
+                self._post(bot_id, text)
+            except Exception:
+                logs.outbox.exception("Failed to post to GroupMe")
+            finally:
+                self.queue.task_done()
+
+    def _post(self, bot_id: str, text: str) -> bool:
+        """
+        Posts one message, retrying with backoff when GroupMe could not be
+        reached, was rate limiting or answered 5xx. Other failures are not
+        retried, since the post may already have gone through.
+        """
+        data = {'bot_id': bot_id, 'text': text}
+        for attempt in range(self.retries + 1):
+            last_try = attempt == self.retries
+            try:
+                response = metrics.timed_call(
+                    'groupme', 'bots/post',
+                    lambda: self.session.post(self.url, data=data,
+                                              timeout=self.timeout))
+            except requests.RequestException as error:
+                if last_try or not unsent(error):
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+                continue
+
+            if response.status_code != TOO_MANY_REQUESTS and\
+                    response.status_code < 500:
+                return response.ok
+            if last_try:
+                logs.outbox.warning("GroupMe post gave up after %d tries "
+                                    "(%d).", attempt + 1,
+                                    response.status_code)
+                return False
+            time.sleep(self._delay(attempt, response))
+        return False
+
+    def _delay(self, attempt: int, response: requests.Response) -> float:
+        """ Honors Retry-After, otherwise backs off exponentially. """
+        retry_after = response.headers.get('Retry-After', '')
+        if retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * 2 ** attempt
+
+
+outbox = Outbox()
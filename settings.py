@@ -6,3 +6,16 @@ NUM_TEAMS = 2
 K = 50
 ERR = "Error: command must be of the form\n/[command] @[mentions], [args]\n"
 SCORE_CMD = "score"
+
+# Sentiment backend for taunts: "textblob" (NLTK) or "lexicon".
+SENTIMENT_BACKEND = "textblob"
+SENTIMENT_CACHE_SIZE = 512
+
+# Log level per category (see logs.py), and the share of ordinary chat
+# messages that are logged.
+LOG_LEVELS = {'traffic': 'INFO', 'command': 'INFO', 'outbox': 'WARNING',
+              'parse': 'WARNING'}
+LOG_TRAFFIC_SAMPLE = 0.05
+
+# GroupMe message ids remembered to drop redelivered webhooks.
+DELIVERY_CACHE_SIZE = 4096
@@ -1,7 +1,24 @@
 import csv
+import os
 import random
+import re
 import commands.groupme_message_type as gm
-from textblob import TextBlob
+import settings
+
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+RESPONSES = "resources/responses/{level}.csv"
+LEXICON = "resources/lexicon.csv"
+
+# Response pools by level, with the file mtime they were loaded at.
+_pools: Dict[str, Tuple[float, List[str]]] = {}
+
+NEGATIONS = {"not", "no", "never", "isn't", "aren't", "don't", "doesn't",
+             "can't", "won't", "ain't"}
+INTENSIFIERS = {"very": 1.3, "so": 1.3, "really": 1.3, "extremely": 1.5,
+                "super": 1.3, "fucking": 1.5}
+TOKEN = re.compile(r"[a-z']+")
 
 
 def taunt(text: str) -> str:
@@ -15,8 +32,7 @@ def taunt(text: str) -> str:
     Returns:
         str: An emotional response from its phrase repository.
     """
-    blob = TextBlob(text)
-    polarity, subjectivity = blob.sentiment
+    polarity = sentiment_polarity(normalize(text))
     sentiment = gm.Sentiment.NEUTRAL
     if polarity < -0.3:
         sentiment = gm.Sentiment.BAD
@@ -25,6 +41,70 @@ def taunt(text: str) -> str:
     return get_emotional_response(sentiment)
 
 
+def normalize(text: str) -> str:
+    """ Canonical form of a message, so near-duplicates share a cache slot. """
+    return ' '.join(text.lower().split())
+
+
+@lru_cache(maxsize=settings.SENTIMENT_CACHE_SIZE)
+def sentiment_polarity(text: str) -> float:
+    """
+    Polarity in [-1, 1] of already normalized text, using the backend
+    chosen by `settings.SENTIMENT_BACKEND`.
+    """
+    if settings.SENTIMENT_BACKEND == "lexicon":
+        return lexicon_polarity(text)
+
+    # Imported here since TextBlob/NLTK are slow to load.
+    from textblob import TextBlob
+    polarity, subjectivity = TextBlob(text).sentiment
+    return polarity
+
+
+@lru_cache(maxsize=1)
+def load_lexicon() -> Dict[str, float]:
+    with open(LEXICON, 'r') as lexicon:
+        return {word: float(score) for [word, score] in csv.reader(lexicon)}
+
+
+def lexicon_polarity(text: str) -> float:
+    """
+    Lightweight polarity: the mean score of known words, flipped by a
+    preceding negation and scaled by a preceding intensifier.
+    """
+    lexicon = load_lexicon()
+    scores: List[float] = []
+    negate = False
+    scale = 1.0
+    for word in TOKEN.findall(text):
+        if word in NEGATIONS:
+            negate = True
+        elif word in INTENSIFIERS:
+            scale *= INTENSIFIERS[word]
+        elif word in lexicon:
+            score = lexicon[word] * scale
+            scores.append(-0.5 * score if negate else score)
+            negate = False
+            scale = 1.0
+
+    if len(scores) == 0:
+        return 0.0
+    return max(-1.0, min(1.0, sum(scores) / len(scores)))
+
+
+def get_responses(level: str) -> List[str]:
+    """ Response pool for a level, reloaded only when its file changes. """
+    file = RESPONSES.format(level=level)
+    mtime = os.stat(file).st_mtime
+    cached = _pools.get(level)
+    if cached is None or cached[0] != mtime:
+        with open(file, 'r') as responses:
+            cached = (mtime, [row[0] for row in csv.reader(responses)
+                              if row])
+        _pools[level] = cached
+    return cached[1]
+
+
 def get_emotional_response(sentiment: gm.Sentiment) -> str:
     """
     Generates an emotional response of the given sentiment.
@@ -36,10 +116,4 @@ def get_emotional_response(sentiment: gm.Sentiment) -> str:
         str: Chosen respnose to the identified sentiment.
     """
     level: str = sentiment.name.lower()
-    file = f"resources/responses/{level}.csv"
-    response = ''
-    with open(file, 'r') as responses:
-        reader = list(csv.reader(responses))
-        response = random.choice(reader)[0]
-
-    return response
+    return random.choice(get_responses(level))
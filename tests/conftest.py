@@ -0,0 +1,134 @@
+import multiprocessing
+import os
+import sys
+
+import pytest
+
+# Tests import the bot's modules the way the scripts at the root do.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import deliveries  # noqa: E402
+from benchmarks import harness  # noqa: E402
+from commands import cache, store, tenancy  # noqa: E402
+from database import db  # noqa: E402
+
+
+def forget_process_state() -> None:
+    """ Drops per-process caches, which outlive each test's database. """
+    cache._responses.clear()
+    store._stores.clear()
+    deliveries.recent._ids.clear()
+    tenancy._groups = {}
+    tenancy._loaded_at = None
+
+
+@pytest.fixture
+def database_url(tmp_path) -> str:
+    return f"sqlite:///{tmp_path / 'leaderboard.db'}"
+
+
+@pytest.fixture
+def app(database_url):
+    """ App with every table created in a fresh SQLite file. """
+    forget_process_state()
+    app = harness.create_app(database_url)
+    with app.app_context():
+        yield app
+        db.session.remove()
+    forget_process_state()
+
+
+@pytest.fixture
+def players(app):
+    """ GroupMe ids of eight new players, named 'Player 0' to 'Player 7'. """
+    harness.seed_players(8)
+    return [harness.user_id(i) for i in range(8)]
+
+
+@pytest.fixture
+def send(app):
+    """ Runs a chat message through the registry; returns the bot's reply. """
+    from commands import registry
+
+    def send(text, sender, mentions=(), timestamp=harness.START_TIMESTAMP,
+             admin=True):
+        message = harness.command_message(text, sender, list(mentions),
+                                          timestamp)
+        route = registry.lookup(text, admin)
+        return harness.record([route.build(message, admin)])[0]
+    return send
+
+
+@pytest.fixture
+def webhook(database_url, monkeypatch):
+    """
+    Posts GroupMe callbacks to the bot's own app, on a fresh SQLite file
+    with players 0 to 7 and Player 0 as admin. Returns a function that posts
+    one and returns the notes queued for GroupMe.
+    """
+    import app as bot
+
+    forget_process_state()
+    monkeypatch.setitem(bot.app.config, 'SQLALCHEMY_DATABASE_URI',
+                        database_url)
+    monkeypatch.setenv('ADMIN', harness.user_id(0))
+    monkeypatch.delenv('GROUPME_GROUP_ID', raising=False)
+    queued = []
+    monkeypatch.setattr(bot.outbox, 'send', lambda notes, bot_id=None:
+                        queued.extend(notes))
+    client = bot.app.test_client()
+
+    def post(text, sender, mentions=(), timestamp=harness.START_TIMESTAMP,
+             **fields):
+        message = harness.command_message(text, sender, list(mentions),
+                                          timestamp)
+        message.update(fields)
+        queued.clear()
+        assert client.post('/', json=message).status_code == 200
+        return list(queued)
+
+    with bot.app.app_context():
+        db.create_all()
+        harness.seed_players(8)
+        yield post
+        db.session.remove()
+    forget_process_state()
+
+
+def send_in_worker(database_url, text, sender, mentions, timestamp):
+    """ Handles one message in a fresh process, as another worker would. """
+    from commands import registry
+
+    app = harness.create_app(database_url)
+    with app.app_context():
+        message = harness.command_message(text, sender, list(mentions),
+                                          timestamp)
+        route = registry.lookup(text, True)
+        return harness.record([route.build(message, True)])[0]
+
+
+@pytest.fixture
+def other_worker(database_url):
+    """ Runs a chat message in a separate process; returns the reply. """
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        def send(text, sender, mentions=(),
+                 timestamp=harness.START_TIMESTAMP):
+            return pool.apply(send_in_worker, (database_url, text, sender,
+                                               mentions, timestamp))
+        yield send
+
+
+@pytest.fixture
+def workers(database_url):
+    """
+    Runs chat messages across four processes at once, as gunicorn workers
+    would receive them; returns the replies in order.
+    """
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(4) as pool:
+        def send_all(messages):
+            return pool.starmap(send_in_worker,
+                                [(database_url, *message)
+                                 for message in messages], chunksize=1)
+        yield send_all
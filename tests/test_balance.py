@@ -0,0 +1,50 @@
+from itertools import combinations, permutations
+
+import pytest
+
+from benchmarks import harness
+from commands import teams
+
+
+def gap(elos, team_a, team_b):
+    return abs(elos[team_a[0]] + elos[team_a[1]] -
+               elos[team_b[0]] - elos[team_b[1]]) / 2
+
+
+@pytest.mark.parametrize('n', [5, 6, 7, 9])
+def test_sits_out_whoever_makes_games_fairest(n):
+    elos = {f"P{i}": 1000 + 37 * i + (i * i) % 11 for i in range(n)}
+    names = list(elos)
+
+    games = teams.balance(names, [elos[name] for name in names])
+
+    playing = [name for game in games for name in game.team_a + game.team_b]
+    assert len(playing) == len(set(playing)) == n - n % 4
+    # No choice of who plays, and how, beats the worst game found.
+    best = min(max(gap(elos, order[i:i + 2], order[i + 2:i + 4])
+                   for i in range(0, len(order), 4))
+               for chosen in combinations(names, n - n % 4)
+               for order in permutations(chosen))
+    assert max(gap(elos, game.team_a, game.team_b) for game in games) ==\
+        pytest.approx(best)
+
+
+def test_balance_names_who_sits_out(players, send):
+    for i, score in enumerate(["7 - 0", "7 - 1", "7 - 2"]):
+        send(f"/score @Player 0 @Player 1 @Player 2 @Player 3, {score}",
+             players[0], players[:4], harness.START_TIMESTAMP + i)
+
+    reply = send("/balance @Player 0 @Player 1 @Player 2 @Player 3 "
+                 "@Player 4", players[0], players[:5])
+
+    assert reply.startswith("FAIREST GAMES")
+    assert reply.count(" v. ") == 1
+    # Players 0 to 3 split into an even game only without Player 4.
+    assert reply.endswith("(50% - 50%)\nSitting out: Player 4\n")
+
+
+@pytest.mark.parametrize('count', [3, 13])
+def test_balance_rejects_pool_size(players, send, count):
+    ids = [harness.user_id(i) for i in range(count)]
+    tags = ' '.join(f"@Player {i}" for i in range(count))
+    assert send(f"/balance {tags}", players[0], ids).startswith("Tag 4 to 12")
@@ -0,0 +1,73 @@
+import pytest
+
+from benchmarks import harness
+from commands.models import Adjustment, Stats
+
+T = harness.START_TIMESTAMP
+SCORE = "/score @Player 0 @Player 1 @Player 2 @Player 3, 7 - 3"
+
+
+def elos():
+    return {stat.name: stat.elo for stat in Stats.query}
+
+
+@pytest.fixture
+def refresh(send, players):
+    def refresh(timestamp):
+        send("/refresh", players[0], timestamp=timestamp)
+    return refresh
+
+
+def test_botch_is_recorded(players, send):
+    reply = send("/botch @Player 0, spilled a beer", players[1],
+                 [players[0]], T)
+    assert reply.startswith("BOTCH Player 0 (1000 -> 990)")
+    adjustment = Adjustment.query.one()
+    assert (adjustment.player_id, adjustment.admin_id, adjustment.amount,
+            adjustment.reason) == (players[0], players[1], -10,
+                                   "spilled a beer")
+
+
+def test_refresh_keeps_botches(players, send, refresh):
+    send(SCORE, players[0], players[:4], T)
+    send("/botch @Player 0, spilled a beer", players[1], [players[0]],
+         T + 10)
+    send("/unbotch @Player 2, it was Player 0", players[1], [players[2]],
+         T + 20)
+    send(SCORE, players[0], players[:4], T + 30)
+    live = elos()
+
+    refresh(T + 40)
+    assert elos() == pytest.approx(live)
+
+
+@pytest.mark.parametrize('offset', [0, -5])
+def test_botch_at_or_before_newest_match(players, send, refresh, offset):
+    send(SCORE, players[0], players[:4], T)
+    send(SCORE, players[0], players[:4], T + 10)
+    send("/botch @Player 1, late", players[1], [players[1]], T + 10 + offset)
+    live = elos()
+
+    refresh(T + 40)
+    assert elos() == pytest.approx(live)
+
+
+def test_score_before_newest_botch(players, send, refresh):
+    send(SCORE, players[0], players[:4], T)
+    send("/botch @Player 4, early", players[1], [players[4]], T + 20)
+    send("/score @Player 4 @Player 5 @Player 6 @Player 7, 7 - 2",
+         players[4], players[4:], T + 10)
+    live = elos()
+
+    refresh(T + 40)
+    assert elos() == pytest.approx(live)
+
+
+def test_redelivered_botch_applies_once(players, send, other_worker):
+    # GroupMe sends the same message id again, to another worker.
+    botch = ("/botch @Player 0, spilled a beer", players[1], [players[0]])
+    assert send(*botch, T).startswith("BOTCH")
+    assert other_worker(*botch, T) == "That botch was already recorded."
+
+    assert Adjustment.query.count() == 1
+    assert elos()["Player 0"] == 990
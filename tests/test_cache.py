@@ -0,0 +1,51 @@
+import pytest
+
+from benchmarks import harness
+
+SCORE = "/score @Player 0 @Player 1 @Player 2 @Player 3, 7 - 3"
+
+
+def test_reads_see_other_workers_writes(players, send, other_worker):
+    assert "Player 0" not in send("/lb", players[0])
+    assert send("/history", players[0]) ==\
+        "Player 0 hasn't played a match yet."
+
+    # The leaderboard lists players with more than three games.
+    for i in range(4):
+        other_worker(SCORE, players[0], players[:4],
+                     harness.START_TIMESTAMP + i)
+
+    assert "Player 0" in send("/lb", players[0])
+    assert "after 4 games" in send("/history", players[0])
+
+
+def test_cached_until_data_changes(players, send):
+    send(SCORE, players[0], players[:4])
+    with harness.count_queries() as first:
+        board = send("/lb", players[0])
+    with harness.count_queries() as again:
+        assert send("/lb", players[0]) == board
+    # Only the data version is read for a cached response.
+    assert len(again) == 1 < len(first)
+
+
+@pytest.mark.parametrize('text, admin, reply', [
+    (SCORE, False, "Waiting for approval."),
+    (SCORE.replace("7 - 3", "7 - 6"), True, "It's win by 2, numbnut."),
+    ("/botch @Player 1, dropped the ball", False,
+     "Only an admin can botch users."),
+    ("/strike, 1", False, "Must be an admin to strike matches."),
+    ("/add @Player 1, Someone Else", False, "Only an admin can add users."),
+])
+def test_unchanged_data_stays_cached(players, send, text, admin, reply):
+    send(SCORE, players[0], players[:4])
+    board = send("/lb", players[0])
+    with harness.count_queries() as queries:
+        assert send(text, players[0], players[:4], admin=admin) == reply
+    # Neither the writer lock nor a new data version.
+    assert not [statement for statement in queries.statements
+                if "BEGIN" in statement or "data_version" in statement
+                and not statement.startswith("SELECT")]
+    with harness.count_queries() as again:
+        assert send("/lb", players[0]) == board
+    assert len(again) == 1
@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from benchmarks import harness
+from commands.models import Score, Stats
+
+
+def stats():
+    return {stat.name: (stat.elo, stat.games, stat.wins, stat.losses)
+            for stat in Stats.query.all()}
+
+
+def test_concurrent_scores_match_a_refresh(players, send, workers):
+    rng = random.Random(0)
+    messages = []
+    for i in range(40):
+        tagged = rng.sample(players, 4)
+        loser = rng.randint(0, 5)
+        score_12, score_34 = (7, loser) if rng.random() < 0.5 else (loser, 7)
+        text = ("/score " + ' '.join(f"@Player {int(id) - 1000}"
+                                     for id in tagged) +
+                f", {score_12} - {score_34}")
+        messages.append((text, tagged[0], tagged,
+                         harness.START_TIMESTAMP + i))
+    # Arrival order differs from play order, so some matches are backdated
+    # and replay while other workers record.
+    rng.shuffle(messages)
+
+    replies = workers(messages)
+
+    assert all("recorded" in reply for reply in replies), replies
+    assert Score.query.count() == len(messages)
+    live = stats()
+    send("/refresh", players[0], timestamp=harness.START_TIMESTAMP + 100)
+    for name, (elo, *counts) in stats().items():
+        live_elo, *live_counts = live[name]
+        assert live_counts == counts, name
+        # SQLite keeps the unrounded Numeric values of live scoring.
+        assert live_elo == pytest.approx(elo, abs=0.05), name
@@ -0,0 +1,58 @@
+import pytest
+
+from benchmarks import harness
+from commands.models import Score
+from database import db
+from deliveries import RecentDeliveries
+from sqlalchemy.exc import IntegrityError
+
+SCORE = "/score @Player 0 @Player 1 @Player 2 @Player 3, 7 - 3"
+PLAYERS = [harness.user_id(i) for i in range(4)]
+
+
+def test_redelivery_skips_the_database(webhook):
+    first = webhook(SCORE, PLAYERS[0], PLAYERS)
+    assert first[0].startswith("Match 1 recorded")
+
+    with harness.count_queries() as queries:
+        assert webhook(SCORE, PLAYERS[0], PLAYERS) == []
+    assert len(queries) == 0
+    assert Score.query.count() == 1
+
+
+def test_redelivery_to_another_worker(players, send, other_worker):
+    assert send(SCORE, players[0], players[:4]).startswith("Match 1")
+    # That worker's deliveries never saw the message id.
+    assert other_worker(SCORE, players[0], players[:4]) ==\
+        "That match was already recorded."
+    assert Score.query.count() == 1
+
+
+def test_source_ids_are_unique(players):
+    source_id = f"{players[0]}-{harness.START_TIMESTAMP}"
+    for _ in range(2):
+        db.session.add(Score(*[f"Player {i}" for i in range(4)], 7, 3,
+                             harness.START_TIMESTAMP, 1000, 1000, 1000,
+                             1000, source_id))
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+
+
+def test_recent_deliveries_are_bounded():
+    recent = RecentDeliveries(maxsize=2)
+    assert recent.claim('1') and recent.claim('2')
+    assert not recent.claim('1')
+    # '2' is now the least recently seen, so it goes first.
+    assert recent.claim('3')
+    assert recent.claim('2')
+    assert not recent.claim('3')
+    assert len(recent._ids) == 2
+
+
+def test_failed_deliveries_are_released():
+    recent = RecentDeliveries(maxsize=2)
+    assert recent.claim('1')
+    recent.release('1')
+    assert recent.claim('1')
+    # Messages without an id cannot be told apart.
+    assert recent.claim(None) and recent.claim(None)
@@ -0,0 +1,16 @@
+from benchmarks import harness
+from commands import cache, directory
+
+NEWCOMER = harness.user_id(100)
+
+
+def test_sees_players_added_by_other_workers(players, send, other_worker):
+    assert directory.name_for(NEWCOMER) == ''
+
+    assert other_worker("/add @Newcomer, New Player", players[0],
+                        [NEWCOMER]) == "User New Player added."
+
+    cache.refresh()
+    assert directory.name_for(NEWCOMER) == "New Player"
+    assert send("/add @Newcomer, New Player", players[0], [NEWCOMER],
+                harness.START_TIMESTAMP + 1) == "User already added."
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from benchmarks import harness
+from commands import elo, ratings, replay
+from commands.models import Score, Stats
+from database import db
+
+
+def test_batch_matches_scalar():
+    generator = np.random.RandomState(11)
+    n = 2000
+    elos = generator.uniform(600, 1400, (n, 4))
+    games = generator.randint(0, 40, (n, 4))
+    winner = generator.randint(7, 13, n)
+    loser = np.array([generator.randint(0, score - 1) for score in winner])
+    won = generator.rand(n) < 0.5
+    score_a = np.where(won, winner, loser)
+    score_b = np.where(won, loser, winner)
+
+    batch = elo.batch_elo_delta(elos[:, :2], elos[:, 2:], games[:, :2],
+                                games[:, 2:], score_a, score_b, k=24)
+    scalar = [elo.elo_delta(elos[i].tolist(), games[i].tolist(),
+                            int(score_a[i]), int(score_b[i]), k=24)
+              for i in range(n)]
+    assert batch == pytest.approx(scalar, rel=1e-12, abs=1e-12)
+
+
+def test_engine_matches_replay(app):
+    harness.generate(200, 8)
+    replay.replay(db, {})
+    db.session.commit()
+
+    # Waves of matches with no player in common, as `ratings.Ratings` uses.
+    engine = ratings.ENGINES['elo']
+    states = {}
+    wave, busy = [], set()
+    for score in Score.query.order_by(Score.timestamp, Score.id):
+        names = [score.player_1, score.player_2, score.player_3,
+                 score.player_4]
+        if not busy.isdisjoint(names):
+            ratings.rate(engine, wave, states)
+            wave, busy = [], set()
+        wave.append((score.timestamp, names, score.score_12, score.score_34))
+        busy.update(names)
+    ratings.rate(engine, wave, states)
+
+    # Replays round to the three decimals ratings are stored with.
+    assert {name: state[0] for name, state in states.items()} ==\
+        pytest.approx({stat.name: float(stat.elo) for stat in Stats.query},
+                      abs=0.01)
@@ -0,0 +1,134 @@
+import groupme
+import pytest
+
+from benchmarks import harness
+from commands.models import Score
+
+ADMIN = ['900']
+START = 1600000000
+
+
+class Response(object):
+    def __init__(self, status_code, messages=()):
+        self.status_code = status_code
+        self.messages = list(messages)
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {'response': {'messages': self.messages}}
+
+
+class FakeHistory(object):
+    """ Stands in for GroupMe's messages endpoint over `messages`. """
+
+    def __init__(self, messages):
+        # Newest first, as GroupMe pages them.
+        self.messages = sorted(messages, key=lambda message:
+                               int(message['id']), reverse=True)
+        self.requests = []
+
+    def get(self, url, params, timeout):
+        self.requests.append(params['before_id'])
+        older = [message for message in self.messages
+                 if int(message['id']) < int(params['before_id'])]
+        if not older:
+            return Response(304)
+        return Response(200, older[:params['limit']])
+
+
+def message(id, text="/score @A @B @C @D, 7 - 3", approved=True):
+    return {'id': str(id), 'text': text, 'created_at': START + id,
+            'favorited_by': ADMIN if approved else []}
+
+
+def check(messages, before_id, **stops):
+    session = FakeHistory(messages)
+    history = groupme.MessageHistory('group', 'token', page_size=3,
+                                     session=session)
+    scores, newest_id = groupme.approved_scores(history, str(before_id),
+                                                ADMIN, **stops)
+    return [int(score['id']) for score in scores], newest_id, session
+
+
+def test_reads_every_page():
+    messages = [message(id, approved=id % 2 == 0) for id in range(1, 11)]
+    messages.append(message(11, text="nice game"))
+
+    scores, newest_id, session = check(messages, 12)
+
+    assert scores == [2, 4, 6, 8, 10]
+    assert newest_id == '11'
+    # Pages of three, until GroupMe has nothing older.
+    assert session.requests == ['12', '9', '6', '3', '1']
+
+
+def test_stops_at_bookmark():
+    messages = [message(id) for id in range(1, 11)]
+
+    scores, newest_id, session = check(messages, 11, stop_id='4')
+
+    assert scores == [5, 6, 7, 8, 9, 10]
+    assert newest_id == '10'
+    # The page holding the bookmark is the last one read.
+    assert session.requests == ['11', '8', '5']
+
+
+def test_first_check_reads_back_to_newest_match():
+    # No bookmark yet: matches played after the newest recorded one count.
+    messages = [message(id) for id in range(1, 11)]
+
+    scores, newest_id, _ = check(messages, 11, stop_timestamp=START + 6)
+
+    assert scores == [7, 8, 9, 10]
+    assert newest_id == '10'
+
+
+def test_nothing_new():
+    scores, newest_id, session = check([message(1)], 2, stop_id='1')
+
+    assert scores == []
+    assert newest_id is None
+    assert session.requests == ['2']
+
+
+@pytest.fixture
+def history(webhook, monkeypatch):
+    """ Serves `/check` from a scripted history; returns its messages. """
+    messages = []
+    history_class = groupme.MessageHistory
+    monkeypatch.setattr(groupme, 'MessageHistory', lambda group_id, token:
+                        history_class(group_id, token, page_size=3,
+                                      session=FakeHistory(messages)))
+    return messages
+
+
+def score(id, approved=True):
+    players = [harness.user_id(i) for i in range(4)]
+    message = harness.score_message(players, 7, 3, START + id)
+    message.update(id=str(id), favorited_by=[players[0]] if approved else [])
+    return message
+
+
+def test_check_finds_scores_approved_since(webhook, history):
+    admin = harness.user_id(0)
+    history.extend([score(1), score(2, approved=False)])
+    assert webhook("/check", admin, id='3')[0].startswith("Match 1")
+
+    # Approved after that `/check` read it.
+    history[1]['favorited_by'] = [admin]
+    assert webhook("/check", admin, id='4')[0].startswith("Match 2")
+    assert webhook("/check", admin, id='5') ==\
+        ["No new approved `/score` messages."]
+
+
+def test_first_check_reads_recent_history(webhook, history, monkeypatch):
+    monkeypatch.setattr(groupme, 'CHECK_BACKFILL', 5)
+    history.extend(score(id) for id in range(1, 21))
+
+    replies = webhook("/check", harness.user_id(0), id='21')
+    assert [reply.split(',')[0] for reply in replies] ==\
+        [f"Match {id} recorded" for id in range(1, 6)]
+    assert [source_id for (source_id,) in Score.query.order_by(Score.id)
+            .with_entities(Score.source_id)] == ['16', '17', '18', '19', '20']
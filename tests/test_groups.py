@@ -0,0 +1,91 @@
+import argparse
+import groups
+import groupme
+import os
+import pytest
+
+from benchmarks import harness
+from commands import settings, tenancy
+from database import attached_path, bind_for, db
+from sqlalchemy import create_engine
+
+PLAYERS = [harness.user_id(i) for i in range(4)]
+SCORE = "/score @Player 0 @Player 1 @Player 2 @Player 3, {}"
+K = 2 * settings.K
+
+
+@pytest.fixture
+def post(webhook, monkeypatch):
+    """ Serves the default group as '1' and adds group '2' with its rules. """
+    monkeypatch.setenv('GROUPME_GROUP_ID', '1')
+    groups.add_group(argparse.Namespace(
+        group_id='2', bot_id='bot-2', admin=harness.user_id(0), name=None,
+        k=K, win_by=3, min_score=settings.MIN_SCORE_TO_WIN))
+    with tenancy.activate(tenancy.registered(db)['2']):
+        harness.seed_players(8)
+        db.session.remove()
+    sent = iter(range(1, 1000))
+
+    def post(group_id, text, timestamp=harness.START_TIMESTAMP,
+             mentions=PLAYERS):
+        # Message ids are unique across GroupMe.
+        return webhook(text, PLAYERS[0], mentions, timestamp,
+                       group_id=group_id, id=str(next(sent)))
+    return post
+
+
+def delta(reply):
+    return float(reply.split("W: +")[1].split()[0])
+
+
+def test_groups_keep_their_own_matches(post, database_url):
+    first = post('1', SCORE.format("7 - 3"))[0]
+    second = post('2', SCORE.format("7 - 3"))[0]
+    # Each group numbers its own matches, rated with its own K-factor.
+    assert first.startswith("Match 1 recorded")
+    assert second.startswith("Match 1 recorded")
+    assert delta(second) == pytest.approx(delta(first) * K / settings.K,
+                                          rel=1e-3)
+
+    assert post('1', SCORE.format("7 - 5")) != ["It's win by 3, numbnut."]
+    assert post('2', SCORE.format("7 - 5")) == ["It's win by 3, numbnut."]
+    assert "after 2 games" in post('1', "/history", mentions=())[0]
+    assert "after 1 games" in post('2', "/history", mentions=())[0]
+
+    # On SQLite the group's tables are a file next to the main database.
+    main = database_url[len('sqlite:///'):]
+    assert os.path.exists(attached_path(main, 'group_2'))
+
+
+def test_groups_keep_their_own_caches(post):
+    board = post('2', "/lb")
+    # The leaderboard lists players with more than three games.
+    for i in range(4):
+        post('1', SCORE.format("7 - 3"), harness.START_TIMESTAMP + i)
+    assert "Player 0" in post('1', "/lb")[0]
+    assert post('2', "/lb") == board
+
+
+def test_groups_check_back_to_their_own_matches(post, monkeypatch):
+    stops = []
+    monkeypatch.setattr(groupme, 'approved_scores',
+                        lambda history, before_id, admin, *stop:
+                        stops.append(stop) or ([], None))
+    post('1', SCORE.format("7 - 3"))
+    post('2', SCORE.format("7 - 3"))
+    post('2', SCORE.format("7 - 3"), harness.START_TIMESTAMP + 1)
+
+    post('1', "/check", mentions=())
+    post('2', "/check", mentions=())
+    # Each stops at the id of its own newest recorded match.
+    assert [stop_id for (stop_id, _, _) in stops] == ['1', '3']
+
+
+def test_schemas_are_translated():
+    engine = create_engine('sqlite://')
+    bound = bind_for(engine, 'group_2')
+    # Unqualified tables resolve in the group's schema, as on Postgres.
+    assert bound.get_execution_options()['schema_translate_map'] ==\
+        {None: 'group_2'}
+    assert bind_for(engine, 'group_2') is bound
+    assert bind_for(engine, None) is engine
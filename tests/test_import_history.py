@@ -0,0 +1,24 @@
+import json
+
+from benchmarks import harness
+from commands.models import Score
+from import_history import import_history
+
+PLAYERS = [harness.user_id(i) for i in range(4)]
+SCORE = "/score @Player 0 @Player 1 @Player 2 @Player 3, 7 - 3"
+
+
+def test_skips_imported_messages(webhook, tmp_path):
+    assert webhook(SCORE, PLAYERS[0], PLAYERS)[0].startswith("Match 1")
+    # A redelivered line, and one recorded through the webhook above.
+    messages = [harness.score_message(PLAYERS, 7, 3, harness.START_TIMESTAMP
+                                      + offset) for offset in (1, 2, 2, 0)]
+    path = tmp_path / 'messages.jsonl'
+    path.write_text(''.join(json.dumps(message) + '\n'
+                            for message in messages))
+
+    for _ in range(2):
+        import_history(str(path), workers=1, batch_size=3)
+    assert sorted(source_id for (source_id,) in
+                  Score.query.with_entities(Score.source_id)) ==\
+        sorted({message['id'] for message in messages})
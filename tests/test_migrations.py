@@ -0,0 +1,169 @@
+import pytest
+
+from benchmarks import harness
+from commands import pairs
+from commands.models import Pair, Participant, Player, Score
+from commands.refresh import RefreshCommand
+from commands.score import ScoreCommand
+from commands.strike import StrikeCommand
+from database import db
+from flask import Flask
+from sqlalchemy import inspect, text
+
+import migrations
+
+# The two tables every deployment started with, before any migration.
+BASELINE = [
+    """CREATE TABLE records (
+        id INTEGER PRIMARY KEY,
+        player_1 VARCHAR, player_2 VARCHAR,
+        player_3 VARCHAR, player_4 VARCHAR,
+        score_12 INTEGER, score_34 INTEGER,
+        timestamp INTEGER,
+        elo_1 NUMERIC(7, 3), elo_2 NUMERIC(7, 3),
+        elo_3 NUMERIC(7, 3), elo_4 NUMERIC(7, 3))""",
+    """CREATE TABLE stats (
+        id INTEGER PRIMARY KEY,
+        player_id VARCHAR, name VARCHAR, elo NUMERIC(7, 3),
+        games INTEGER, wins INTEGER, losses INTEGER)""",
+]
+NAMES = [f"Player {i}" for i in range(4)]
+
+
+@pytest.fixture
+def baseline(database_url):
+    """ A database holding only the baseline tables and one match. """
+    app = Flask('migrations')
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        for statement in BASELINE:
+            db.session.execute(text(statement))
+        for i, name in enumerate(NAMES):
+            db.session.execute(text(
+                "INSERT INTO stats (player_id, name, elo, games, wins, "
+                "losses) VALUES (:id, :name, :elo, 1, :win, 1 - :win)"),
+                {'id': harness.user_id(i), 'name': name,
+                 'elo': 1016 if i < 2 else 984, 'win': int(i < 2)})
+        db.session.execute(text(
+            "INSERT INTO records (player_1, player_2, player_3, player_4, "
+            "score_12, score_34, timestamp, elo_1, elo_2, elo_3, elo_4) "
+            "VALUES ('Player 0', 'Player 1', 'Player 2', 'Player 3', 7, 3, "
+            ":timestamp, 1016, 1016, 984, 984)"),
+            {'timestamp': harness.START_TIMESTAMP})
+        db.session.commit()
+        yield app
+        db.session.remove()
+
+
+def test_upgrade_from_baseline(baseline):
+    migrations.upgrade()
+
+    applied = [version for (version,) in
+               db.session.query(migrations.SchemaVersion.version)]
+    assert sorted(applied) == [version for (version, _, _) in
+                               migrations.MIGRATIONS]
+    inspector = inspect(db.engine)
+    assert 'source_id' in [column['name'] for column in
+                           inspector.get_columns('records')]
+    assert {'ix_records_timestamp', 'ix_records_source_id'} <=\
+        set(index['name'] for index in inspector.get_indexes('records'))
+    assert Participant.query.count() == 4
+
+    # Applying again finds nothing left to do.
+    migrations.upgrade()
+    assert db.session.query(migrations.SchemaVersion).count() ==\
+        len(migrations.MIGRATIONS)
+
+    db.session.add_all(Player(harness.user_id(i), name)
+                       for i, name in enumerate(NAMES))
+    db.session.commit()
+    players = [harness.user_id(i) for i in range(4)]
+    harness.record([ScoreCommand(harness.score_message(
+        players, 7, 5, harness.START_TIMESTAMP + 60))])
+    assert Score.query.count() == 2
+    assert Participant.query.count() == 8
+
+
+def test_backfill_skips_players_without_stats(baseline, capsys):
+    db.session.execute(text(
+        "INSERT INTO records (player_1, player_2, player_3, player_4, "
+        "score_12, score_34, timestamp, elo_1, elo_2, elo_3, elo_4) "
+        "VALUES ('Player 0', 'Ghost', 'Player 2', 'Player 3', 7, 1, "
+        ":timestamp, 1030, 1014, 970, 970)"),
+        {'timestamp': harness.START_TIMESTAMP + 60})
+    db.session.commit()
+
+    migrations.upgrade()
+
+    assert Participant.query.filter(Participant.player_id.is_(None))\
+        .count() == 0
+    assert Participant.query.count() == 4
+    assert "Skipped 1 matches of 'Ghost'" in capsys.readouterr().out
+
+
+def test_matches_tagging_a_player_twice(baseline, capsys):
+    # `/score` accepted these until it checked for repeated tags.
+    db.session.execute(text(
+        "INSERT INTO records (player_1, player_2, player_3, player_4, "
+        "score_12, score_34, timestamp, elo_1, elo_2, elo_3, elo_4) "
+        "VALUES ('Player 0', 'Player 0', 'Player 2', 'Player 3', 7, 1, "
+        ":timestamp, 1032, 1032, 968, 968)"),
+        {'timestamp': harness.START_TIMESTAMP + 60})
+    db.session.commit()
+
+    migrations.upgrade()
+
+    assert "Skipped 1 matches that tag a player twice." in\
+        capsys.readouterr().out
+    assert Participant.query.count() == 4
+
+    db.session.add_all(Player(harness.user_id(i), name)
+                       for i, name in enumerate(NAMES))
+    db.session.commit()
+    admin = harness.user_id(0)
+    refreshed, = harness.record([RefreshCommand(
+        harness.command_message("/refresh", admin))])
+    assert refreshed.startswith("Leaderboard refreshed.")
+    struck, = harness.record([StrikeCommand(
+        harness.command_message("/strike, 1", admin,
+                                timestamp=harness.START_TIMESTAMP + 120))])
+    assert struck.startswith("Match 1 deleted.")
+    assert Score.query.count() == 1
+    assert Participant.query.count() == 0
+
+
+def test_upgrade_rebuilds_pairs(baseline):
+    migrations.upgrade()
+
+    pair = pairs.lookup('Player 0', 'Player 1')
+    # The Elo change is the one stored, not a re-rating.
+    assert [getattr(pair, column) for column in pairs.COLUMNS] ==\
+        [1, 1, 0, 16, 0, 0]
+    pair = pairs.lookup('Player 0', 'Player 2')
+    assert [getattr(pair, column) for column in pairs.COLUMNS] ==\
+        [0, 0, 0, 0, 1, 0]
+    assert Pair.query.count() == 6
+
+
+def test_upgrade_adds_adjustment_sources(baseline):
+    migrations.upgrade()
+    # Adjustments as created before they kept GroupMe message ids.
+    db.session.execute(text("DROP TABLE adjustments"))
+    db.session.execute(text(
+        "CREATE TABLE adjustments (id INTEGER PRIMARY KEY, "
+        "player_id VARCHAR, admin_id VARCHAR, amount NUMERIC(7, 3), "
+        "reason VARCHAR, timestamp INTEGER)"))
+    db.session.query(migrations.SchemaVersion)\
+        .filter(migrations.SchemaVersion.version == 13).delete()
+    db.session.commit()
+
+    migrations.upgrade()
+
+    inspector = inspect(db.engine)
+    assert 'source_id' in [column['name'] for column in
+                           inspector.get_columns('adjustments')]
+    index, = [index for index in inspector.get_indexes('adjustments')
+              if index['name'] == 'ix_adjustments_source_id']
+    assert index['unique']
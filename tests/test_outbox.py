@@ -0,0 +1,130 @@
+import socket
+import threading
+import time
+
+import pytest
+import requests
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from outbox import MAX_LENGTH, Outbox, coalesce
+
+
+class GroupMe(BaseHTTPRequestHandler):
+    """ Stands in for the bots API, answering from the server's script. """
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.server.posts += 1
+        reply = self.server.replies.pop(0) if self.server.replies else 202
+        if reply == 'hang':
+            time.sleep(0.5)
+            reply = 202
+        # A (status, Retry-After) pair asks for a delay.
+        reply, retry_after = reply if isinstance(reply, tuple) else\
+            (reply, None)
+        try:
+            self.send_response(reply)
+            if retry_after is not None:
+                self.send_header('Retry-After', retry_after)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        except ConnectionError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def groupme():
+    """ Local bots API; set `replies` to the statuses to answer with. """
+    server = HTTPServer(('127.0.0.1', 0), GroupMe)
+    server.posts = 0
+    server.replies = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def outbox_for(url: str) -> Outbox:
+    return Outbox(url, 'bot', timeout=(1, 0.2), retries=2, backoff=0)
+
+
+def url_of(server) -> str:
+    return "http://%s:%d" % server.server_address
+
+
+def test_coalesce_packs_short_notes():
+    assert coalesce(["a", "", "b"]) == ["a\n\nb"]
+    assert coalesce(["a" * 600, "b" * 600]) == ["a" * 600, "b" * 600]
+
+
+def test_coalesce_splits_long_notes_at_lines():
+    lines = [f"{i:3d} " + "x" * 95 for i in range(25)]
+    posts = coalesce(["header", '\n'.join(lines)])
+
+    # Ten 99-character lines fill a post.
+    assert posts == ["header", '\n'.join(lines[:10]),
+                     '\n'.join(lines[10:20]), '\n'.join(lines[20:])]
+    assert all(len(post) <= MAX_LENGTH for post in posts)
+
+
+def test_coalesce_cuts_lines_longer_than_a_post():
+    posts = coalesce(["y" * 2500])
+    assert [len(post) for post in posts] == [1000, 1000, 500]
+
+
+@pytest.mark.parametrize('replies', [[503, 500], [429, 429], [429, 502]])
+def test_retries_server_errors_and_rate_limits(groupme, replies):
+    groupme.replies = list(replies)
+    assert outbox_for(url_of(groupme))._post('bot', "hi")
+    assert groupme.posts == 3
+
+
+def test_honors_retry_after(groupme):
+    groupme.replies = [(429, '1')]
+    start = time.perf_counter()
+    assert outbox_for(url_of(groupme))._post('bot', "hi")
+    assert time.perf_counter() - start >= 1
+    assert groupme.posts == 2
+
+
+def test_gives_up_on_server_errors(groupme):
+    groupme.replies = [502, 502, 502, 502]
+    assert not outbox_for(url_of(groupme))._post('bot', "hi")
+    assert groupme.posts == 3
+
+
+@pytest.mark.parametrize('status', [400, 403])
+def test_does_not_retry_client_errors(groupme, status):
+    groupme.replies = [status]
+    assert not outbox_for(url_of(groupme))._post('bot', "hi")
+    assert groupme.posts == 1
+
+
+def test_does_not_retry_read_timeouts(groupme):
+    # GroupMe may have posted the message before it stopped answering.
+    groupme.replies = ['hang']
+    with pytest.raises(requests.ReadTimeout):
+        outbox_for(url_of(groupme))._post('bot', "hi")
+    assert groupme.posts == 1
+
+
+def test_retries_refused_connections():
+    with socket.socket() as closed:
+        closed.bind(('127.0.0.1', 0))
+        url = "http://%s:%d" % closed.getsockname()
+    outbox = outbox_for(url)
+    attempts = []
+    post = outbox.session.post
+
+    def counted(*args, **kwargs):
+        attempts.append(args)
+        return post(*args, **kwargs)
+    outbox.session.post = counted
+
+    with pytest.raises(requests.ConnectionError):
+        outbox._post('bot', "hi")
+    assert len(attempts) == 3
@@ -0,0 +1,32 @@
+import time
+
+import pytest
+
+from commands.parse import fast_parse, parse_input
+
+
+@pytest.mark.parametrize('text, command, mentions, args', [
+    ("/lb", 'lb', [], []),
+    ("/lb, glicko", 'lb', [], ['glicko']),
+    ("/partner @Bo Smith", 'partner', ['Bo Smith'], []),
+    ("/botch @Bo, spilled a beer", 'botch', ['Bo'], ['spilled', 'a', 'beer']),
+    ("/score @A @B @C @D, 7 - 3", 'score', ['A', 'B', 'C', 'D'], ['7', '3']),
+    ("/score @A @B @C @D,7-3 ", 'score', ['A', 'B', 'C', 'D'], ['7', '3']),
+])
+def test_fast_parse(text, command, mentions, args):
+    parsed = fast_parse(text)
+    assert (parsed.command, parsed.mentions, parsed.args) ==\
+        (command, mentions, args)
+
+
+@pytest.mark.parametrize('text', [
+    "/botch @Bo, " + "a" * 30 + "!",
+    "/botch @Bo, " + "a " * 400 + "!",
+    "/botch @Bo, " + "a-" * 400 + "!",
+    "/botch @" + "a " * 400 + "!",
+])
+def test_parse_time_is_bounded(text):
+    # A single chat message used to take seconds to minutes here.
+    start = time.perf_counter()
+    parse_input(text)
+    assert time.perf_counter() - start < 0.5
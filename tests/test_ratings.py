@@ -0,0 +1,122 @@
+import math
+import numpy as np
+import pytest
+import random
+
+from benchmarks import harness
+from commands import ratings, replay, settings
+from commands.models import Rating, Stats
+from database import db
+
+
+def test_glicko2_paper_example():
+    """ The worked example in Glickman's "Example of the Glicko-2 system". """
+    engine = ratings.Glicko2(tau=0.5)
+    # Each side is a player and a teammate with the same state, so the
+    # player is rated against the opponent alone.
+    player = [1500., 200., 0.06, 0.]
+    opponents = [[1400., 30.], [1550., 100.], [1700., 300.]]
+    states = np.array([player, player] + [rating + [0.06, 0.]
+                                          for rating in opponents
+                                          for _ in range(2)])
+    players = np.array([[0, 1, 2, 3], [0, 1, 4, 5], [0, 1, 6, 7]])
+    after = engine.rate(states, players, np.array([7, 3, 3]),
+                        np.array([3, 7, 7]), 1)
+    rating, deviation, volatility, period = after[0]
+    assert rating == pytest.approx(1464.06, abs=0.01)
+    assert deviation == pytest.approx(151.52, abs=0.01)
+    assert volatility == pytest.approx(0.05999, abs=1e-5)
+    assert period == 1
+
+
+def test_glicko2_volatility_iteration():
+    """ Step 5 of the paper, from its intermediate values. """
+    engine = ratings.Glicko2(tau=0.5)
+    sigma = engine.volatility(np.array([1.1513]), np.array([0.06]),
+                              np.array([1.7785]), np.array([-0.4834]))
+    assert sigma[0] == pytest.approx(0.05999, abs=1e-5)
+
+
+def test_glicko2_deviation_grows_while_idle():
+    engine = ratings.Glicko2()
+    states = np.array([[1500., 200., 0.06, 0.], [1500., 340., 0.06, 0.]])
+    # Rated in period 0, so periods 1 to 10 were sat out by period 11.
+    phi = engine.deviation(states, 11) * ratings.GLICKO_SCALE
+    assert phi[0] == pytest.approx(math.sqrt(200 ** 2 + 10 * (
+        0.06 * ratings.GLICKO_SCALE) ** 2))
+    assert phi[1] < engine.MAX_DEVIATION
+    # Capped at a new player's deviation.
+    assert engine.deviation(states, 101)[1] * ratings.GLICKO_SCALE ==\
+        pytest.approx(engine.MAX_DEVIATION)
+    # No growth for the next period or the current one.
+    assert (engine.deviation(states, 1) * ratings.GLICKO_SCALE ==
+            pytest.approx([200., 340.]))
+
+
+@pytest.mark.parametrize('score_12, score_34, expected', [
+    (7, 3, [[30.5946, 3.9092], [26.3376, 5.6868],
+            [18.1795, 6.4971], [27.6654, 2.9627]]),
+    (3, 7, [[28.6169, 3.8675], [21.8887, 5.5404],
+            [24.2346, 6.2585], [28.7783, 2.9453]]),
+])
+def test_trueskill_two_on_two(score_12, score_34, expected):
+    """ Matches the `trueskill` package with draw_probability=0. """
+    states = np.array([[30., 4.], [25., 6.], [20., 7.], [28., 3.]])
+    after = ratings.TrueSkill().rate(states, np.array([[0, 1, 2, 3]]),
+                                     np.array([score_12]),
+                                     np.array([score_34]), 0)
+    assert after == pytest.approx(np.array(expected), abs=1e-4)
+
+
+def test_waves_rate_as_if_one_at_a_time():
+    engine = ratings.ENGINES['trueskill']
+    names = [f"Player {i}" for i in range(8)]
+    generator = random.Random(7)
+    matches = [(harness.START_TIMESTAMP + i, generator.sample(names, 4),
+                *generator.choice([(7, 3), (3, 7)])) for i in range(40)]
+
+    waves = ratings.Ratings()
+    for match in matches:
+        waves.add(match)
+    waves.close()
+    one_at_a_time = {}
+    for match in matches:
+        ratings.rate(engine, [match], one_at_a_time)
+
+    batched = waves.states[engine.name]
+    assert batched.keys() == one_at_a_time.keys()
+    for name in names:
+        assert batched[name] == pytest.approx(one_at_a_time[name])
+
+
+def stored():
+    states = {(row.engine, row.name): [float(getattr(row, field)) for field
+                                       in ratings.ENGINES[row.engine].fields]
+              for row in Rating.query}
+    elos = {stat.name: stat.elo for stat in Stats.query}
+    return states, elos
+
+
+def test_live_ratings_match_a_replay(players, send):
+    generator = random.Random(3)
+    # A few matches per rating period, so periods close as scores arrive.
+    step = settings.RATING_PERIOD // 3 + 1
+    for i in range(20):
+        mentions = generator.sample(players, 4)
+        text = "/score {}, {} - {}".format(
+            ' '.join(f"@Player {int(id) - 1000}" for id in mentions),
+            *generator.choice([(7, 3), (3, 7)]))
+        assert send(text, players[0], mentions,
+                    harness.START_TIMESTAMP + i * step).startswith("Match")
+    live_states, live_elos = stored()
+
+    replay.replay(db, {})
+    db.session.commit()
+    states, elos = stored()
+
+    assert states.keys() == live_states.keys()
+    assert {engine for engine, _ in states} == {'glicko', 'trueskill'}
+    for key, state in states.items():
+        assert live_states[key] == pytest.approx(state)
+    # Elo is stored to three decimals, and rounded at different points.
+    assert live_elos == pytest.approx(elos, abs=0.01)
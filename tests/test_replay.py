@@ -0,0 +1,43 @@
+from benchmarks import harness
+from commands import replay, settings
+from commands.models import Participant, Score
+from database import db
+
+
+def rated():
+    records = [(score.id, score.elo_1, score.elo_2, score.elo_3, score.elo_4)
+               for score in Score.query.order_by(Score.id)]
+    participants = db.session.query(
+        Participant.match_id, Participant.player_id, Participant.team,
+        Participant.rating_before, Participant.rating_after)\
+        .order_by(Participant.match_id, Participant.player_id).all()
+    return records, participants
+
+
+def test_writes_back_in_chunks(app):
+    harness.generate(50, 8)
+    replay.replay(db, {})
+    db.session.commit()
+    whole = rated()
+
+    # Chunks that do not divide the history leave a partial one at the end.
+    replay.replay(db, {}, chunk_size=7)
+    db.session.commit()
+
+    assert rated() == whole
+    assert len(whole[1]) == 4 * 50
+
+
+def test_replay_from_rewrites_only_later_matches(app, monkeypatch):
+    monkeypatch.setattr(settings, 'CHECKPOINT_INTERVAL', 10)
+    harness.generate(30, 8)
+    replay.replay(db, {})
+    db.session.commit()
+    whole = rated()
+
+    # Restores the checkpoint after match 20 and replays from there.
+    match = Score.query.get(25)
+    replay.replay_from(db, (match.timestamp, match.id))
+    db.session.commit()
+
+    assert rated() == whole
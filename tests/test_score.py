@@ -0,0 +1,28 @@
+from commands.models import Participant, Score
+
+
+def test_score_records_match(players, send):
+    reply = send("/score @Player 0 @Player 1 @Player 2 @Player 3, 7 - 3",
+                 players[0], players[:4])
+    assert reply.startswith("Match 1 recorded")
+    assert Participant.query.count() == 4
+
+
+def test_score_rejects_repeated_players(players, send):
+    reply = send("/score @Player 0 @Player 0 @Player 1 @Player 2, 7 - 3",
+                 players[0], [players[0], players[0], players[1],
+                              players[2]])
+    assert reply == "Tag each player once."
+    assert Score.query.count() == 0
+
+    reply = send("/score @me @Player 0 @Player 1 @Player 2, 7 - 3",
+                 players[0], players[:3])
+    assert reply == "Tag each player once."
+    assert Score.query.count() == 0
+
+
+def test_matchup_rejects_repeated_players(players, send):
+    reply = send("/matchup @Player 0 @Player 0 @Player 1 @Player 2",
+                 players[0], [players[0], players[0], players[1],
+                              players[2]])
+    assert reply == "Tag each player once."
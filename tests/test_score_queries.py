@@ -0,0 +1,68 @@
+import pytest
+
+from benchmarks import harness
+from commands import replay, settings
+from commands.models import Checkpoint
+from commands.score import ScoreCommand
+from database import db
+from sqlalchemy import event
+
+# Statements for one in-order `/score` between players who have met: the
+# data version read, the player directory reloaded after the last write,
+# the writer lock, one check for redeliveries, backdating and the checkpoint
+# cadence, stats, pairs (a read and three batched updates), the match, two
+# batched stats updates, participants, the alternative ratings (read and
+# write) and the data version bump.
+SCORE_BUDGET = 16
+
+
+@pytest.fixture
+def history(app):
+    """ Timestamp of the newest of 200 rated matches between 12 players. """
+    _, timestamp = harness.generate(200, 12)
+    replay.replay(db, {})
+    db.session.commit()
+    return timestamp
+
+
+def record(messages):
+    return harness.record([ScoreCommand(message) for message in messages])
+
+
+def test_score_statement_budget(history):
+    ids = [harness.user_id(i) for i in range(4)]
+    with harness.count_queries() as single:
+        reply, = record([harness.score_message(ids, 7, 3, history + 1)])
+    assert reply.startswith("Match 201 recorded")
+    assert len(single) <= SCORE_BUDGET, '\n\n'.join(single.statements)
+
+
+def test_batch_commits_once(history):
+    commits = []
+
+    def committed(session):
+        commits.append(session)
+    event.listen(db.session, 'after_commit', committed)
+    ids = [harness.user_id(i) for i in range(4)]
+    try:
+        replies = record([harness.score_message(ids, 7, 5, history + 1 + i)
+                          for i in range(10)])
+    finally:
+        event.remove(db.session, 'after_commit', committed)
+    assert all("recorded" in reply for reply in replies)
+    assert len(commits) == 1
+
+
+def test_checkpoints_count_matches_since_the_newest(history, monkeypatch):
+    monkeypatch.setattr(settings, 'CHECKPOINT_INTERVAL', 7)
+    newest = Checkpoint.query.order_by(Checkpoint.timestamp.desc()).first()
+    ids = [harness.user_id(i) for i in range(4)]
+    for i in range(16):
+        record([harness.score_message(ids, 7, 3, history + 1 + i)])
+
+    positions = [(checkpoint.timestamp, checkpoint.match_id) for checkpoint
+                 in Checkpoint.query.filter(Checkpoint.timestamp >
+                                            newest.timestamp)]
+    # Seven and fourteen matches after the one at match 200, wherever the
+    # ids fall against the interval.
+    assert positions == [(history + 7, 207), (history + 14, 214)]
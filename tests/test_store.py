@@ -0,0 +1,22 @@
+from benchmarks import harness
+from commands import cache, store
+
+SCORES = ["7 - 3", "3 - 7", "7 - 5", "7 - 1"]
+
+
+def test_rewinds_after_other_workers_replays(players, send, other_worker):
+    for i, score in enumerate(SCORES):
+        send(f"/score @Player 0 @Player 1 @Player 2 @Player 3, {score}",
+             players[0], players[:4], harness.START_TIMESTAMP + i)
+    assert "after 4 games" in send("/history", players[0])
+
+    # Re-rates the three matches after it, in another worker.
+    assert other_worker("/strike, 1", players[0]).startswith(
+        "Match 1 deleted.")
+
+    cache.refresh()
+    held = store.timeline(players[0], 10)
+    store._stores.clear()
+    assert held == store.timeline(players[0], 10)
+    assert held.games == 3
+    assert "after 3 games" in send("/history", players[0])